@@ -6,11 +6,133 @@ import cv2
 import numpy as np
 import time
 import argparse
+import subprocess
+from PIL import Image
+from imageio_ffmpeg import get_ffmpeg_exe
+from image_cache import get_image_cache, image_cache_key, prompt_seed
+
+SD_STEPS = 30
+# Fast CPU path (SD_FAST_CPU=1): DPM++ multistep reaches SD 1.5 quality in ~20
+# steps, and the UNet runs at SD_FAST_SCALE of the target size before a
+# Lanczos upscale (the Ken Burns pass rescales to 1080p regardless).
+SD_FAST_CPU = os.environ.get("SD_FAST_CPU", "0") == "1"
+SD_FAST_STEPS = 20
+SD_FAST_SCALE = 0.625
+SD_TORCH_COMPILE = os.environ.get("SD_TORCH_COMPILE", "1") == "1"
+
+def render_size(width, height, scale):
+    """Scaled size rounded down to the multiple of 8 the SD VAE needs."""
+    return max(64, int(width * scale) // 8 * 8), max(64, int(height * scale) // 8 * 8)
+
+def fast_scheduler(scheduler):
+    from diffusers import DPMSolverMultistepScheduler
+    return DPMSolverMultistepScheduler.from_config(scheduler.config)
+
+def optimize_unet_for_cpu(unet, compile_unet=SD_TORCH_COMPILE):
+    """channels_last, and torch.compile where this torch has it. Returns the unet to use."""
+    unet.to(memory_format=torch.channels_last)
+    # Fused SDPA is already memory-lean and much faster than sliced attention on CPU;
+    # slicing only guards RAM on torch builds without it
+    if not hasattr(torch.nn.functional, "scaled_dot_product_attention"):
+        unet.set_attention_slice("auto")
+    if compile_unet and hasattr(torch, "compile"):
+        try:
+            return torch.compile(unet)
+        except Exception as e:
+            print(f"⚠️ torch.compile unavailable, running eager: {e}")
+    return unet
+
+# Ken Burns clips are intermediates that get re-encoded by the final render, so
+# they go out once as near-lossless x264 rather than through an mp4v pass.
+KB_TARGET_SIZE = (1920, 1080)
+KB_MAX_ZOOM = 1.1
+KB_ENCODE_ARGS = ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "18", "-pix_fmt", "yuv420p"]
+
+def ken_burns_affines(src_w, src_h, num_frames, move_type, target=KB_TARGET_SIZE, prescale=None):
+    """
+    Inverse affines (output pixel -> source pixel), shape (num_frames, 2, 3), for
+    the zoom/pan path. Coordinates are in a source already resized by `prescale`
+    (default: the largest zoom used), so every frame is a mild downsample of it.
+    """
+    target_w, target_h = target
+    base_scale = max(target_w / src_w, target_h / src_h)
+    if move_type == "zoom_in":
+        start_scale, end_scale = base_scale, base_scale * KB_MAX_ZOOM
+    elif move_type == "zoom_out":
+        start_scale, end_scale = base_scale * KB_MAX_ZOOM, base_scale
+    else:
+        start_scale = end_scale = base_scale * KB_MAX_ZOOM
+    prescale = prescale or max(start_scale, end_scale)
+
+    t = np.linspace(0.0, 1.0, num_frames) if num_frames > 1 else np.zeros(1)
+    scale = start_scale + (end_scale - start_scale) * t
+    if move_type in ("zoom_in", "zoom_out"):
+        # Centered crop of the scaled image
+        x_off = np.maximum(0.0, (src_w * scale - target_w) / 2)
+        y_off = np.maximum(0.0, (src_h * scale - target_h) / 2)
+    else:
+        max_off_x = max(0.0, src_w * start_scale - target_w)
+        max_off_y = max(0.0, src_h * start_scale - target_h)
+        s_x, e_x = random.uniform(0, max_off_x), random.uniform(0, max_off_x)
+        s_y, e_y = random.uniform(0, max_off_y), random.uniform(0, max_off_y)
+        x_off = s_x + (e_x - s_x) * t
+        y_off = s_y + (e_y - s_y) * t
+
+    k = prescale / scale
+    affines = np.zeros((len(t), 2, 3), dtype=np.float64)
+    affines[:, 0, 0] = k
+    affines[:, 1, 1] = k
+    affines[:, 0, 2] = x_off * k
+    affines[:, 1, 2] = y_off * k
+    return affines, prescale
+
+def render_ken_burns(image_path, output_path, duration=5, fps=24, move_type=None, target=KB_TARGET_SIZE):
+    """
+    Renders a Ken Burns clip: the image is upscaled once, zoom frames are one
+    cv2.warpAffine each into a reused buffer (sub-pixel motion, no full-image
+    resize per frame), pan frames are plain crops, and raw BGR frames stream
+    into a single libx264 encode. Returns output_path.
+    """
+    img = cv2.imread(image_path)
+    if img is None:
+        raise ValueError(f"Could not load image: {image_path}")
+    h, w = img.shape[:2]
+    target_w, target_h = target
+    move_type = move_type or random.choice(["zoom_in", "pan_right", "pan_left", "zoom_out"])
+    num_frames = max(1, int(duration * fps))
+    affines, prescale = ken_burns_affines(w, h, num_frames, move_type, target)
+    src = cv2.resize(img, (int(round(w * prescale)), int(round(h * prescale))), interpolation=cv2.INTER_CUBIC)
+
+    cmd = [get_ffmpeg_exe(), "-y", "-v", "error",
+           "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{target_w}x{target_h}", "-r", str(fps), "-i", "-",
+           *KB_ENCODE_ARGS, "-movflags", "+faststart", output_path]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    frame = np.empty((target_h, target_w, 3), dtype=np.uint8)
+    try:
+        for m in affines:
+            if m[0, 0] == 1.0:
+                # Constant-scale pan: a pixel-snapped crop of the pre-scaled source is just a copy
+                x = min(int(m[0, 2]), src.shape[1] - target_w)
+                y = min(int(m[1, 2]), src.shape[0] - target_h)
+                frame[:] = src[y:y + target_h, x:x + target_w]
+            else:
+                cv2.warpAffine(src, m, (target_w, target_h), dst=frame,
+                               flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+            proc.stdin.write(frame.data)
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    err = proc.stderr.read().decode(errors="replace")
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed: {err.strip()[-300:]}")
+    return output_path
 
 class AIVisualGenerator:
-    def __init__(self):
+    def __init__(self, fast_cpu=None):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.image_pipe = None
+        self.fast_cpu = (SD_FAST_CPU if fast_cpu is None else fast_cpu) and self.device == "cpu"
+        self.image_cache = get_image_cache()
         
         # Models
         self.image_model_id = "runwayml/stable-diffusion-v1-5"
@@ -48,15 +170,18 @@ class AIVisualGenerator:
                 self.image_pipe.enable_vae_slicing()
             else:
                 self.image_pipe.to("cpu")
+                if self.fast_cpu:
+                    self.image_pipe.scheduler = fast_scheduler(self.image_pipe.scheduler)
+                    self.image_pipe.vae.to(memory_format=torch.channels_last)
+                    self.image_pipe.unet = optimize_unet_for_cpu(self.image_pipe.unet)
+                    print(f"⚡ Fast CPU path: DPM++ {SD_FAST_STEPS} steps at {SD_FAST_SCALE:.0%} size, channels_last")
                 
             print("✅ Image Model Loaded")
         except Exception as e:
             print(f"❌ Error loading Image model: {e}")
             raise e
 
-    def generate_image(self, topic, output_path, style="minimalist", width=None, height=None):
-        self._load_image_pipeline()
-        
+    def _build_prompt(self, topic, style="minimalist", width=None, height=None):
         if style == "realistic":
             prompt = (
                 f"cinematic shot of {topic}, 4k, hyperrealistic, detailed, "
@@ -75,136 +200,90 @@ class AIVisualGenerator:
             negative_prompt = "text, watermark, blurry, cartoon, drawing, painting, low quality, distortion, ugly"
             h = height if height else 576
             w = width if width else 1024
-        
-        print(f"🎨 Generating AI Image ({style}) for: {topic}...")
+        return prompt, negative_prompt, w, h
+
+    def generate_image(self, topic, output_path, style="minimalist", width=None, height=None):
+        return self.generate_images([topic], [output_path], style=style, width=width, height=height)[0]
+
+    def _profile(self):
+        """Steps, render scale and cache profile tag for the active inference path."""
+        if self.fast_cpu:
+            return SD_FAST_STEPS, SD_FAST_SCALE, f"dpm++,x{SD_FAST_SCALE}"
+        return SD_STEPS, 1.0, "default"
+
+    def generate_images(self, topics, output_paths, style="minimalist", width=None, height=None):
+        """
+        Generates one image per topic in a single pipeline call; returns a path (or None) per topic.
+        Prompts already in the image cache are copied instead of regenerated.
+        """
+        steps, scale, profile = self._profile()
+        results = [None] * len(topics)
+        todo = []
+        for i, (topic, output_path) in enumerate(zip(topics, output_paths)):
+            prompt, negative_prompt, w, h = self._build_prompt(topic, style, width, height)
+            seed = prompt_seed(prompt, negative_prompt)
+            rw, rh = render_size(w, h, scale)
+            key = image_cache_key(prompt, negative_prompt, seed, steps, rw, rh, self.image_model_id, profile)
+            if self.image_cache.lookup(key, output_path) is not None:
+                print(f"♻️ Cached AI image for: {topic}")
+                results[i] = output_path
+            else:
+                todo.append((i, prompt, negative_prompt, seed, key, (w, h), (rw, rh)))
+        if not todo:
+            return results
+
+        self._load_image_pipeline()
+        (w, h), (rw, rh) = todo[0][5], todo[0][6]
+        print(f"🎨 Generating {len(todo)} AI Image(s) ({style}, {rw}x{rh}, {steps} steps) for: "
+              f"{', '.join(topics[t[0]] for t in todo)}...")
         try:
-            image = self.image_pipe(
-                prompt=prompt,
-                negative_prompt=negative_prompt,
-                num_inference_steps=30, 
-                guidance_scale=7.5,
-                height=h, 
-                width=w
-            ).images[0]
-            image.save(output_path)
-            print(f"🖼️ Saved AI image to {output_path}")
-            return output_path
+            t0 = time.time()
+            images = self._run_pipe(todo, steps, rw, rh)
+            per_image = (time.time() - t0) / len(todo)
+            for (i, prompt, negative_prompt, seed, key, _, _), image in zip(todo, images):
+                if image.size != (w, h):
+                    image = image.resize((w, h), Image.LANCZOS)
+                image.save(output_paths[i])
+                print(f"🖼️ Saved AI image to {output_paths[i]}")
+                self.image_cache.store(key, output_paths[i], {
+                    "prompt": prompt, "negative_prompt": negative_prompt, "seed": seed, "steps": steps,
+                    "render_size": [rw, rh], "size": [w, h], "model_id": self.image_model_id, "profile": profile,
+                }, per_image)
+                results[i] = output_paths[i]
         except Exception as e:
             print(f"❌ AI Generation Failed: {e}")
-            return None
+        return results
+
+    def _run_pipe(self, todo, steps, width, height):
+        def call():
+            return self.image_pipe(
+                prompt=[t[1] for t in todo],
+                negative_prompt=[t[2] for t in todo],
+                generator=[torch.Generator("cpu").manual_seed(t[3]) for t in todo],
+                num_inference_steps=steps,
+                guidance_scale=7.5,
+                height=height,
+                width=width
+            ).images
+        try:
+            return call()
+        except Exception as e:
+            # torch.compile fails lazily (e.g. no C++ toolchain); fall back to the eager UNet once
+            orig = getattr(self.image_pipe.unet, "_orig_mod", None)
+            if orig is None:
+                raise
+            print(f"⚠️ Compiled UNet failed ({e}); retrying eager.")
+            self.image_pipe.unet = orig
+            return call()
 
     def create_ken_burns_video(self, image_path, output_path, duration=5, fps=24):
         """
-        Creates a video from an image with a Ken Burns effect (pan/zoom) using OpenCV.
+        Creates a video from an image with a Ken Burns effect (pan/zoom).
         """
         print(f"🎥 Creating Ken Burns effect for {duration}s: {os.path.basename(image_path)}")
         
         try:
-            img = cv2.imread(image_path)
-            if img is None:
-                raise ValueError(f"Could not load image: {image_path}")
-                
-            h, w = img.shape[:2]
-            
-            # Target dimensions (1080p)
-            target_w, target_h = 1920, 1080
-            
-            # Calculate "Cover" dimensions (min scale to cover 1920x1080)
-            scale_w = target_w / w
-            scale_h = target_h / h
-            base_scale = max(scale_w, scale_h)
-            
-            max_scale = base_scale * 1.15
-            resized_w = int(w * max_scale)
-            resized_h = int(h * max_scale)
-            
-            # Ensure resized dimensions are at least target dimensions
-            if resized_w < target_w or resized_h < target_h:
-                 # Should not happen if base_scale is correct, but safe check
-                 pass
-
-            # Movement types
-            move_type = random.choice(["zoom_in", "pan_right", "pan_left", "zoom_out"])
-            
-            if move_type == "zoom_in":
-                start_scale = base_scale
-                end_scale = base_scale * 1.1
-            elif move_type == "zoom_out":
-                start_scale = base_scale * 1.1
-                end_scale = base_scale
-            else:
-                start_scale = base_scale * 1.1
-                end_scale = base_scale * 1.1
-            
-            video_writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (target_w, target_h))
-            num_frames = int(duration * fps)
-            
-            # Pre-calc pans
-            max_off_x = (w * start_scale) - target_w
-            max_off_y = (h * start_scale) - target_h
-            
-            # Ensure max_off is not negative
-            max_off_x = max(0, max_off_x)
-            max_off_y = max(0, max_off_y)
-            
-            # Random start/end offsets
-            s_x = random.uniform(0, max_off_x)
-            s_y = random.uniform(0, max_off_y)
-            e_x = random.uniform(0, max_off_x)
-            e_y = random.uniform(0, max_off_y)
-            
-            # Pre-resize base image for panning (optimization)
-            # Only valid if scale is constant
-            img_pan_base = None
-            
-            for i in range(num_frames):
-                t = i / max(1, num_frames - 1) # 0.0 to 1.0
-                
-                # Interpolate scale
-                current_scale = start_scale + (end_scale - start_scale) * t
-                
-                # Resize src to current scale
-                curr_w = int(w * current_scale)
-                curr_h = int(h * current_scale)
-                
-                # Optimization: Only resize if scale changes
-                if abs(end_scale - start_scale) > 0.001:
-                    # Zooming
-                    temp = cv2.resize(img, (curr_w, curr_h), interpolation=cv2.INTER_LINEAR)
-                    
-                    # Center crop 1920x1080 (simpler for zoom)
-                    cx, cy = curr_w // 2, curr_h // 2
-                    x1 = int(cx - target_w // 2)
-                    y1 = int(cy - target_h // 2)
-                    
-                    # Clamp
-                    x1 = max(0, min(x1, curr_w - target_w))
-                    y1 = max(0, min(y1, curr_h - target_h))
-                    
-                    frame = temp[y1:y1+target_h, x1:x1+target_w]
-                    
-                else:
-                    # Panning (Constant scale)
-                    if img_pan_base is None:
-                         img_pan_base = cv2.resize(img, (curr_w, curr_h), interpolation=cv2.INTER_CUBIC)
-                        
-                    # Interpolate pos
-                    curr_x = int(s_x + (e_x - s_x) * t)
-                    curr_y = int(s_y + (e_y - s_y) * t)
-                    
-                    # Clamp
-                    curr_x = max(0, min(curr_x, curr_w - target_w))
-                    curr_y = max(0, min(curr_y, curr_h - target_h))
-                    
-                    frame = img_pan_base[curr_y:curr_y+target_h, curr_x:curr_x+target_w]
-                
-                # Final safety resize if rounding errors occurred
-                if frame.shape[0] != target_h or frame.shape[1] != target_w:
-                     frame = cv2.resize(frame, (target_w, target_h))
-                     
-                video_writer.write(frame)
-                
-            video_writer.release()
+            render_ken_burns(image_path, output_path, duration=duration, fps=fps)
             print(f"✅ Saved Ken Burns video to {output_path}")
             return output_path
             
@@ -0,0 +1,77 @@
+"""
+Precomputed intro and countdown animations shared by the karaoke and quiz renderers.
+
+Both animations are deterministic for a given size, duration and colour, so the
+expensive part is built once per parameter set and memoized for every video the
+process renders:
+
+- The intro progress bar is rasterized in its two end states (empty, full) and
+  swept between them with karaoke_text.WipeFrames, so a frame is a column copy
+  into a reused buffer instead of a fresh PIL image and draw per frame.
+- Countdown digits are rendered once per (number, size, colours) as outlined RGBA
+  overlays and alpha-composited onto whatever they count down over.
+"""
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from karaoke_text import WipeFrames, caption_block, render_line, text_bbox
+
+INTRO_BAR_SIZE = (600, 20)
+INTRO_BAR_BG = (50, 50, 50, 200)
+INTRO_BAR_FILL = "lime"
+
+@lru_cache(maxsize=16)
+def intro_bar_states(size=INTRO_BAR_SIZE, bg=INTRO_BAR_BG, fill=INTRO_BAR_FILL):
+    """(empty, full) RGBA arrays of the intro bar; shared, read-only."""
+    empty = Image.new("RGBA", size, bg)
+    full = empty.copy()
+    ImageDraw.Draw(full).rectangle([0, 0, size[0], size[1]], fill=fill)
+    return np.array(empty), np.array(full)
+
+class IntroBarFrames:
+    """
+    Frame functions for the intro bar filling over `duration` seconds: rgb(t) for
+    the clip and mask(t) for its mask, same pixels as drawing
+    rectangle([0, 0, int(w * t / duration), h]) on a fresh image every frame.
+    """
+
+    def __init__(self, duration, size=INTRO_BAR_SIZE, bg=INTRO_BAR_BG, fill=INTRO_BAR_FILL):
+        empty, full = intro_bar_states(size, bg, fill)
+        w = size[0]
+        # The rectangle is inclusive, so the fill covers columns [0, bar_w] = [0, 1 + bar_w)
+        self._rgb = WipeFrames(empty, full, 1, w + 1, duration)
+        self._mask = WipeFrames(empty[:, :, 3:] / 255.0, full[:, :, 3:] / 255.0, 1, w + 1, duration, channels=1)
+
+    def rgb(self, t):
+        return self._rgb(t)
+
+    def mask(self, t):
+        return self._mask(t)[:, :, 0]
+
+@lru_cache(maxsize=64)
+def countdown_sprite(number, size=200, color="yellow"):
+    """Caption-style countdown digit (outlined, on its translucent box) as a cropped TextBlock."""
+    return caption_block(str(number), size, color)
+
+@lru_cache(maxsize=64)
+def number_overlay(number, size=300, fill="white", stroke_fill="black", stroke_width=8, style="bold"):
+    """
+    Outlined digit raster plus the offset to paste it at, relative to where
+    draw.text would put it: (image, (dx, dy), (text_w, text_h)). Shared; do not draw on it.
+    """
+    text = str(number)
+    img, offset = render_line(text, size, fill, style, stroke_fill, stroke_width)
+    left, top, right, bottom = text_bbox(text, size, style)
+    return img, offset, (right - left, bottom - top)
+
+def overlay_number(img, number, **kwargs):
+    """Composite a cached number overlay centred on an RGB/RGBA PIL image; returns a new RGB image."""
+    overlay, (dx, dy), (text_w, text_h) = number_overlay(number, **kwargs)
+    width, height = img.size
+    x = (width - text_w) // 2
+    y = (height - text_h) // 2
+    out = img.convert("RGBA")
+    out.alpha_composite(overlay, dest=(max(0, x + dx), max(0, y + dy)))
+    return out.convert("RGB")
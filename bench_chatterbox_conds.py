@@ -0,0 +1,62 @@
+"""
+Per-sentence Chatterbox latency with and without the conditioning cache.
+
+"before" passes audio_prompt_path on every generate() call, so the reference
+wav is loaded and embedded per sentence. "after" uses tts_chatterbox's cached
+conditionals (encoded once, or loaded from voice_cond_cache/). The TTS audio
+cache is bypassed so both paths really synthesize.
+
+Usage: python bench_chatterbox_conds.py <reference.wav|mp3> [num_sentences]
+"""
+import sys
+import time
+import statistics
+
+import tts_chatterbox
+
+SENTENCES = [
+    "The rain had not stopped for three days.",
+    "Somewhere below, the harbour lights blinked on one by one.",
+    "She folded the letter twice and slid it under the door.",
+    "Nobody in the village remembered the lighthouse keeper's name.",
+    "By morning the fog had swallowed the whole valley.",
+    "He counted the steps down to the cellar, just as before.",
+]
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    ref = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    texts = [SENTENCES[i % len(SENTENCES)] for i in range(n)]
+
+    model = tts_chatterbox.load_model()
+    if not model:
+        sys.exit("Chatterbox model unavailable.")
+    model.generate("Warm up.", audio_prompt_path=ref)
+
+    before = []
+    for text in texts:
+        t0 = time.perf_counter()
+        model.generate(text, audio_prompt_path=ref)
+        before.append(time.perf_counter() - t0)
+
+    model._cond_cache = {}
+    t0 = time.perf_counter()
+    tts_chatterbox.get_conditionals(model, ref)
+    first_cond = time.perf_counter() - t0
+
+    after = []
+    for text in texts:
+        t0 = time.perf_counter()
+        tts_chatterbox._synthesize(model, text, ref, tts_chatterbox.DEFAULT_EXAGGERATION, tts_chatterbox.DEFAULT_CFG_WEIGHT)
+        after.append(time.perf_counter() - t0)
+
+    print(f"{n} sentences on {model.device}")
+    print(f"before (audio_prompt_path per call): median {statistics.median(before):.3f}s  total {sum(before):.2f}s")
+    print(f"after  (cached conditionals):        median {statistics.median(after):.3f}s  total {sum(after):.2f}s")
+    print(f"conditionals fetch (disk or encode): {first_cond:.3f}s")
+
+if __name__ == "__main__":
+    main()
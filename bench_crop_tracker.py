@@ -0,0 +1,80 @@
+"""
+Benchmark for crop-trajectory analysis on a synthetic clip.
+
+Renders a 1080p test clip with ffmpeg (a moving subject over a busy background),
+then times the legacy per-sample path (two random-access decodes and a fresh
+Haar cascade per 0.5 s sample) against the streaming CropTracker.
+
+Usage: python bench_crop_tracker.py [seconds]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+import cv2
+import numpy as np
+
+from scene_matcher import CropTracker, weighted_face_center
+
+def make_clip(path, seconds):
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:rate=30:duration={seconds}",
+        "-vf", f"drawbox=x='200+1400*t/{seconds}':y=380:w=320:h=320:color=white:t=fill",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", path,
+    ], check=True)
+
+def legacy_trajectory(path, duration, interval=0.5):
+    """Pre-tracker behaviour: seek twice per sample, new cascade per sample, full-res detection."""
+    cap = cv2.VideoCapture(path)
+    w = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+    centers = []
+    for t in np.arange(0, duration, interval):
+        cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+        ok, frame = cap.read()
+        if not ok:
+            break
+        cap.set(cv2.CAP_PROP_POS_MSEC, (t + 0.2) * 1000)
+        ok2, next_frame = cap.read()
+        motion_x = None
+        if ok2:
+            h_small, w_small = 360, int(360 * w / frame.shape[0])
+            g1 = cv2.cvtColor(cv2.resize(frame, (w_small, h_small)), cv2.COLOR_BGR2GRAY)
+            g2 = cv2.cvtColor(cv2.resize(next_frame, (w_small, h_small)), cv2.COLOR_BGR2GRAY)
+            _, thresh = cv2.threshold(cv2.absdiff(g1, g2), 30, 255, cv2.THRESH_BINARY)
+            M = cv2.moments(thresh)
+            if M["m00"] > 100:
+                motion_x = M["m10"] / M["m00"] * (w / w_small)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        face_x = weighted_face_center(face_cascade.detectMultiScale(gray, 1.3, 5))
+        x = face_x if face_x is not None else motion_x
+        centers.append(x if x is not None else (centers[-1] if centers else w / 2))
+    cap.release()
+    return centers
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 12.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.mp4")
+        make_clip(path, seconds)
+        print(f"Synthetic clip: 1920x1080, {seconds:.0f}s")
+
+        t0 = time.perf_counter()
+        legacy = legacy_trajectory(path, seconds)
+        legacy_s = time.perf_counter() - t0
+        print(f"legacy sampling      {legacy_s:7.2f} s  ({len(legacy)} samples)")
+
+        tracker = CropTracker()
+        t0 = time.perf_counter()
+        times, centers = tracker.track(path, 0.0, seconds, src_size=(1920, 1080))
+        stream_s = time.perf_counter() - t0
+        print(f"streaming tracker    {stream_s:7.2f} s  ({len(times)} frames)")
+        print(f"speedup: {legacy_s / stream_s:.1f}x")
+        if len(centers):
+            print(f"trajectory x: start {centers[0]:.0f}, mid {centers[len(centers) // 2]:.0f}, end {centers[-1]:.0f}")
+
+if __name__ == "__main__":
+    main()
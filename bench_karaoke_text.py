@@ -0,0 +1,102 @@
+"""
+Per-line image build time and memory for karaoke lyric clips, 60-line song.
+
+For every line, create_rolling_wipe_clip needs the page (3 lines) rendered
+twice: inactive (line still white) and active (line in its sung colour), plus a
+float mask from the inactive alpha. "before" is the previous renderer: full
+1920x1080 canvases, fonts reloaded per call, and the outline drawn as 81
+offset draw.text passes. "after" is karaoke_text: cached fonts, one-pass
+stroke, memoized line rasters, canvas cropped to the page box.
+
+Usage: python bench_karaoke_text.py [num_lines]
+"""
+import sys
+import time
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import karaoke_text
+from karaoke_text import get_font, page_block
+
+WORDS = ("love night heart fire baby dancing forever tonight never again hold me closer "
+         "under the stars we were young running wild into the light don't let go").split()
+
+def make_song(n, seed=7):
+    """Verses plus a 4-line chorus that comes back, like most pop lyrics."""
+    rng = random.Random(seed)
+    chorus = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 8))).capitalize() for _ in range(4)]
+    lines = []
+    while len(lines) < n:
+        lines += [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 8))).capitalize() for _ in range(8)]
+        lines += chorus
+    return lines[:n]
+
+def legacy_page_img(lines, colors, size=60):
+    """The old _make_multi_line_img, verbatim in behaviour (font path resolved the same way)."""
+    img = Image.new('RGBA', (1920, 1080), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    get_font.cache_clear()  # it used to reload the truetype file on every call
+    font = get_font("regular", size)
+    heights, total_h, max_w = [], 0, 0
+    for line in lines:
+        bbox = draw.textbbox((0, 0), line, font=font)
+        max_w = max(max_w, bbox[2] - bbox[0])
+        heights.append(bbox[3] - bbox[1] + 25)
+        total_h += heights[-1]
+    y = (1080 - total_h) / 2
+    draw.rectangle([int((1920 - max_w) / 2 - 40), int(y - 40), int((1920 + max_w) / 2 + 40), int(y + total_h + 40)],
+                   fill=(0, 0, 0, 140))
+    for line, color, h in zip(lines, colors, heights):
+        bbox = draw.textbbox((0, 0), line, font=font)
+        x = (1920 - (bbox[2] - bbox[0])) / 2
+        for off_x in range(-4, 5):
+            for off_y in range(-4, 5):
+                draw.text((x + off_x, y + off_y), line, font=font, fill="black")
+        draw.text((x, y), line, font=font, fill=color)
+        y += h
+    return np.array(img)
+
+def line_jobs(lines):
+    """(page, inactive colours, active colours) for every line clip, as create_video builds them."""
+    jobs = []
+    for i in range(0, len(lines), 3):
+        page = lines[i:i + 3]
+        for j in range(len(page)):
+            active = ["cyan" if k <= j else "white" for k in range(len(page))]
+            inactive = list(active)
+            inactive[j] = "white"
+            jobs.append((page, inactive, active))
+    return jobs
+
+def run(build, jobs):
+    times, mem = [], []
+    for page, inactive, active in jobs:
+        t0 = time.perf_counter()
+        img_inactive = build(page, inactive)
+        img_active = build(page, active)
+        mask = img_inactive[:, :, 3] / 255.0
+        times.append(time.perf_counter() - t0)
+        mem.append(img_inactive.nbytes + img_active.nbytes + mask.nbytes)
+    return times, mem
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    jobs = line_jobs(make_song(n))
+    print(f"{n} lines, {len(jobs)} line clips, font: {getattr(get_font('regular', 60), 'path', 'PIL default')}")
+
+    before_t, before_m = run(legacy_page_img, jobs)
+    karaoke_text.render_line.cache_clear()
+    get_font.cache_clear()
+    after_t, after_m = run(lambda page, colors: page_block(page, colors).image, jobs)
+
+    for name, t, m in (("before", before_t, before_m), ("after", after_t, after_m)):
+        print(f"{name:>6}: {np.mean(t) * 1000:7.1f} ms/line (p95 {np.percentile(t, 95) * 1000:6.1f}), "
+              f"total {sum(t):6.2f}s, {np.mean(m) / 1e6:5.1f} MB/line clip")
+    print(f"speedup {sum(before_t) / sum(after_t):.1f}x, memory {np.mean(before_m) / np.mean(after_m):.1f}x smaller; "
+          f"line raster cache {karaoke_text.render_line.cache_info().hits} hits / "
+          f"{karaoke_text.render_line.cache_info().misses} misses")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Wall time and peak memory of quiz video assembly, synthetic 50-question long quiz.
+
+Both paths get the same inputs, built up front: an intro, then per question a
+1920x1080 question slide with a "TTS" track, its pre-rendered 10s countdown
+clip and an answer slide with its track, then a 5s outro, plus background
+music. "before" is the MoviePy assembly generate_long_quiz_video used
+(ImageClip/AudioFileClip per slide, concatenate_videoclips(method="compose"),
+write_videofile). "after" is quiz_assembler.QuizTimeline: still-image segments,
+concat demuxer, one amix pass. Each path runs in its own process so peak RSS
+is its own (ffmpeg children reported separately).
+
+Usage: python bench_quiz_assembly.py [num_questions] [--skip-moviepy]
+"""
+import os
+import sys
+import time
+import wave
+import random
+import shutil
+import resource
+import tempfile
+import multiprocessing
+from queue import Empty
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from quiz_countdown import render_countdown_clip
+from quiz_assembler import QuizTimeline, media_duration
+
+SIZE = (1920, 1080)
+
+def make_slide(path, text, rng):
+    img = Image.new("RGB", SIZE, tuple(rng.randint(20, 120) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([160, 700, 1760, 1000], fill=(255, 255, 255))
+    draw.text((200, 200), text, fill="white")
+    img.save(path)
+    return path
+
+def make_tone(path, seconds, freq, sample_rate=44100):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (6000 * np.sin(2 * np.pi * freq * t) * np.minimum(1, 20 * (seconds - t))).astype(np.int16)
+    with wave.open(path, "w") as obj:
+        obj.setnchannels(1)
+        obj.setsampwidth(2)
+        obj.setframerate(sample_rate)
+        obj.writeframes(samples.tobytes())
+    return path
+
+def build_quiz(workdir, num_questions):
+    """[(kind, path, duration, audio_path)] in play order, plus the music path."""
+    rng = random.Random(5)
+    p = lambda name: os.path.join(workdir, name)
+    items = [("slide", make_slide(p("intro.png"), "intro", rng), None, make_tone(p("intro.wav"), 4.0, 330))]
+    for i in range(num_questions):
+        q_img = make_slide(p(f"q{i}.png"), f"question {i}", rng)
+        items.append(("slide", q_img, None, make_tone(p(f"q{i}.wav"), rng.uniform(2.5, 5.0), 440)))
+        items.append(("clip", render_countdown_clip(q_img, p(f"cd{i}.mp4"), seconds=10), 10.0, None))
+        items.append(("slide", make_slide(p(f"a{i}.png"), f"answer {i}", rng), None,
+                      make_tone(p(f"a{i}.wav"), rng.uniform(1.5, 2.5), 550)))
+    items.append(("slide", make_slide(p("outro.png"), "outro", rng), 5.0, None))
+    # Same durations as generate_long_quiz_video: TTS + 0.5s
+    items = [(kind, path, dur if dur else media_duration(audio) + 0.5, audio) for kind, path, dur, audio in items]
+    return items, make_tone(p("music.wav"), 30.0, 220)
+
+def assemble_moviepy(items, music, output_path):
+    from moviepy.editor import (ImageClip, VideoFileClip, AudioFileClip, CompositeAudioClip,
+                                concatenate_videoclips, concatenate_audioclips)
+    clips = []
+    for kind, path, dur, audio in items:
+        if kind == "clip":
+            clips.append(VideoFileClip(path))
+        elif audio:
+            clips.append(ImageClip(path).set_duration(dur).set_audio(AudioFileClip(audio)))
+        else:
+            clips.append(ImageClip(path).set_duration(dur))
+    final_video = concatenate_videoclips(clips, method="compose")
+    bg_music = AudioFileClip(music)
+    loop_count = int(final_video.duration / bg_music.duration) + 2
+    bg_music = concatenate_audioclips([bg_music] * loop_count).subclip(0, final_video.duration).volumex(0.15)
+    final_video.audio = CompositeAudioClip([final_video.audio, bg_music])
+    final_video.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac",
+                                ffmpeg_params=["-pix_fmt", "yuv420p"], verbose=False, logger=None)
+
+def assemble_ffmpeg(items, music, output_path):
+    timeline = QuizTimeline(SIZE)
+    for kind, path, dur, audio in items:
+        if kind == "clip":
+            timeline.add_clip(path, dur)
+        else:
+            timeline.add_slide(path, dur, audio=[(audio, 0)])
+    timeline.render(output_path, music=music, music_volume=0.15)
+
+def _run(name, items, music, output_path, queue):
+    t0 = time.perf_counter()
+    {"moviepy": assemble_moviepy, "ffmpeg": assemble_ffmpeg}[name](items, music, output_path)
+    queue.put((time.perf_counter() - t0,
+               resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024))
+
+def run(name, items, music, output_path):
+    """(seconds, peak RSS MB, peak ffmpeg RSS MB), or None if the process died (e.g. OOM-killed)."""
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_run, args=(name, items, music, output_path, queue))
+    t0 = time.perf_counter()
+    proc.start()
+    while proc.is_alive() or not queue.empty():
+        try:
+            result = queue.get(timeout=1.0)
+            proc.join()
+            return result
+        except Empty:
+            pass
+    print(f"  {name} assembly died after {time.perf_counter() - t0:.0f}s (exit code {proc.exitcode}"
+          f"{', killed: out of memory?' if proc.exitcode == -9 else ''})")
+    return None
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    num_questions = int(args[0]) if args else 50
+    workdir = tempfile.mkdtemp(prefix="bench_quiz_")
+    try:
+        t0 = time.perf_counter()
+        items, music = build_quiz(workdir, num_questions)
+        video_dur = sum(dur for _, _, dur, _ in items)
+        print(f"{num_questions} questions, {len(items)} clips, {video_dur:.0f}s of video "
+              f"(inputs built in {time.perf_counter() - t0:.1f}s)")
+        paths = ["ffmpeg"] if "--skip-moviepy" in sys.argv else ["moviepy", "ffmpeg"]
+        rows = {}
+        for name in paths:
+            out = os.path.join(workdir, f"{name}.mp4")
+            rows[name] = run(name, items, music, out)
+            if rows[name] is None:
+                continue
+            sec, rss, child_rss = rows[name]
+            print(f"  {'before' if name == 'moviepy' else 'after':>6} ({name:<7}) {sec:8.1f}s  "
+                  f"{video_dur / sec:5.1f}x realtime  peak RSS {rss:6.0f} MB (ffmpeg {child_rss:4.0f} MB)  "
+                  f"output {media_duration(out):.2f}s")
+        if len(rows) == 2 and None not in rows.values():
+            print(f"speedup {rows['moviepy'][0] / rows['ffmpeg'][0]:.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Slides per second for the quiz slide renderers, portrait (1080x1920) and landscape (1920x1080).
+
+Three ways of getting a slide into the video assembly:
+- "png": what the quiz did before - render with every cache cold (fonts,
+  background, slide), save a temp PNG, read it back as a frame;
+- "memory": render_slide / render_landscape_slide with distinct text each
+  time (slide cache misses; fonts and backgrounds reused), frame handed over
+  in memory;
+- "repeat": the same slide again (intro, outro, answer re-use), a cache hit.
+
+Usage: python bench_quiz_slides.py [num_slides]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+import quiz_slides
+from quiz_slides import render_slide, render_landscape_slide
+
+OPTIONS = ["Mount Everest", "K2", "Kangchenjunga", "Lhotse"]
+
+def portrait(i):
+    return render_slide(f"Question {i}: which is the tallest mountain on Earth?", subtext="Answer:\nEverest",
+                        theme_color=quiz_slides.BG_COLOR_BLUE)
+
+def landscape(i):
+    return render_landscape_slide(f"Question {i}: which is the tallest mountain on Earth?", options=OPTIONS,
+                                  correct_idx=0, show_answer=True)
+
+def clear_caches():
+    for fn in (quiz_slides.load_font, quiz_slides.background_layer, quiz_slides._render_slide,
+               quiz_slides._render_landscape_slide):
+        fn.cache_clear()
+
+def via_png(render, i):
+    clear_caches()
+    path = quiz_slides.save_temp_png(render(i))
+    try:
+        with Image.open(path) as img:
+            return np.asarray(img.convert("RGB"))
+    finally:
+        os.remove(path)
+
+def rate(fn, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return n / (time.perf_counter() - t0)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    for name, render in (("portrait", portrait), ("landscape", landscape)):
+        render(-1)  # warm fonts and background
+        png = rate(lambda i: via_png(render, i), n)
+        memory = rate(lambda i: np.asarray(render(i)), n)
+        repeat = rate(lambda i: np.asarray(render(0)), n)
+        print(f"{name:<9}  png {png:6.1f}/s   memory {memory:6.1f}/s ({memory / png:4.1f}x)   "
+              f"repeat {repeat:7.1f}/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Per-frame cost of the rolling-wipe karaoke frame function, three-minute song.
+
+"before" is the old make_frame_rgb closure (copy the whole base image, linear
+scan over word spans, overwrite every row left of the wipe), run both on
+full 1920x1080 frames as it originally was and on the cropped page blocks
+from karaoke_text. "after" is karaoke_text.WipeFrames. Frames are compared
+against the old closure so the speedup is not bought with a different picture.
+
+Usage: python bench_rolling_wipe.py [song_seconds] [fps]
+"""
+import sys
+import time
+import random
+
+import numpy as np
+
+from karaoke_text import WipeFrames, page_block, text_width, to_full_frame
+from bench_karaoke_text import make_song
+
+def legacy_frame_fn(img_inactive, img_active, x1, x2, duration, word_spans):
+    def make_frame_rgb(t):
+        wipe_x = x1
+        if word_spans:
+            for span in word_spans:
+                if t < span['start']:
+                    wipe_x = span['x_start']
+                    break
+                if span['start'] <= t <= span['end']:
+                    dur = span['end'] - span['start']
+                    if dur > 0:
+                        p = (t - span['start']) / dur
+                        wipe_x = int(span['x_start'] + (span['x_end'] - span['x_start']) * p)
+                    else:
+                        wipe_x = span['x_end']
+                    break
+                wipe_x = span['x_end']
+        else:
+            progress = t / duration if duration > 0 else 1
+            if progress > 1: progress = 1
+            wipe_x = int(x1 + (x2 - x1) * progress)
+        frame = img_inactive.copy()
+        wipe_x = int(wipe_x)
+        if wipe_x > 0:
+            if wipe_x > frame.shape[1]: wipe_x = frame.shape[1]
+            frame[:, :wipe_x] = img_active[:, :wipe_x]
+        return frame[:, :, :3]
+    return make_frame_rgb
+
+def word_spans_for(line, x1, duration, rng):
+    """Word spans with gaps, shaped like create_rolling_wipe_clip's output."""
+    words = line.split(" ")
+    spans, t, x = [], 0.2, 0
+    for k, word in enumerate(words):
+        start, end = t, t + rng.uniform(0.15, 0.5)
+        x_start = text_width(" ".join(words[:k]) + (" " if k else ""), 60)
+        x_end = text_width(" ".join(words[:k + 1]), 60)
+        if x_start > x + 2:
+            spans.append({'start': spans[-1]['end'] if spans else 0.0, 'end': start,
+                          'x_start': x1 + x, 'x_end': x1 + x_start, 'type': 'gap'})
+        spans.append({'start': start, 'end': end, 'x_start': x1 + x_start, 'x_end': x1 + x_end, 'type': 'word'})
+        x, t = x_end, end + rng.uniform(0.0, 0.2)
+    return spans
+
+def build_clips(song_seconds):
+    rng = random.Random(3)
+    lines = make_song(60)
+    clips = []
+    per_line = song_seconds / len(lines)
+    for i in range(0, len(lines), 3):
+        page = lines[i:i + 3]
+        for j in range(len(page)):
+            active = ["cyan" if k <= j else "white" for k in range(len(page))]
+            inactive = list(active)
+            inactive[j] = "white"
+            b_in, b_act = page_block(page, inactive), page_block(page, active)
+            ox = b_in.origin[0]
+            x1, x2 = (x - ox for x in b_in.line_spans[j])
+            spans = word_spans_for(page[j], x1, per_line, rng)
+            clips.append((b_in, b_act, x1, x2, per_line, spans))
+    return clips
+
+def time_frames(fns, fps, duration):
+    ts = np.arange(0, duration, 1.0 / fps)
+    t0 = time.perf_counter()
+    for fn in fns:
+        for t in ts:
+            fn(t)
+    return (time.perf_counter() - t0) / (len(fns) * len(ts))
+
+def main():
+    song_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 180.0
+    fps = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    clips = build_clips(song_seconds)
+    per_line = clips[0][4]
+
+    full = [legacy_frame_fn(to_full_frame(a), to_full_frame(b), x1 + a.origin[0], x2 + a.origin[0], d,
+                            [dict(s, x_start=s['x_start'] + a.origin[0], x_end=s['x_end'] + a.origin[0]) for s in sp])
+            for a, b, x1, x2, d, sp in clips]
+    cropped = [legacy_frame_fn(a.image, b.image, x1, x2, d, sp) for a, b, x1, x2, d, sp in clips]
+    new = [WipeFrames(a.image, b.image, x1, x2, d, sp) for a, b, x1, x2, d, sp in clips]
+
+    # Same pixels as the old closure, for forward playback and for seeks
+    rng = random.Random(0)
+    for old_fn, new_fn in zip(cropped, new):
+        for t in sorted(rng.uniform(0, per_line) for _ in range(30)) + [rng.uniform(0, per_line) for _ in range(10)]:
+            assert np.array_equal(old_fn(t), new_fn(t)), t
+
+    frames = int(song_seconds * fps)
+    rows = [("before, full 1920x1080 frame", time_frames(full, fps, per_line)),
+            ("before, cropped page block", time_frames(cropped, fps, per_line)),
+            ("after, WipeFrames", time_frames(new, fps, per_line))]
+    print(f"{len(clips)} line clips, {song_seconds:.0f}s song at {fps}fps ({frames} frames), "
+          f"{sum(len(c[5]) for c in clips) / len(clips):.1f} spans/line")
+    for name, sec in rows:
+        print(f"  {name:<30} {sec * 1e6:9.1f} us/frame  {sec * frames:7.2f}s per song")
+
+if __name__ == "__main__":
+    main()
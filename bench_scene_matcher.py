@@ -0,0 +1,114 @@
+"""
+Micro-benchmark for SceneMatcher query paths on a synthetic 5,000-scene index.
+
+Compares the legacy per-call path (encode every query, rebuild start/end tensors,
+loop over exclusions) with the cached/vectorized find_best_match and the batched
+find_best_matches. CLIP is replaced by a fixed random text projection so the
+numbers reflect the query path itself; the legacy path pays the same encode cost.
+
+Usage: python bench_scene_matcher.py [num_scenes] [num_beats]
+"""
+import sys
+import time
+from collections import OrderedDict
+
+import torch
+
+from scene_matcher import SceneMatcher
+
+DIM = 512
+
+class _Batch(dict):
+    def to(self, device):
+        return self
+
+class FakeProcessor:
+    def __call__(self, text=None, **kwargs):
+        return _Batch(text=list(text))
+
+class FakeClip:
+    """Deterministic stand-in for CLIPModel.get_text_features (one small MLP per batch)."""
+    def __init__(self, dim=DIM):
+        gen = torch.Generator().manual_seed(1)
+        self.w1 = torch.randn(256, 1024, generator=gen)
+        self.w2 = torch.randn(1024, dim, generator=gen)
+
+    def get_text_features(self, text):
+        rows = []
+        for t in text:
+            gen = torch.Generator().manual_seed(hash(t) & 0xFFFFFFFF)
+            rows.append(torch.randn(256, generator=gen))
+        return torch.relu(torch.stack(rows) @ self.w1) @ self.w2
+
+def build_matcher(num_scenes):
+    m = SceneMatcher.__new__(SceneMatcher)
+    m.device = "cpu"
+    m.model, m.processor = FakeClip(), FakeProcessor()
+    m.scenes = [(i * 2.0, i * 2.0 + 1.8) for i in range(num_scenes)]
+    emb = torch.randn(num_scenes, DIM)
+    m.embeddings = emb / emb.norm(dim=-1, keepdim=True)
+    m.virality_scores = torch.rand(num_scenes, 1)
+    m._text_cache = OrderedDict()
+    m._build_scene_tensors()
+    return m
+
+def legacy_find_best_match(m, text_query, min_start_time=0.0, exclude_intervals=None, max_end_time=None):
+    """The pre-index query path, kept here as the baseline."""
+    with torch.no_grad():
+        inputs = m.processor(text=[text_query], return_tensors="pt", padding=True).to(m.device)
+        text_features = m.model.get_text_features(**inputs)
+        text_features = text_features / text_features.norm(p=2, dim=-1, keepdim=True)
+        base_similarity = (text_features @ m.embeddings.T).squeeze(0)
+        mask = (base_similarity > 0.15).float()
+        final_score = base_similarity + (m.virality_scores.squeeze(1) * 0.15 * mask)
+        scene_starts = torch.tensor([s[0] for s in m.scenes], device=m.device)
+        scene_ends = torch.tensor([s[1] for s in m.scenes], device=m.device)
+        time_mask = (scene_starts >= min_start_time).float()
+        if max_end_time is not None:
+            time_mask = time_mask * (scene_ends <= max_end_time).float()
+        if exclude_intervals:
+            overlap_mask = torch.ones_like(scene_starts)
+            for ex_start, ex_end in exclude_intervals:
+                invalid = (scene_starts < ex_end) & (scene_ends > ex_start)
+                overlap_mask[invalid] = 0.0
+            time_mask = time_mask * overlap_mask
+        final_score = final_score * time_mask + (1 - time_mask) * -1e9
+        best_val, best_idx = torch.max(final_score, dim=0)
+        return {'start': m.scenes[best_idx][0], 'end': m.scenes[best_idx][1], 'score': best_val.item()}
+
+def run_sequential(m, beats, fn):
+    used = []
+    for q in beats:
+        hit = fn(m, q, exclude_intervals=used, max_end_time=m.scenes[-1][1] - 30)
+        if hit:
+            used.append((hit['start'], hit['end']))
+    return used
+
+def timed(label, fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<38} {best * 1000:9.1f} ms")
+    return best
+
+def main():
+    num_scenes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    num_beats = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    beats = [f"beat {i}: the hero walks into the storm" for i in range(num_beats)]
+    m = build_matcher(num_scenes)
+    print(f"Synthetic index: {num_scenes} scenes x {DIM} dims, {num_beats} beats (3 runs, best)")
+
+    legacy = timed("legacy find_best_match loop", lambda: run_sequential(m, beats, legacy_find_best_match))
+    cold = timed("find_best_match loop (cold cache)", lambda: (m._text_cache.clear(), run_sequential(m, beats, SceneMatcher.find_best_match)))
+    warm = timed("find_best_match loop (warm cache)", lambda: run_sequential(m, beats, SceneMatcher.find_best_match))
+    batched = timed("find_best_matches (one batch)", lambda: m.find_best_matches(beats, max_end_time=m.scenes[-1][1] - 30))
+    print(f"speedup vs legacy: cold {legacy / cold:.1f}x, warm {legacy / warm:.1f}x, batched {legacy / batched:.1f}x")
+
+    picks = [r for r in m.find_best_matches(beats) if r]
+    overlaps = sum(1 for i, a in enumerate(picks) for b in picks[i + 1:] if a['start'] < b['end'] and a['end'] > b['start'])
+    print(f"batched picks: {len(picks)}/{num_beats}, overlapping pairs: {overlaps}")
+
+if __name__ == "__main__":
+    main()
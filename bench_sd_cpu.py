@@ -0,0 +1,117 @@
+"""
+Seconds per image for each Stable Diffusion CPU configuration.
+
+Runs the denoising loop (classifier-free guidance, batch of 1) with a tiny
+randomly initialised stand-in UNet, so it needs no model download and runs in
+a couple of minutes on CPU; absolute numbers are far below SD 1.5, the ratios between
+configurations are what matter. The optimizations are the ones
+AIVisualGenerator applies with SD_FAST_CPU=1, and each row adds one to the
+previous row, except the attention-slicing row, which trades speed for RAM
+and is only used on torch builds without fused SDPA. The last row is a prompt
+cache hit, which skips the UNet entirely.
+
+Usage: python bench_sd_cpu.py [repeats] [width height]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+import torch
+from PIL import Image
+from diffusers import UNet2DConditionModel, PNDMScheduler
+
+from ai_visual_generator import (SD_STEPS, SD_FAST_STEPS, SD_FAST_SCALE, render_size,
+                                 fast_scheduler, optimize_unet_for_cpu)
+from image_cache import ImageCache, image_cache_key
+
+def tiny_unet():
+    torch.manual_seed(0)
+    return UNet2DConditionModel(
+        sample_size=32, in_channels=4, out_channels=4, layers_per_block=1,
+        block_out_channels=(16, 32), norm_num_groups=8, cross_attention_dim=32, attention_head_dim=4,
+        down_block_types=("DownBlock2D", "CrossAttnDownBlock2D"),
+        up_block_types=("CrossAttnUpBlock2D", "UpBlock2D"),
+    ).eval()
+
+def sd15_scheduler():
+    return PNDMScheduler(beta_start=0.00085, beta_end=0.012, beta_schedule="scaled_linear",
+                         skip_prk_steps=True, steps_offset=1)
+
+@torch.no_grad()
+def denoise(unet, scheduler, steps, width, height, cond):
+    """Same loop as StableDiffusionPipeline: CFG over a (uncond, cond) batch, latents at 1/8 size."""
+    scheduler.set_timesteps(steps)
+    gen = torch.Generator("cpu").manual_seed(0)
+    latents = torch.randn((1, 4, height // 8, width // 8), generator=gen) * scheduler.init_noise_sigma
+    for t in scheduler.timesteps:
+        model_in = scheduler.scale_model_input(torch.cat([latents] * 2), t)
+        noise = unet(model_in, t, encoder_hidden_states=cond).sample
+        uncond, text = noise.chunk(2)
+        latents = scheduler.step(uncond + 7.5 * (text - uncond), t, latents).prev_sample
+    return latents
+
+def timed(fn, repeats):
+    fn()  # warm-up (and compile)
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) / repeats
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    width, height = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) > 3 else (1024, 576)
+    torch.manual_seed(0)
+    cond = torch.randn(2, 77, 32)
+    fake_image = Image.fromarray(np.random.randint(0, 255, (height, width, 3), dtype=np.uint8))
+    rw, rh = render_size(width, height, SD_FAST_SCALE)
+    small_image = fake_image.resize((rw, rh))
+
+    rows = []
+    unet = tiny_unet()
+    rows.append((f"baseline (PNDM {SD_STEPS} steps, fp32, {width}x{height})",
+                 timed(lambda: denoise(unet, sd15_scheduler(), SD_STEPS, width, height, cond), repeats)))
+
+    unet = tiny_unet().to(memory_format=torch.channels_last)
+    rows.append(("+ channels_last", timed(lambda: denoise(unet, sd15_scheduler(), SD_STEPS, width, height, cond), repeats)))
+
+    # Memory saver only; not carried into the later rows (see optimize_unet_for_cpu)
+    sliced = tiny_unet().to(memory_format=torch.channels_last)
+    sliced.set_attention_slice("auto")
+    rows.append(("  (channels_last + attention slicing)", timed(lambda: denoise(sliced, sd15_scheduler(), SD_STEPS, width, height, cond), repeats)))
+
+    fast_unet = optimize_unet_for_cpu(tiny_unet())
+    try:
+        rows.append(("+ torch.compile", timed(lambda: denoise(fast_unet, sd15_scheduler(), SD_STEPS, width, height, cond), repeats)))
+    except Exception as e:
+        print(f"⚠️ torch.compile failed here ({type(e).__name__}); continuing eager.")
+        fast_unet = getattr(fast_unet, "_orig_mod", fast_unet)
+
+    dpm = fast_scheduler(sd15_scheduler())
+    rows.append((f"+ DPM++ {SD_FAST_STEPS} steps", timed(lambda: denoise(fast_unet, dpm, SD_FAST_STEPS, width, height, cond), repeats)))
+
+    def low_res():
+        denoise(fast_unet, dpm, SD_FAST_STEPS, rw, rh, cond)
+        small_image.resize((width, height), Image.LANCZOS)
+    rows.append((f"+ render {rw}x{rh}, Lanczos upscale", timed(low_res, repeats)))
+
+    tmp = tempfile.mkdtemp()
+    try:
+        cache = ImageCache(os.path.join(tmp, "cache"))
+        src, out = os.path.join(tmp, "src.png"), os.path.join(tmp, "out.png")
+        fake_image.save(src)
+        key = image_cache_key("bench prompt", "", 1, SD_FAST_STEPS, rw, rh, "tiny-unet", "dpm++")
+        cache.store(key, src, {"prompt": "bench prompt"}, rows[-1][1])
+        rows.append(("prompt cache hit", timed(lambda: cache.lookup(key, out), repeats)))
+    finally:
+        shutil.rmtree(tmp)
+
+    base = rows[0][1]
+    print(f"Stand-in UNet, {repeats} repeats, torch {torch.__version__}, {torch.get_num_threads()} threads")
+    for name, sec in rows:
+        print(f"  {name:<44} {sec:8.3f} s/image  {base / sec:6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,113 @@
+import os
+import hashlib
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
 from io import BytesIO
 import torch
 
+THUMB_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumbnail_cache")
+THUMB_MAX_SIDE = 336       # CLIP resizes to 224 anyway; keep a little headroom
+THUMB_TIMEOUT = 5
+THUMB_WORKERS = 16
+THUMB_PER_HOST = 4         # concurrent requests allowed against any one host
+CLIP_BATCH_SIZE = 16       # images per CLIP forward pass
+
+class ThumbnailFetcher:
+    """
+    Concurrent thumbnail downloader shared by all ClipFilter calls.
+    One pooled requests.Session, a semaphore per host so a slow CDN cannot
+    hog every worker, and an on-disk cache keyed by URL holding the already
+    decoded and resized thumbnail. Decoding and resizing happen in the worker
+    threads, and results are yielded as they complete.
+    """
+
+    def __init__(self, cache_dir=THUMB_CACHE_DIR, workers=THUMB_WORKERS, per_host=THUMB_PER_HOST,
+                 timeout=THUMB_TIMEOUT, max_side=THUMB_MAX_SIDE):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_side = max_side
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.cache_hits = 0
+        self.downloads = 0
+        self.failures = 0
+
+    def _count(self, stat):
+        with self._stats_lock:
+            setattr(self, stat, getattr(self, stat) + 1)
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".jpg")
+
+    def fetch(self, url):
+        """Decoded, resized RGB thumbnail for url, or None if it cannot be fetched."""
+        path = self.cache_path(url)
+        if os.path.exists(path):
+            try:
+                with Image.open(path) as cached:
+                    img = cached.convert("RGB")
+                self._count("cache_hits")
+                return img
+            except Exception:
+                pass
+        try:
+            with self._slot(url):
+                resp = self.session.get(url, timeout=self.timeout)
+            if resp.status_code != 200:
+                self._count("failures")
+                return None
+            img = Image.open(BytesIO(resp.content)).convert("RGB")
+            img.thumbnail((self.max_side, self.max_side))
+            self._count("downloads")
+        except Exception:
+            self._count("failures")
+            return None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            img.save(tmp, "JPEG", quality=92)
+            os.replace(tmp, path)
+        except Exception:
+            pass
+        return img
+
+    def iter_fetch(self, urls):
+        """Yields (index, image) in completion order; failed URLs are skipped."""
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(urls)))) as pool:
+            futures = {pool.submit(self.fetch, url): i for i, url in enumerate(urls)}
+            for fut in as_completed(futures):
+                img = fut.result()
+                if img is not None:
+                    yield futures[fut], img
+
+_FETCHER = None
+_FETCHER_LOCK = threading.Lock()
+
+def get_thumbnail_fetcher():
+    global _FETCHER
+    with _FETCHER_LOCK:
+        if _FETCHER is None:
+            _FETCHER = ThumbnailFetcher()
+        return _FETCHER
+
 class ClipFilter:
     def __init__(self, model_name="openai/clip-vit-base-patch32"):
         self.model_name = model_name
@@ -43,39 +148,47 @@ class ClipFilter:
 
         print(f"🔍 CLIP Scoring {len(candidates)} images against: '{text_query}'")
         
-        images = []
-        valid_candidates = []
-        
-        # Download thumbnails
-        for cand in candidates:
-            thumb_url = cand.get('thumbnail')
-            if not thumb_url:
-                continue
-                
-            try:
-                resp = requests.get(thumb_url, timeout=5)
-                if resp.status_code == 200:
-                    img = Image.open(BytesIO(resp.content)).convert("RGB")
-                    images.append(img)
-                    valid_candidates.append(cand)
-            except Exception as e:
-                # print(f"Failed to load thumbnail: {e}")
-                pass
-
-        if not images:
+        with_thumbs = [cand for cand in candidates if cand.get('thumbnail')]
+        if not with_thumbs:
             print("⚠️ No valid thumbnails downloaded for scoring.")
             return None
 
-        # Process and Score
+        # Process and Score: thumbnails stream in from the fetcher and go through
+        # CLIP in fixed-size batches while the rest are still downloading
         try:
-            inputs = self.processor(text=[text_query], images=images, return_tensors="pt", padding=True).to(self.device)
-            
             with torch.no_grad():
-                outputs = self.model(**inputs)
-                
-            # specific logic for CLIP score (logits_per_image)
-            logits_per_image = outputs.logits_per_image  # shape: [num_images, num_texts]
-            probs = logits_per_image.softmax(dim=0)  # Softmax across images
+                text_inputs = self.processor(text=[text_query], return_tensors="pt", padding=True, truncation=True).to(self.device)
+                text_embeds = self.model.get_text_features(**text_inputs)
+                text_embeds = text_embeds / text_embeds.norm(p=2, dim=-1, keepdim=True)
+
+                fetcher = get_thumbnail_fetcher()
+                scores = []
+                valid_candidates = []
+                batch, batch_cands = [], []
+
+                def flush():
+                    image_inputs = self.processor(images=batch, return_tensors="pt").to(self.device)
+                    image_embeds = self.model.get_image_features(**image_inputs)
+                    image_embeds = image_embeds / image_embeds.norm(p=2, dim=-1, keepdim=True)
+                    # Same scale as logits_per_image
+                    scores.append(self.model.logit_scale.exp() * (image_embeds @ text_embeds.T).squeeze(1))
+                    valid_candidates.extend(batch_cands)
+                    batch.clear()
+                    batch_cands.clear()
+
+                for idx, img in fetcher.iter_fetch([cand['thumbnail'] for cand in with_thumbs]):
+                    batch.append(img)
+                    batch_cands.append(with_thumbs[idx])
+                    if len(batch) >= CLIP_BATCH_SIZE:
+                        flush()
+                if batch:
+                    flush()
+
+            if not valid_candidates:
+                print("⚠️ No valid thumbnails downloaded for scoring.")
+                return None
+
+            logits_per_image = torch.cat(scores)  # shape: [num_images]
             
             # Get best index
             best_idx = logits_per_image.argmax(dim=0).item()
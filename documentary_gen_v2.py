@@ -30,6 +30,7 @@ import random
 
 from script_generator import ScriptGenerator
 from media_manager import MediaManager
+from tts_cache import get_tts_cache, tts_cache_key
 
 # Try to import CLIP Filter
 try:
@@ -406,8 +407,13 @@ def create_audio(text, filename):
     # Use nest_asyncio to allow nested event loops (useful if running in GUI/Notebook)
     nest_asyncio.apply()
     
-    try:
+    def _synthesize():
         loop.run_until_complete(generate_voiceover_async(text, filename))
+        return os.path.exists(filename)
+
+    try:
+        key = tts_cache_key(text, "edge", VOICE, fmt=os.path.splitext(filename)[1])
+        get_tts_cache().cached(key, filename, _synthesize)
     except Exception as e:
         print(f"Audio Generation Error: {e}")
         pass
@@ -0,0 +1,54 @@
+"""
+Prompt-keyed cache of generated Stable Diffusion images.
+
+An entry is keyed by a hash of (prompt, negative prompt, seed, steps, render
+size, model id, sampler profile) and holds the PNG plus a JSON sidecar with
+those generation parameters and how long the image took. Seeds default to a
+stable hash of the prompt, so the same prompt in a later sleep video is served
+from disk instead of re-running the UNet. Writes go through temp files +
+os.replace; total size is bounded with least recently used entries evicted.
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Optional
+
+from media_cache import ContentCache
+
+IMAGE_CACHE_VERSION = 2
+IMAGE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_image_cache")
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_MB", "4096")) * 1024 * 1024
+IMAGE_CACHE_EVICT_EVERY = 20  # stores between size checks
+
+def prompt_seed(prompt: str, negative_prompt: str = "") -> int:
+    """Deterministic 31-bit seed for a prompt, so identical prompts produce (and hit) the same image."""
+    digest = hashlib.sha1(f"{prompt}\n{negative_prompt}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") & 0x7FFFFFFF
+
+def image_cache_key(prompt, negative_prompt, seed, steps, width, height, model_id, profile="") -> str:
+    """profile names the sampler/optimization path (e.g. "pndm" or "dpm++,upscale"), since it changes the pixels."""
+    payload = json.dumps([IMAGE_CACHE_VERSION, prompt, negative_prompt or "", int(seed), int(steps),
+                          int(width), int(height), model_id, profile or ""])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class ImageCache(ContentCache):
+    name = "Image cache"
+    saved = "generation"
+
+    def __init__(self, cache_dir: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes, IMAGE_CACHE_EVICT_EVERY)
+
+    def store(self, key: str, image_path: str, params: Optional[dict] = None, seconds: float = 0.0):
+        self.store_file(key, image_path, ".png", seconds, params=params or {})
+
+_IMAGE_CACHE = None
+_IMAGE_CACHE_LOCK = threading.Lock()
+
+def get_image_cache() -> ImageCache:
+    global _IMAGE_CACHE
+    with _IMAGE_CACHE_LOCK:
+        if _IMAGE_CACHE is None:
+            _IMAGE_CACHE = ImageCache()
+            _IMAGE_CACHE.report_at_exit("🖼️")
+        return _IMAGE_CACHE
@@ -0,0 +1,232 @@
+"""
+Parallel, cached DuckDuckGo image retrieval for quiz slides.
+
+Quiz questions used to fetch their pictures one at a time: an LLM round trip for
+the search term, a DDG search, a download, and a fixed one-second sleep before
+the next question. ImagePrefetcher takes every question's search alternatives
+up front and resolves them concurrently:
+
+- a shared TokenBucket paces DDG searches (steady rate, small burst) instead of
+  sleeping between calls, so workers only wait when they would actually exceed it;
+- each hit is downloaded, verified and decoded (PIL) in the worker thread, and
+  a broken or non-image result falls through to the next search result;
+- finished images are stored in web_image_cache/ next to this script, keyed by
+  the normalized query, with the source URL and the image's SHA-1 in a JSON
+  sidecar, so a warm cache answers without touching the network.
+"""
+import io
+import os
+import re
+import json
+import time
+import atexit
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from PIL import Image
+
+from media_cache import atomic_write_bytes, atomic_write_json, atomic_copy_file
+
+WEB_IMAGE_CACHE_VERSION = 1
+WEB_IMAGE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web_image_cache")
+IMAGE_PREFETCH_WORKERS = int(os.environ.get("IMAGE_PREFETCH_WORKERS", "6"))
+DDG_RATE_PER_SEC = float(os.environ.get("DDG_RATE_PER_SEC", "1.0"))
+DDG_BURST = 3
+DDG_RESULTS_PER_QUERY = 3
+IMAGE_MAX_SIDE = 1920  # slides are at most 1920 px on either side
+IMAGE_MIN_SIDE = 64    # smaller than this is an icon or a tracking pixel
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of a search query."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s-]", " ", (query or "").lower())).strip()
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def decode_image(data: bytes) -> Optional[bytes]:
+    """JPEG bytes of a verified, decoded, RGB image (downscaled to IMAGE_MAX_SIDE), or None if unusable."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert("RGB")
+        if min(img.size) < IMAGE_MIN_SIDE:
+            return None
+        img.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=92)
+        return out.getvalue()
+    except Exception:
+        return None
+
+def ddg_image_urls(query: str, max_results: int = DDG_RESULTS_PER_QUERY) -> list:
+    from duckduckgo_search import DDGS
+    with DDGS() as ddgs:
+        return [r["image"] for r in ddgs.images(query, max_results=max_results) if r.get("image")]
+
+def http_get_bytes(url: str) -> Optional[bytes]:
+    import requests
+    response = requests.get(url, timeout=10)
+    return response.content if response.status_code == 200 else None
+
+_DDG_BUCKET = TokenBucket(DDG_RATE_PER_SEC, DDG_BURST)
+
+class WebImageCache:
+    def __init__(self, cache_dir: str = WEB_IMAGE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, query):
+        key = hashlib.sha1(json.dumps([WEB_IMAGE_CACHE_VERSION, normalize_query(query)]).encode("utf-8")).hexdigest()
+        folder = os.path.join(self.cache_dir, key[:2])
+        return folder, os.path.join(folder, key + ".json"), os.path.join(folder, key + ".jpg")
+
+    def lookup(self, query: str) -> Optional[dict]:
+        """Metadata ({"query", "url", "sha1", "path"}) of the cached image for query, or None."""
+        _, meta_path, image_path = self._paths(query)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(image_path)
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return dict(meta, path=image_path)
+
+    def store(self, query: str, data: bytes, url: str = "") -> dict:
+        folder, meta_path, image_path = self._paths(query)
+        meta = {"query": normalize_query(query), "url": url, "sha1": hashlib.sha1(data).hexdigest(),
+                "created": time.time()}
+        os.makedirs(folder, exist_ok=True)
+        atomic_write_bytes(image_path, data)
+        # Sidecar last: an entry only exists once its image is complete
+        atomic_write_json(meta_path, meta)
+        return dict(meta, path=image_path)
+
+    def report(self) -> str:
+        with self._lock:
+            lookups = self.hits + self.misses
+            rate = self.hits / lookups if lookups else 0.0
+            return f"Web image cache: {self.hits}/{lookups} hits ({rate:.0%})"
+
+class ImagePrefetcher:
+    """
+    Resolves many image queries at once. search(query) -> [url, ...] and
+    fetch(url) -> bytes default to DuckDuckGo and requests.
+    """
+
+    def __init__(self, cache: Optional[WebImageCache] = None, workers: int = IMAGE_PREFETCH_WORKERS,
+                 bucket: Optional[TokenBucket] = None,
+                 search: Optional[Callable] = None, fetch: Optional[Callable] = None):
+        self.cache = cache or get_web_image_cache()
+        self.workers = max(1, workers)
+        self.bucket = bucket or _DDG_BUCKET  # process-wide unless given, so every caller shares DDG's budget
+        self.search = search or ddg_image_urls
+        self.fetch = fetch or http_get_bytes
+        self._inflight = {}  # normalized query -> {"done": Event, "entry"}; repeats wait for the first
+        self._lock = threading.Lock()
+
+    def resolve(self, query: str) -> Optional[dict]:
+        """Cached-or-fetched image entry for one query, or None if nothing usable was found."""
+        norm = normalize_query(query)
+        if not norm:
+            return None
+        with self._lock:
+            slot = self._inflight.get(norm)
+            owner = slot is None
+            if owner:
+                slot = self._inflight[norm] = {"done": threading.Event(), "entry": None}
+        if not owner:
+            slot["done"].wait()
+            return slot["entry"]
+        try:
+            slot["entry"] = self.cache.lookup(norm) or self._download(norm)
+        finally:
+            slot["done"].set()
+        return slot["entry"]
+
+    def _download(self, query):
+        self.bucket.acquire()
+        print(f"🔍 Searching image for: {query}")
+        try:
+            urls = self.search(query)
+        except Exception as e:
+            print(f"⚠️ Image search failed for '{query}': {e}")
+            return None
+        for url in urls:
+            try:
+                data = decode_image(self.fetch(url) or b"")
+            except Exception:
+                data = None
+            if data:
+                return self.cache.store(query, data, url)
+        print(f"⚠️ No usable image for '{query}'")
+        return None
+
+    def resolve_first(self, alternatives) -> Optional[dict]:
+        """First alternative query that yields an image, tried in order."""
+        for query in alternatives:
+            entry = self.resolve(query)
+            if entry:
+                return entry
+        return None
+
+    def prefetch(self, items) -> list:
+        """
+        items: one list of alternative queries per slide (e.g. [term, "minimalist " + term]).
+        Returns one cache entry (or None) per item, in order.
+        """
+        items = [list(alts) for alts in items]
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as pool:
+            return list(pool.map(self.resolve_first, items))
+
+def copy_image(entry: Optional[dict], output_path: str) -> Optional[str]:
+    """Copies a prefetched image to output_path (so callers can delete it freely); returns the path or None."""
+    if not entry:
+        return None
+    atomic_copy_file(entry["path"], output_path)
+    return output_path
+
+_WEB_IMAGE_CACHE = None
+_WEB_IMAGE_CACHE_LOCK = threading.Lock()
+
+def _report_at_exit():
+    if _WEB_IMAGE_CACHE is not None and (_WEB_IMAGE_CACHE.hits or _WEB_IMAGE_CACHE.misses):
+        print(f"🖼️ {_WEB_IMAGE_CACHE.report()}")
+
+def get_web_image_cache() -> WebImageCache:
+    global _WEB_IMAGE_CACHE
+    with _WEB_IMAGE_CACHE_LOCK:
+        if _WEB_IMAGE_CACHE is None:
+            _WEB_IMAGE_CACHE = WebImageCache()
+            atexit.register(_report_at_exit)
+        return _WEB_IMAGE_CACHE
@@ -0,0 +1,200 @@
+"""
+ASS-subtitle render path for karaoke videos.
+
+Instead of compositing every lyric clip in MoviePy, the whole lyric track is
+written as one Advanced SubStation script: pages of three lines over the same
+translucent box, the active line swept with \\kf karaoke tags from the word
+timings, and the intro captions / unsynced chunks / CTA as plain events. The
+layout and font sizes come from karaoke_text, so it lines up with the raster
+renderer. One ffmpeg pass then burns the script into the looped background
+with libass, animates the intro bar and song progress bar with per-frame
+overlay expressions, and draws the 3-2-1 countdown with drawtext (or as ASS
+events on builds without it). Render time is encoder time.
+"""
+import os
+import subprocess
+from functools import lru_cache
+
+from PIL import ImageColor
+
+from karaoke_text import CAPTION_LOOK, FRAME_SIZE, PAGE_LOOK, get_font, layout_block, wrap_text
+
+KARAOKE_FPS = 24
+KARAOKE_BG_COLOR = "0x00001e"
+INTRO_BAR = {"x": 660, "y": 800, "w": 600, "h": 20, "bg": "0x323232@0.784", "fill": "lime"}
+PROGRESS_BAR = {"y": 1065, "h": 15, "color": "red"}
+STROKE = 4
+
+@lru_cache(maxsize=1)
+def ffmpeg_filters():
+    """Names of the filters this ffmpeg build has (libass and freetype are optional)."""
+    try:
+        out = subprocess.run(["ffmpeg", "-hide_banner", "-filters"], capture_output=True, text=True).stdout
+    except OSError:
+        return frozenset()
+    return frozenset(parts[1] for parts in (line.split() for line in out.splitlines()) if len(parts) > 2)
+
+def ass_color(color, alpha=0):
+    """PIL colour name / #hex -> ASS &HAABBGGRR (alpha 0 = opaque)."""
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return f"&H{alpha:02X}{b:02X}{g:02X}{r:02X}"
+
+def ass_time(seconds):
+    cs = max(0, int(round(seconds * 100)))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+def ass_text(text):
+    """Lyric text is literal: no override blocks or \\N-style escapes."""
+    return text.replace("\\", "/").replace("{", "(").replace("}", ")")
+
+def _filter_path(path):
+    """Quote a path for an ffmpeg filter option (Windows drive colons included)."""
+    return "'" + os.path.abspath(path).replace("\\", "/").replace(":", "\\:").replace("'", "\\'") + "'"
+
+def karaoke_tags(text, start, duration, clip_end, words=None):
+    """
+    The active line as \\kf segments timed from `start`: silence before a word
+    sweeps the text leading up to it (spaces, skipped words), each word sweeps
+    over its own duration, and text after the last word waits for clip_end.
+    Without word timings the whole line sweeps over `duration`.
+    """
+    if not words:
+        return f"{{\\kf{max(1, int(round(duration * 100)))}}}{ass_text(text)}"
+    segments = []  # (text, end time)
+    lower, cursor, t = text.lower(), 0, start
+    for w in words:
+        clean = w["word"].strip()
+        idx = lower.find(clean.lower(), cursor) if clean else -1
+        if idx == -1 or idx - cursor >= 15:
+            continue
+        w_start, w_end = max(t, w["start"]), max(t, w["end"])
+        if idx > cursor or w_start > t:
+            segments.append((text[cursor:idx], w_start))
+        segments.append((text[idx:idx + len(clean)], w_end))
+        cursor, t = idx + len(clean), w_end
+    if cursor < len(text):
+        segments.append(("", max(t, clip_end)))
+        segments.append((text[cursor:], max(t, clip_end)))
+    out, prev_cs = [], 0
+    for seg_text, seg_end in segments:
+        end_cs = int(round((seg_end - start) * 100))
+        out.append(f"{{\\kf{max(0, end_cs - prev_cs)}}}{ass_text(seg_text)}")
+        prev_cs = max(prev_cs, end_cs)
+    return "".join(out)
+
+class AssScript:
+    """Collects styles and events for a 1920x1080 karaoke script."""
+
+    def __init__(self, frame=FRAME_SIZE):
+        self.frame = frame
+        self.styles = {}
+        self.events = []
+
+    def style(self, style, size):
+        name = f"{style}{size}"
+        if name not in self.styles:
+            font = get_font(style, size)
+            family, sub = font.getname() if hasattr(font, "getname") else ("Arial", "")
+            # libass sizes fonts by ascent + descent, PIL by em size
+            ass_size = sum(font.getmetrics()) if hasattr(font, "getmetrics") else size
+            bold = -1 if "bold" in (sub or "").lower() or style == "bold" else 0
+            self.styles[name] = (f"Style: {name},{family},{ass_size},&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,"
+                                 f"{bold},0,0,0,100,100,0,0,1,{STROKE},0,8,0,0,0,1")
+        return name
+
+    def event(self, start, end, style, text, layer=1):
+        if end > start:
+            self.events.append(f"Dialogue: {layer},{ass_time(start)},{ass_time(end)},{style},,0,0,0,,{text}")
+
+    def box(self, start, end, box, alpha):
+        x1, y1, x2, y2 = box
+        self.styles.setdefault("Box", "Style: Box,Arial,20,&H00000000,&H00000000,&H00000000,&H00000000,"
+                                      "0,0,0,0,100,100,0,0,1,0,0,7,0,0,0,1")
+        self.event(start, end, "Box", f"{{\\an7\\pos(0,0)\\1c&H000000&\\1a&H{255 - alpha:02X}&\\p1}}"
+                                      f"m {x1} {y1} l {x2 + 1} {y1} {x2 + 1} {y2 + 1} {x1} {y2 + 1}{{\\p0}}", layer=0)
+
+    def block(self, start, end, lines, fills, size, look, y_offset=0, active=None, karaoke=None):
+        """A centred text block like karaoke_text.compose_block; line `active` gets the karaoke text."""
+        box, origins = layout_block(lines, size, look["style"], look["line_pad"], look["box_padding"], self.frame)
+        box = (box[0], box[1] + y_offset, box[2], box[3] + y_offset)
+        self.box(start, end, box, look["box_alpha"])
+        style = self.style(look["style"], size)
+        cx = self.frame[0] // 2
+        for i, (line, fill, (_, y, _)) in enumerate(zip(lines, fills, origins)):
+            head = f"{{\\an8\\pos({cx},{int(y) + y_offset})\\1c&H{ass_color(fill)[4:]}&"
+            if i == active and karaoke is not None:
+                self.event(start, end, style, head + "\\2c&HFFFFFF&}" + karaoke)
+            else:
+                self.event(start, end, style, head + "}" + ass_text(line))
+
+    def caption(self, start, end, txt, size, color, y_offset=0):
+        lines = wrap_text(txt, size, CAPTION_LOOK["style"])
+        self.block(start, end, lines, [color] * len(lines), size, CAPTION_LOOK, y_offset)
+
+    def page_line(self, clip):
+        """One rolling-wipe clip: the page with line j sweeping from white to its colour."""
+        j, start = clip["index"], clip["start"]
+        end = start + clip["total_duration"]
+        karaoke = karaoke_tags(clip["lines"][j], start, clip["duration"], end, clip.get("words"))
+        self.block(start, end, clip["lines"], clip["colors"], 60, PAGE_LOOK, active=j, karaoke=karaoke)
+
+    def dump(self, path):
+        w, h = self.frame
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[Script Info]\nScriptType: v4.00+\n"
+                    f"PlayResX: {w}\nPlayResY: {h}\nWrapStyle: 2\nScaledBorderAndShadow: yes\n\n")
+            f.write("[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+                    "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, "
+                    "Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n")
+            f.write("\n".join(self.styles.values()) + "\n\n")
+            f.write("[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+            f.write("\n".join(self.events) + "\n")
+        return path
+
+def countdown_filter(intro_duration, size=200, color="yellow"):
+    """drawtext for the last three intro seconds (3, 2, 1), or None if this ffmpeg lacks drawtext."""
+    font = get_font(CAPTION_LOOK["style"], size)
+    if "drawtext" not in ffmpeg_filters() or not getattr(font, "path", None):
+        return None
+    start = intro_duration - 3.0
+    return (f"drawtext=fontfile={_filter_path(font.path)}:text='%{{eif\\:ceil({intro_duration}-t)\\:d}}':"
+            f"fontsize={size}:fontcolor={color}:borderw={STROKE}:bordercolor=black:"
+            f"box=1:boxcolor=black@{CAPTION_LOOK['box_alpha'] / 255:.3f}:boxborderw={CAPTION_LOOK['box_padding']}:"
+            f"x=(w-text_w)/2:y=(h-text_h)/2:enable='between(t,{start},{intro_duration})'")
+
+def render_karaoke_ass(ass_path, output_path, audio_path, total_duration, intro_duration=15.0,
+                       background=None, countdown=None, fps=KARAOKE_FPS):
+    """
+    Burns ass_path into the (looped) background in one ffmpeg pass and muxes the
+    audio delayed by intro_duration. `countdown` is an extra video filter (see
+    countdown_filter). Returns output_path.
+    """
+    if background and os.path.exists(background):
+        inputs = ["-stream_loop", "-1", "-i", background]
+    else:
+        inputs = ["-f", "lavfi", "-i", f"color=c={KARAOKE_BG_COLOR}:s={FRAME_SIZE[0]}x{FRAME_SIZE[1]}:r={fps}"]
+    inputs += ["-i", audio_path]
+
+    bar, pb = INTRO_BAR, PROGRESS_BAR
+    fonts = getattr(get_font("regular", 60), "path", None)
+    fontsdir = f":fontsdir={_filter_path(os.path.dirname(fonts))}" if fonts and os.path.isabs(fonts) else ""
+    graph = [
+        f"[0:v]scale={FRAME_SIZE[0]}:{FRAME_SIZE[1]},setsar=1,fps={fps},format=yuv420p,"
+        f"ass={_filter_path(ass_path)}{fontsdir},"
+        f"drawbox=x={bar['x']}:y={bar['y']}:w={bar['w']}:h={bar['h']}:color={bar['bg']}:t=fill:"
+        f"enable='lt(t,{intro_duration})'[base]",
+        # Intro bar fill: lime slides into a transparent bar-sized canvas, so nothing spills outside the bar
+        f"color=c=black@0.0:s={bar['w']}x{bar['h']}:r={fps}:d={intro_duration},format=rgba[barbg]",
+        f"color=c={bar['fill']}:s={bar['w']}x{bar['h']}:r={fps}:d={intro_duration}[barfill]",
+        f"[barbg][barfill]overlay=x='-{bar['w']}+{bar['w']}*t/{intro_duration}':eval=frame[bar]",
+        f"[base][bar]overlay=x={bar['x']}:y={bar['y']}:eof_action=pass[intro]",
+        f"color=c={pb['color']}:s={FRAME_SIZE[0]}x{pb['h']}:r={fps}[progress]",
+        f"[intro][progress]overlay=x='-{FRAME_SIZE[0]}+{FRAME_SIZE[0]}*t/{total_duration:.3f}':y={pb['y']}:"
+        f"eval=frame:shortest=1" + (f",{countdown}" if countdown else "") + "[v]",
+        f"[1:a]adelay=delays={int(intro_duration * 1000)}:all=1[a]",
+    ]
+    cmd = ["ffmpeg", "-y", "-v", "error", "-stats", *inputs, "-filter_complex", ";".join(graph),
+           "-map", "[v]", "-map", "[a]", "-t", f"{total_duration:.3f}", "-r", str(fps),
+           "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", output_path]
+    subprocess.run(cmd, check=True)
+    return output_path
@@ -30,12 +30,16 @@ except ImportError:
 from script_generator import ScriptGenerator
 from media_manager import MediaManager
 from PIL import Image, ImageDraw, ImageFont
-import numpy as np
+from karaoke_text import WipeFrames, caption_block, page_block, text_width, to_full_frame
+from anim_cache import IntroBarFrames, countdown_sprite
+from karaoke_ass import AssScript, countdown_filter, ffmpeg_filters, render_karaoke_ass
 import syncedlyrics
 import yt_dlp
 import whisper
 
 HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "karaoke_song_history.json")
+# "moviepy" composites clips frame by frame in Python; "ass" burns an ASS lyric track in with one ffmpeg/libass pass
+KARAOKE_RENDERER = os.environ.get("KARAOKE_RENDERER", "moviepy")
 
 class KaraokeGenerator:
     def __init__(self):
@@ -645,164 +649,33 @@ Return JSON ONLY:
         return input_file
 
     def _make_text_img_core(self, txt, size=110, color="white", highlight=False):
-        """Core function that returns image and text bounds."""
-        # Create larger canvas for shadows/glow
-        img = Image.new('RGBA', (1920, 1080), (0,0,0,0))
-        draw = ImageDraw.Draw(img)
-        try:
-            font_path = "arialbd.ttf" # Use Bold font for readability
-            if not os.path.exists(font_path):
-                font_path = "C:/Windows/Fonts/arialbd.ttf"
-            font = ImageFont.truetype(font_path, size)
-        except:
-            font = ImageFont.load_default()
-        
-        # Word wrapping (basic)
-        max_width = 1800 # Wider margin
-        
-        # Respect explicit newlines
-        raw_lines = txt.split('\n')
-        lines = []
-        
-        for raw_line in raw_lines:
-            words = raw_line.split(' ')
-            current_line = []
-            
-            for word in words:
-                current_line.append(word)
-                bbox = draw.textbbox((0, 0), " ".join(current_line), font=font)
-                if bbox[2] - bbox[0] > max_width:
-                    current_line.pop()
-                    if current_line:
-                        lines.append(" ".join(current_line))
-                    current_line = [word]
-            if current_line:
-                lines.append(" ".join(current_line))
-        
-        total_h = 0
-        line_heights = []
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=font)
-            h = bbox[3] - bbox[1] + 20
-            line_heights.append(h)
-            total_h += h
-        
-        y = (1080 - total_h) / 2
-        
-        text_color = color
-        
-        # Draw background box for better readability
-        box_padding = 20
-        # Calculate actual max width of lines
-        actual_max_w = 0
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=font)
-            if (bbox[2] - bbox[0]) > actual_max_w: actual_max_w = bbox[2] - bbox[0]
-            
-        box_x1 = int((1920 - actual_max_w) / 2 - box_padding)
-        box_x2 = int((1920 + actual_max_w) / 2 + box_padding)
-        box_y1 = int(y - box_padding)
-        box_y2 = int(y + total_h + box_padding)
-        
-        # Semi-transparent black box
-        draw.rectangle([box_x1, box_y1, box_x2, box_y2], fill=(0, 0, 0, 100))
-
-        for i, line in enumerate(lines):
-            bbox = draw.textbbox((0, 0), line, font=font)
-            w = bbox[2] - bbox[0]
-            x = (1920 - w) / 2
-            
-            # Heavy Stroke (Black Outline)
-            stroke_width = 4
-            for off_x in range(-stroke_width, stroke_width+1):
-                for off_y in range(-stroke_width, stroke_width+1):
-                     draw.text((x+off_x, y+off_y), line, font=font, fill="black")
-            
-            # Text
-            draw.text((x, y), line, font=font, fill=text_color)
-            y += line_heights[i]
-            
-        return np.array(img), (box_x1, box_x2)
+        """Core function that returns a full-frame image and the text box's x bounds."""
+        block = caption_block(txt, size, color)
+        return to_full_frame(block), (block.box[0], block.box[2])
 
     def make_text_img(self, txt, size=80, color="white", highlight=False):
         img, _ = self._make_text_img_core(txt, size, color, highlight)
         return img
 
+    def make_text_sprite(self, txt, size=80, color="white"):
+        """Caption cropped to its box, plus the (x, y) where it sits in the 1920x1080 frame."""
+        block = caption_block(txt, size, color)
+        return block.image, block.origin
+
+    def _page_colors(self, lines, active_idx, active_color, done_color, future_color, line_colors):
+        if line_colors:
+            return list(line_colors)
+        return [done_color if i < active_idx else active_color if i == active_idx else future_color
+                for i in range(len(lines))]
+
+    def _make_multi_line_block(self, lines, active_idx=0, size=60, active_color="cyan", done_color="cyan", future_color="white", line_colors=None):
+        """Page of lines cropped to its background box (see karaoke_text.TextBlock)."""
+        return page_block(lines, self._page_colors(lines, active_idx, active_color, done_color, future_color, line_colors), size)
+
     def _make_multi_line_img(self, lines, active_idx=0, size=60, active_color="cyan", done_color="cyan", future_color="white", line_colors=None):
         """Generates an image with multiple lines, highlighting the active one."""
-        img = Image.new('RGBA', (1920, 1080), (0,0,0,0))
-        draw = ImageDraw.Draw(img)
-        
-        try:
-            font_path = "arial.ttf"
-            if not os.path.exists(font_path):
-                font_path = "C:/Windows/Fonts/arial.ttf"
-            font = ImageFont.truetype(font_path, size)
-        except:
-            font = ImageFont.load_default()
-
-        # Calculate heights and layout
-        line_heights = []
-        total_h = 0
-        max_w = 0
-        
-        # Measure all lines
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=font)
-            w = bbox[2] - bbox[0]
-            # Ensure safe width for 1920p (with padding)
-            if w > 1800:
-                # Force scale down font for this batch if it's too wide
-                # Or just accept it (for now, assume reasonable length)
-                pass
-            h = bbox[3] - bbox[1] + 25 # Increased padding
-            if w > max_w: max_w = w
-            line_heights.append(h)
-            total_h += h
-            
-        y = (1080 - total_h) / 2
-        
-        # Background Box
-        box_padding = 40
-        box_x1 = int((1920 - max_w) / 2 - box_padding)
-        box_x2 = int((1920 + max_w) / 2 + box_padding)
-        box_y1 = int(y - box_padding)
-        box_y2 = int(y + total_h + box_padding)
-        
-        # Semi-transparent black box
-        draw.rectangle([box_x1, box_y1, box_x2, box_y2], fill=(0, 0, 0, 140))
-        
-        active_bounds = (0, 0)
-        
-        for i, line in enumerate(lines):
-            bbox = draw.textbbox((0, 0), line, font=font)
-            w = bbox[2] - bbox[0]
-            x = (1920 - w) / 2
-            
-            # Determine Color
-            if line_colors:
-                fill_color = line_colors[i]
-                if i == active_idx:
-                    active_bounds = (x, x + w)
-            else:
-                fill_color = future_color
-                if i < active_idx:
-                    fill_color = done_color
-                elif i == active_idx:
-                    fill_color = active_color
-                    active_bounds = (x, x + w)
-            
-            # Heavy Stroke (Black Outline)
-            stroke_width = 4
-            for off_x in range(-stroke_width, stroke_width+1):
-                for off_y in range(-stroke_width, stroke_width+1):
-                     draw.text((x+off_x, y+off_y), line, font=font, fill="black")
-            
-            # Text
-            draw.text((x, y), line, font=font, fill=fill_color)
-            y += line_heights[i]
-            
-        return np.array(img), active_bounds
+        block = self._make_multi_line_block(lines, active_idx, size, active_color, done_color, future_color, line_colors)
+        return to_full_frame(block), block.line_spans[active_idx] if 0 <= active_idx < len(lines) else (0, 0)
 
     def create_rolling_wipe_clip(self, lines_group, active_idx, duration, start_time, word_timings=None, line_colors=None, total_duration=None):
         """Creates a wipe clip for a group of lines. Supports word-level timing."""
@@ -820,27 +693,24 @@ Return JSON ONLY:
             # Inactive state: Current line should be white (not yet sung)
             colors_inactive[active_idx] = "white"
         
-        # 1. Inactive State
-        img_inactive, bounds = self._make_multi_line_img(lines_group, active_idx, size=60, 
-                                                         active_color="white", done_color="cyan", future_color="white",
-                                                         line_colors=colors_inactive)
+        # 1. Inactive State (cropped to the page box; positions below are relative to it)
+        block_inactive = self._make_multi_line_block(lines_group, active_idx, size=60, 
+                                                     active_color="white", done_color="cyan", future_color="white",
+                                                     line_colors=colors_inactive)
+        img_inactive = block_inactive.image
         
         # 2. Active State
-        img_active, _ = self._make_multi_line_img(lines_group, active_idx, size=60, 
-                                                  active_color="cyan", done_color="cyan", future_color="white",
-                                                  line_colors=colors_active)
+        img_active = self._make_multi_line_block(lines_group, active_idx, size=60, 
+                                                 active_color="cyan", done_color="cyan", future_color="white",
+                                                 line_colors=colors_active).image
         
-        x1, x2 = bounds
+        origin_x, origin_y = block_inactive.origin
+        x1, x2 = (x - origin_x for x in block_inactive.line_spans[active_idx])
         
         # Pre-calculate word spans if timings are available
         word_spans = []
         if word_timings:
             try:
-                font_path = "arial.ttf"
-                if not os.path.exists(font_path): font_path = "C:/Windows/Fonts/arial.ttf"
-                font = ImageFont.truetype(font_path, 60)
-                draw = ImageDraw.Draw(Image.new('L', (1,1)))
-                
                 # Improved Logic: Match Whisper words to actual Display Text to account for punctuation/spaces
                 full_line_text = lines_group[active_idx]
                 full_line_lower = full_line_text.lower()
@@ -868,15 +738,13 @@ Return JSON ONLY:
                         
                         # Calculate Text Width UP TO this word (to catch skipped text/spaces)
                         text_before_word = full_line_text[:match_idx]
-                        bbox_before = draw.textbbox((0, 0), text_before_word, font=font)
-                        x_start_actual = bbox_before[2] - bbox_before[0]
+                        x_start_actual = text_width(text_before_word, 60)
                         
                         # Calculate Text Width INCLUDING this word
                         end_char_idx = match_idx + len(clean_word)
                         measured_text = full_line_text[:end_char_idx] 
                         
-                        bbox = draw.textbbox((0, 0), measured_text, font=font)
-                        current_total_w = bbox[2] - bbox[0]
+                        current_total_w = text_width(measured_text, 60)
                         
                         search_start_idx = end_char_idx
                         cumulative_text_fallback = measured_text
@@ -887,8 +755,7 @@ Return JSON ONLY:
                     else:
                         # Fallback: Just accumulate the Whisper word
                         cumulative_text_fallback += word_str
-                        bbox = draw.textbbox((0, 0), cumulative_text_fallback, font=font)
-                        current_total_w = bbox[2] - bbox[0]
+                        current_total_w = text_width(cumulative_text_fallback, 60)
                         
                         target_x_end = x1 + current_total_w
                         target_x_start = x1 + last_measured_width # Fallback uses accumulation
@@ -941,85 +808,27 @@ Return JSON ONLY:
         mask_data = img_inactive[:,:,3] / 255.0
         mask_clip = ImageClip(mask_data, ismask=True, duration=clip_duration)
 
-        def make_frame_rgb(t):
-            wipe_x = x1
-            
-            if word_spans:
-                # Find which span t is in
-                found_active = False
-                for span in word_spans:
-                    if t < span['start']:
-                        # In silence before this word
-                        # Stay at previous word end (which is this span's start_x)
-                        wipe_x = span['x_start']
-                        found_active = True
-                        break
-                    
-                    if span['start'] <= t <= span['end']:
-                        # Inside word - interpolate
-                        dur = span['end'] - span['start']
-                        if dur > 0:
-                            p = (t - span['start']) / dur
-                            wipe_x = int(span['x_start'] + (span['x_end'] - span['x_start']) * p)
-                        else:
-                            wipe_x = span['x_end']
-                        found_active = True
-                        break
-                    
-                    # Past this word, ensure we hold at its end
-                    wipe_x = span['x_end']
-                
-                # If loop finishes and not found_active, we are past the last word -> keep max wipe
-                pass
-            else:
-                # Linear fallback
-                progress = t / duration if duration > 0 else 1
-                if progress > 1: progress = 1
-                wipe_x = int(x1 + (x2 - x1) * progress)
-            
-            # Draw
-            frame = img_inactive.copy()
-            wipe_x = int(wipe_x)
-            if wipe_x > 0:
-                if wipe_x > frame.shape[1]: wipe_x = frame.shape[1]
-                frame[:, :wipe_x] = img_active[:, :wipe_x]
-            
-            return frame[:,:,:3] # Return RGB only
+        # Span lookup is a binary search; frames only repaint the active line's changed columns
+        make_frame_rgb = WipeFrames(img_inactive, img_active, x1, x2, duration, word_spans)
 
-        return VideoClip(make_frame_rgb, duration=clip_duration).set_mask(mask_clip).set_start(start_time).set_position("center")
+        return VideoClip(make_frame_rgb, duration=clip_duration).set_mask(mask_clip).set_start(start_time).set_position((origin_x, origin_y))
 
     def create_wipe_clip(self, txt, duration, start_time):
         """Creates a VideoClip with a karaoke wipe effect."""
         # 1. Generate Inactive (Future) Image - White
-        img_inactive, bounds = self._make_text_img_core(txt, 80, "white")
+        block = caption_block(txt, 80, "white")
+        img_inactive = block.image
         
         # 2. Generate Active (Past) Image - Blue (Cyan)
-        img_active, _ = self._make_text_img_core(txt, 80, "cyan") # User requested blue-ish
+        img_active = caption_block(txt, 80, "cyan").image # User requested blue-ish
         
-        x1, x2 = bounds
+        x1, x2 = block.box[0] - block.origin[0], block.box[2] - block.origin[0]
         
-        # 3. Define the frame generator
-        def make_frame(t):
-            # Progress 0..1
-            progress = t / duration if duration > 0 else 1
-            if progress > 1: progress = 1
-            
-            # Calculate wipe position
-            # Wipe moves from x1 to x2
-            wipe_x = int(x1 + (x2 - x1) * progress)
-            
-            # Start with inactive base
-            frame = img_inactive.copy()
-            
-            # Apply active part (slice)
-            # Ensure indices are valid
-            if wipe_x > 0:
-                frame[:, :wipe_x] = img_active[:, :wipe_x]
-                
-            return frame
+        # 3. Define the frame generator (wipe moves linearly from x1 to x2; RGBA like before)
+        make_frame = WipeFrames(img_inactive, img_active, x1, x2, duration, channels=4)
 
         # Return VideoClip
-        return VideoClip(make_frame, duration=duration).set_start(start_time).set_position("center")
+        return VideoClip(make_frame, duration=duration).set_start(start_time).set_position(block.origin)
 
 
     def generate_thumbnail(self, title, artist, output_path="thumbnail.jpg"):
@@ -1103,12 +912,292 @@ Return JSON ONLY:
         clips = []
         # 3... 2... 1...
         for i in range(3, 0, -1):
-            txt_img = self.make_text_img(str(i), size=200, color="yellow")
-            clip = ImageClip(txt_img).set_duration(1.0).set_start(start_time + (3-i)).set_position("center")
+            sprite = countdown_sprite(i, size=200, color="yellow")
+            clip = ImageClip(sprite.image).set_duration(1.0).set_start(start_time + (3-i)).set_position(sprite.origin)
             clips.append(clip)
         return clips
 
-    def create_video(self, output_path):
+    def _speaker_color_map(self, lines):
+        """Highlight colour per speaker_id, by speaker gender."""
+        speaker_ids = set()
+        speaker_genders = {}
+        
+        for line in lines:
+            sid = line.get("speaker_id", "s1")
+            gen = line.get("gender", "unknown")
+            speaker_ids.add(sid)
+            speaker_genders[sid] = gen
+        
+        # Sort speakers for consistency
+        sorted_speakers = sorted(list(speaker_ids))
+        
+        # Determine Color Map
+        color_map = {}
+        
+        # Check demographics
+        has_male = any("male" in g for g in speaker_genders.values() if g != "female")
+        has_female = any("female" in g for g in speaker_genders.values())
+        
+        males = [s for s in sorted_speakers if "male" in speaker_genders[s] and "female" not in speaker_genders[s]]
+        females = [s for s in sorted_speakers if "female" in speaker_genders[s]]
+        others = [s for s in sorted_speakers if s not in males and s not in females]
+        
+        # Assign Colors
+        # Strategy:
+        # If Male & Female: Male->Blue, Female->Pink
+        # If Multiple Males: M1->Blue, M2->Cyan
+        # If Multiple Females: F1->Pink, F2->Purple
+        
+        # Males
+        if len(males) == 1:
+            color_map[males[0]] = "#00BFFF" # Deep Sky Blue
+        elif len(males) > 1:
+            palette = ["#00BFFF", "#00FFFF", "#1E90FF", "#4682B4"]
+            for i, s in enumerate(males):
+                color_map[s] = palette[i % len(palette)]
+        
+        # Females
+        if len(females) == 1:
+            color_map[females[0]] = "#FF69B4" # Hot Pink
+        elif len(females) > 1:
+            palette = ["#FF69B4", "#FF1493", "#DA70D6", "#FF00FF"]
+            for i, s in enumerate(females):
+                color_map[s] = palette[i % len(palette)]
+        
+        # Others (Unknown)
+        other_palette = ["#00FF00", "#FFFF00", "#FFA500"] # Green, Yellow, Orange
+        for i, s in enumerate(others):
+            # If solo and unknown, default to Cyan
+            if len(sorted_speakers) == 1:
+                color_map[s] = "cyan"
+            else:
+                color_map[s] = other_palette[i % len(other_palette)]
+        
+        print(f"🎨 Speaker Colors: {color_map}")
+        
+        return color_map
+
+    def _page_line_plan(self, lines, color_map):
+        """
+        One entry per synced line: its page of (up to) 3 lines and colours, its
+        index in the page, wipe timing and how long it stays up (to the next line/page).
+        """
+        plan = []
+        for i in range(0, len(lines), 3):
+            # Define Page Content
+            page_lines = lines[i : i+3]
+            page_text_lines = [l["text"] for l in page_lines]
+
+            # Determine colors for this page
+            page_colors = [color_map.get(l.get("speaker_id", "s1"), "white") for l in page_lines]
+
+            # Iterate through lines within this page
+            for j, line in enumerate(page_lines):
+                start = line["start"]
+                end = line["end"]
+                duration = end - start
+
+                # Safety cap
+                if duration > 15: duration = 15
+                if duration < 0.1: duration = 0.1
+
+                # Calculate total_duration to fill gap to next line/page
+                total_duration = duration
+
+                if j < len(page_lines) - 1:
+                    # Gap to next line in same page
+                    gap = page_lines[j+1]["start"] - end
+                else:
+                    # Last line of page. Gap to start of NEXT page?
+                    gap = lines[i + 3]["start"] - end if i + 3 < len(lines) else 0
+                if gap > 0:
+                    total_duration += gap
+
+                plan.append({"lines": page_text_lines, "colors": page_colors, "index": j, "start": start,
+                             "duration": duration, "total_duration": total_duration,
+                             "words": line.get("words", None)})
+        return plan
+
+    def _unsynced_chunk_duration(self, lines, audio_file):
+        """Seconds per 3-line chunk when the lyrics have no timings: spread over the song."""
+        # Estimate audio duration to spread lyrics
+        try:
+            temp_audio = AudioFileClip(audio_file)
+            audio_dur = temp_audio.duration
+            temp_audio.close()
+        except:
+            audio_dur = 180
+
+        # Calculate chunk duration
+        num_chunks = (len(lines) + 2) // 3
+        if num_chunks > 0:
+            chunk_dur = audio_dur / num_chunks
+        else:
+            chunk_dur = 6
+
+        if chunk_dur < 4: chunk_dur = 4
+        return chunk_dur
+
+    def _render_ass(self, output_path, title, artist, lyrics_data, audio_file, bg_file, intro_duration):
+        """
+        Writes the whole lyric track as one ASS script and burns it in with a
+        single ffmpeg/libass pass (see karaoke_ass). Same layout as the MoviePy path.
+        """
+        script = AssScript()
+
+        # Intro: title, artist, get ready, then the 3..2..1 countdown
+        script.caption(0, 5.0, title.upper(), 130, "yellow")
+        script.caption(5.0, 9.0, f"by {artist}", 90, "cyan")
+        script.caption(9.0, 12.0, "GET READY TO SING!", 100, "white")
+        countdown = countdown_filter(intro_duration)
+        if not countdown:
+            for i in range(3, 0, -1):
+                script.caption(intro_duration - i, intro_duration - i + 1, str(i), 200, "yellow")
+
+        lines = lyrics_data["lines"]
+        if lyrics_data["type"] == "synced":
+            for line_clip in self._page_line_plan(lines, self._speaker_color_map(lines)):
+                script.page_line(line_clip)
+        else:
+            chunk_dur = self._unsynced_chunk_duration(lines, audio_file)
+            current_time = intro_duration
+            for i in range(0, len(lines), 3):
+                script.caption(current_time, current_time + chunk_dur, "\n".join(lines[i:i+3]), 80, "white")
+                current_time += chunk_dur
+
+        audio_clip = AudioFileClip(audio_file)
+        total_dur = audio_clip.duration + intro_duration
+        audio_clip.close()
+
+        # Call to Action (End Screen Overlay) - Last 10 seconds, 200px below centre
+        script.caption(total_dur - 10, total_dur, "SUBSCRIBE FOR MORE KARAOKE!", 90, "yellow", y_offset=200)
+
+        ass_file = script.dump("temp_karaoke.ass")
+        print(f"💾 Rendering to {output_path} (libass, {len(script.events)} subtitle events)...")
+        try:
+            render_karaoke_ass(ass_file, output_path, audio_file, total_dur, intro_duration=intro_duration,
+                               background=bg_file, countdown=countdown)
+        finally:
+            if os.path.exists(ass_file): os.remove(ass_file)
+        return output_path
+
+    def _render_moviepy(self, output_path, title, artist, lyrics_data, audio_file, bg_file, intro_duration):
+        """Composites every clip in MoviePy and renders frame by frame."""
+        INTRO_DURATION = intro_duration
+        bg_clip = None
+        if bg_file:
+            try:
+                bg_clip = VideoFileClip(bg_file).without_audio().resize(newsize=(1920, 1080))
+            except:
+                pass
+        if not bg_clip:
+            bg_clip = ColorClip(size=(1920, 1080), color=(0, 0, 30), duration=10)
+
+        clips = []
+        
+        # --- DYNAMIC RETENTION INTRO ---
+        # 0s - 5s: SONG TITLE (Massive)
+        # 5s - 9s: ARTIST (Medium)
+        # 9s - 12s: GET READY (Pulse)
+        # 12s - 15s: COUNTDOWN (3..2..1)
+        
+        intro_dur_title = 5.0
+        intro_dur_artist = 4.0
+        intro_dur_ready = 3.0
+        
+        # 1. Title Clip (Massive)
+        title_img, title_pos = self.make_text_sprite(title.upper(), 130, "yellow")
+        clips.append(ImageClip(title_img).set_duration(intro_dur_title).set_start(0).set_position(title_pos))
+        
+        # 2. Artist Clip
+        artist_img, artist_pos = self.make_text_sprite(f"by {artist}", 90, "cyan")
+        clips.append(ImageClip(artist_img).set_duration(intro_dur_artist).set_start(intro_dur_title).set_position(artist_pos))
+        
+        # 3. Get Ready
+        ready_img, ready_pos = self.make_text_sprite("GET READY TO SING!", 100, "white")
+        clips.append(ImageClip(ready_img).set_duration(intro_dur_ready).set_start(intro_dur_title + intro_dur_artist).set_position(ready_pos))
+        
+        # Intro Progress Bar (Singing Starts in...)
+        # A small bar that fills up during the 15s intro (end states cached, see anim_cache)
+        intro_bar_frames = IntroBarFrames(INTRO_DURATION)
+        intro_bar_mask = VideoClip(intro_bar_frames.mask, duration=INTRO_DURATION, ismask=True)
+        intro_bar = VideoClip(intro_bar_frames.rgb, duration=INTRO_DURATION).set_mask(intro_bar_mask).set_position(("center", 800))
+        clips.append(intro_bar)
+        
+        # Countdown (Last 3 seconds of Intro)
+        countdown_clips = self.create_countdown_clip(start_time=INTRO_DURATION - 3.0)
+        clips.extend(countdown_clips)
+        
+        current_time = INTRO_DURATION
+        
+        if lyrics_data["type"] == "synced":
+            lines = lyrics_data["lines"]
+            
+            color_map = self._speaker_color_map(lines)
+            
+            # Process in Groups of 3 (Pages)
+            # 1. Chunk lines into pages of 3
+            # 2. For each page, display all lines in that page, highlighting one by one.
+            # 3. Transition to next page occurs naturally when last line of page finishes.
+            for line_clip in self._page_line_plan(lines, color_map):
+                # We pass the WHOLE page text, but highlight index j
+                clip = self.create_rolling_wipe_clip(line_clip["lines"], line_clip["index"], line_clip["duration"],
+                                                     line_clip["start"], word_timings=line_clip["words"],
+                                                     line_colors=line_clip["colors"],
+                                                     total_duration=line_clip["total_duration"])
+                clips.append(clip)
+                
+        else:
+            # Unsynced fallback
+            lines = lyrics_data["lines"]
+            
+            chunk_dur = self._unsynced_chunk_duration(lines, audio_file)
+            
+            for i in range(0, len(lines), 3):
+                chunk = "\n".join(lines[i:i+3])
+                img, pos = self.make_text_sprite(chunk, 80, "white")
+                txt_clip = ImageClip(img).set_start(current_time).set_duration(chunk_dur).set_position(pos)
+                clips.append(txt_clip)
+                current_time += chunk_dur
+
+        # Load Audio
+        audio_clip = AudioFileClip(audio_file).set_start(INTRO_DURATION)
+        total_dur = audio_clip.duration + INTRO_DURATION
+        
+        # Ensure Audio is properly composited with silence at start
+        # CompositeAudioClip respects the start time of its components
+        final_audio = CompositeAudioClip([audio_clip])
+        
+        # Loop BG
+        final_bg = bg_clip.loop(duration=total_dur)
+        
+        # Progress Bar (Red line at bottom)
+        progress_bar = ColorClip(size=(1920, 15), color=(255, 0, 0)).set_duration(total_dur)
+        progress_bar = progress_bar.set_position(lambda t: (-1920 + (1920 * t / total_dur), 1065))
+        
+        # Call to Action (End Screen Overlay) - Last 10 seconds
+        cta_img, (cta_x, cta_y) = self.make_text_sprite("SUBSCRIBE FOR MORE KARAOKE!", size=90, color="yellow")
+        # Same spot as the old full-frame overlay placed at y=200
+        cta_clip = ImageClip(cta_img).set_duration(10).set_start(total_dur - 10).set_position((cta_x, cta_y + 200))
+        
+        # Composite
+        final = CompositeVideoClip([final_bg] + clips + [progress_bar, cta_clip])
+        final = final.set_audio(final_audio)
+        
+        print(f"💾 Rendering to {output_path}...")
+        try:
+            final.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac", ffmpeg_params=["-pix_fmt", "yuv420p"])
+        finally:
+            # Cleanup resources to prevent WinError 6
+            try:
+                final.close()
+                audio_clip.close()
+                final_audio.close()
+                if bg_clip: bg_clip.close()
+            except:
+                pass
+
+    def create_video(self, output_path, renderer=None):
         song = self.get_song()
         title = song.get("title", "Unknown")
         artist = song.get("artist", "Unknown")
@@ -1224,245 +1313,21 @@ Return JSON ONLY:
         # 3. Get Visuals
         bg_query = f"neon {random.choice(['lights', 'tunnel', 'retro', 'stage'])} loop"
         bg_data = self.media_mgr.search_video(bg_query, orientation="landscape")
-        bg_clip = None
+        bg_file = None
         if bg_data:
             bg_file = "temp_karaoke_bg.mp4"
-            if self.media_mgr.download_file(bg_data['url'], bg_file):
-                try:
-                    bg_clip = VideoFileClip(bg_file).without_audio().resize(newsize=(1920, 1080))
-                except:
-                    pass
-        if not bg_clip:
-            bg_clip = ColorClip(size=(1920, 1080), color=(0, 0, 30), duration=10)
-
-        # 4. Build Clips
-        clips = []
-        
-        # --- DYNAMIC RETENTION INTRO ---
-        # 0s - 5s: SONG TITLE (Massive)
-        # 5s - 9s: ARTIST (Medium)
-        # 9s - 12s: GET READY (Pulse)
-        # 12s - 15s: COUNTDOWN (3..2..1)
-        
-        intro_dur_title = 5.0
-        intro_dur_artist = 4.0
-        intro_dur_ready = 3.0
-        
-        # 1. Title Clip (Massive)
-        title_img = self.make_text_img(title.upper(), 130, "yellow")
-        clips.append(ImageClip(title_img).set_duration(intro_dur_title).set_start(0).set_position("center"))
-        
-        # 2. Artist Clip
-        artist_img = self.make_text_img(f"by {artist}", 90, "cyan")
-        clips.append(ImageClip(artist_img).set_duration(intro_dur_artist).set_start(intro_dur_title).set_position("center"))
-        
-        # 3. Get Ready
-        ready_img = self.make_text_img("GET READY TO SING!", 100, "white")
-        clips.append(ImageClip(ready_img).set_duration(intro_dur_ready).set_start(intro_dur_title + intro_dur_artist).set_position("center"))
-        
-        # Intro Progress Bar (Singing Starts in...)
-        # A small bar that fills up during the 15s intro
-        def make_intro_bar_core(t):
-            bar_w = int(600 * (t / INTRO_DURATION))
-            img = Image.new('RGBA', (600, 20), (50, 50, 50, 200))
-            draw = ImageDraw.Draw(img)
-            draw.rectangle([0, 0, bar_w, 20], fill="lime")
-            return np.array(img)
-            
-        def make_intro_bar_rgb(t):
-            return make_intro_bar_core(t)[:,:,:3]
+            if not self.media_mgr.download_file(bg_data['url'], bg_file):
+                bg_file = None
 
-        def make_intro_bar_mask(t):
-            return make_intro_bar_core(t)[:,:,3] / 255.0
-            
-        intro_bar_mask = VideoClip(make_intro_bar_mask, duration=INTRO_DURATION, ismask=True)
-        intro_bar = VideoClip(make_intro_bar_rgb, duration=INTRO_DURATION).set_mask(intro_bar_mask).set_position(("center", 800))
-        clips.append(intro_bar)
-        
-        # Countdown (Last 3 seconds of Intro)
-        countdown_clips = self.create_countdown_clip(start_time=INTRO_DURATION - 3.0)
-        clips.extend(countdown_clips)
-        
-        current_time = INTRO_DURATION
-        
-        if lyrics_data["type"] == "synced":
-            lines = lyrics_data["lines"]
-            
-            # --- Speaker Color Logic ---
-            speaker_ids = set()
-            speaker_genders = {}
-            
-            for line in lines:
-                sid = line.get("speaker_id", "s1")
-                gen = line.get("gender", "unknown")
-                speaker_ids.add(sid)
-                speaker_genders[sid] = gen
-            
-            # Sort speakers for consistency
-            sorted_speakers = sorted(list(speaker_ids))
-            
-            # Determine Color Map
-            color_map = {}
-            
-            # Check demographics
-            has_male = any("male" in g for g in speaker_genders.values() if g != "female")
-            has_female = any("female" in g for g in speaker_genders.values())
-            
-            males = [s for s in sorted_speakers if "male" in speaker_genders[s] and "female" not in speaker_genders[s]]
-            females = [s for s in sorted_speakers if "female" in speaker_genders[s]]
-            others = [s for s in sorted_speakers if s not in males and s not in females]
-            
-            # Assign Colors
-            # Strategy:
-            # If Male & Female: Male->Blue, Female->Pink
-            # If Multiple Males: M1->Blue, M2->Cyan
-            # If Multiple Females: F1->Pink, F2->Purple
-            
-            # Males
-            if len(males) == 1:
-                color_map[males[0]] = "#00BFFF" # Deep Sky Blue
-            elif len(males) > 1:
-                palette = ["#00BFFF", "#00FFFF", "#1E90FF", "#4682B4"]
-                for i, s in enumerate(males):
-                    color_map[s] = palette[i % len(palette)]
-            
-            # Females
-            if len(females) == 1:
-                color_map[females[0]] = "#FF69B4" # Hot Pink
-            elif len(females) > 1:
-                palette = ["#FF69B4", "#FF1493", "#DA70D6", "#FF00FF"]
-                for i, s in enumerate(females):
-                    color_map[s] = palette[i % len(palette)]
-            
-            # Others (Unknown)
-            other_palette = ["#00FF00", "#FFFF00", "#FFA500"] # Green, Yellow, Orange
-            for i, s in enumerate(others):
-                # If solo and unknown, default to Cyan
-                if len(sorted_speakers) == 1:
-                    color_map[s] = "cyan"
-                else:
-                    color_map[s] = other_palette[i % len(other_palette)]
-            
-            print(f"🎨 Speaker Colors: {color_map}")
-            
-            # Process in Groups of 3 (Pages)
-            # 1. Chunk lines into pages of 3
-            # 2. For each page, display all lines in that page, highlighting one by one.
-            # 3. Transition to next page occurs naturally when last line of page finishes.
-            
-            for i in range(0, len(lines), 3):
-                # Define Page Content
-                page_lines = lines[i : i+3]
-                page_text_lines = [l["text"] for l in page_lines]
-                
-                # Determine colors for this page
-                page_colors = []
-                for l in page_lines:
-                    sid = l.get("speaker_id", "s1")
-                    page_colors.append(color_map.get(sid, "white"))
-                
-                # Iterate through lines within this page
-                for j, line in enumerate(page_lines):
-                    txt = line["text"]
-                    start = line["start"]
-                    end = line["end"]
-                    duration = end - start
-                    
-                    # Safety cap
-                    if duration > 15: duration = 15
-                    if duration < 0.1: duration = 0.1
-                    
-                    word_timings = line.get("words", None)
-                    
-                    # Calculate total_duration to fill gap to next line/page
-                    total_duration = duration
-                    
-                    if j < len(page_lines) - 1:
-                        # Gap to next line in same page
-                        next_start = page_lines[j+1]["start"]
-                        gap = next_start - end
-                        if gap > 0:
-                            total_duration += gap
-                    else:
-                        # Last line of page. Gap to start of NEXT page?
-                        next_page_idx = i + 3
-                        if next_page_idx < len(lines):
-                            next_page_start = lines[next_page_idx]["start"]
-                            gap = next_page_start - end
-                            if gap > 0:
-                                total_duration += gap
-                    
-                    # Create Clip for this line (j is index within page)
-                    # We pass the WHOLE page text, but highlight index j
-                    clip = self.create_rolling_wipe_clip(page_text_lines, j, duration, start, 
-                                                         word_timings=word_timings,
-                                                         line_colors=page_colors,
-                                                         total_duration=total_duration)
-                    clips.append(clip)
-                
+        # 4. Render
+        renderer = renderer or KARAOKE_RENDERER
+        if renderer == "ass" and "ass" not in ffmpeg_filters():
+            print("⚠️ This ffmpeg has no libass 'ass' filter; rendering with MoviePy.")
+            renderer = "moviepy"
+        if renderer == "ass":
+            self._render_ass(output_path, title, artist, lyrics_data, audio_file, bg_file, INTRO_DURATION)
         else:
-            # Unsynced fallback
-            lines = lyrics_data["lines"]
-            
-            # Estimate audio duration to spread lyrics
-            try:
-                temp_audio = AudioFileClip(audio_file)
-                audio_dur = temp_audio.duration
-                temp_audio.close()
-            except:
-                audio_dur = 180
-
-            # Calculate chunk duration
-            num_chunks = (len(lines) + 2) // 3
-            if num_chunks > 0:
-                chunk_dur = audio_dur / num_chunks
-            else:
-                chunk_dur = 6
-            
-            if chunk_dur < 4: chunk_dur = 4
-            
-            for i in range(0, len(lines), 3):
-                chunk = "\n".join(lines[i:i+3])
-                img = self.make_text_img(chunk, 80, "white")
-                txt_clip = ImageClip(img).set_start(current_time).set_duration(chunk_dur).set_position("center")
-                clips.append(txt_clip)
-                current_time += chunk_dur
-
-        # Load Audio
-        audio_clip = AudioFileClip(audio_file).set_start(INTRO_DURATION)
-        total_dur = audio_clip.duration + INTRO_DURATION
-        
-        # Ensure Audio is properly composited with silence at start
-        # CompositeAudioClip respects the start time of its components
-        final_audio = CompositeAudioClip([audio_clip])
-        
-        # Loop BG
-        final_bg = bg_clip.loop(duration=total_dur)
-        
-        # Progress Bar (Red line at bottom)
-        progress_bar = ColorClip(size=(1920, 15), color=(255, 0, 0)).set_duration(total_dur)
-        progress_bar = progress_bar.set_position(lambda t: (-1920 + (1920 * t / total_dur), 1065))
-        
-        # Call to Action (End Screen Overlay) - Last 10 seconds
-        cta_img = self.make_text_img("SUBSCRIBE FOR MORE KARAOKE!", size=90, color="yellow")
-        cta_clip = ImageClip(cta_img).set_duration(10).set_start(total_dur - 10).set_position(("center", 200)) # Top area
-        
-        # Composite
-        final = CompositeVideoClip([final_bg] + clips + [progress_bar, cta_clip])
-        final = final.set_audio(final_audio)
-        
-        print(f"💾 Rendering to {output_path}...")
-        try:
-            final.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac", ffmpeg_params=["-pix_fmt", "yuv420p"])
-        finally:
-            # Cleanup resources to prevent WinError 6
-            try:
-                final.close()
-                audio_clip.close()
-                final_audio.close()
-                if bg_clip: bg_clip.close()
-            except:
-                pass
+            self._render_moviepy(output_path, title, artist, lyrics_data, audio_file, bg_file, INTRO_DURATION)
         
         # Cleanup Files
         try:
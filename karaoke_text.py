@@ -0,0 +1,211 @@
+"""
+Cached text rasterization for karaoke lyrics.
+
+Fonts are loaded once per (style, size). Each lyric line is rasterized once per
+(text, size, fill, style, stroke), tightly cropped to its stroked bounding box,
+with the outline drawn in the same pass via PIL's stroke_width. Text blocks
+(a page of lyrics or a caption) are composed from those line rasters onto a
+canvas that only covers the block's background box, not the whole frame, and
+come back with their frame origin so clips can be positioned directly.
+WipeFrames turns an inactive/active pair of those blocks into a karaoke wipe
+frame function.
+"""
+import os
+from functools import lru_cache
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+FRAME_SIZE = (1920, 1080)
+FONT_FILES = {
+    "regular": ("arial.ttf", "C:/Windows/Fonts/arial.ttf", "DejaVuSans.ttf"),
+    "bold": ("arialbd.ttf", "C:/Windows/Fonts/arialbd.ttf", "DejaVuSans-Bold.ttf"),
+}
+STROKE_WIDTH = 4
+STROKE_FILL = "black"
+LINE_CACHE_SIZE = 1024
+
+class TextBlock(NamedTuple):
+    image: np.ndarray                      # RGBA, cropped to the block
+    origin: Tuple[int, int]                # top-left of `image` in frame coordinates
+    line_spans: List[Tuple[float, float]]  # (x_start, x_end) of each line's text, frame coordinates
+    box: Tuple[int, int, int, int]         # background box (x1, y1, x2, y2), frame coordinates
+
+@lru_cache(maxsize=64)
+def get_font(style="regular", size=60):
+    for path in FONT_FILES.get(style, FONT_FILES["regular"]):
+        # Bare names are resolved from the working directory first, as before, then the system font dirs
+        if os.path.isabs(path) and not os.path.exists(path):
+            continue
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+@lru_cache(maxsize=8192)
+def text_bbox(text, size=60, style="regular"):
+    """Same box as ImageDraw.textbbox((0, 0), text, font) without a throwaway image."""
+    return get_font(style, size).getbbox(text)
+
+def text_width(text, size=60, style="regular"):
+    bbox = text_bbox(text, size, style)
+    return bbox[2] - bbox[0]
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def render_line(text, size, fill, style="regular", stroke_fill=STROKE_FILL, stroke_width=STROKE_WIDTH):
+    """
+    Outlined line raster, cropped to the stroked glyph box. Returns (RGBA image,
+    (dx, dy)): pasting it at (x + dx, y + dy) matches draw.text((x, y), ...).
+    The image is shared by the cache; do not draw on it.
+    """
+    font = get_font(style, size)
+    left, top, right, bottom = font.getbbox(text, stroke_width=stroke_width)
+    img = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(img).text((-left, -top), text, font=font, fill=fill,
+                             stroke_width=stroke_width, stroke_fill=stroke_fill)
+    return img, (left, top)
+
+def _paste(canvas, img, x, y):
+    """alpha_composite with the source clipped to the canvas (dest must be non-negative)."""
+    sx, sy = max(0, -x), max(0, -y)
+    x, y = max(0, x), max(0, y)
+    w = min(img.width - sx, canvas.width - x)
+    h = min(img.height - sy, canvas.height - y)
+    if w > 0 and h > 0:
+        canvas.alpha_composite(img, dest=(x, y), source=(sx, sy, sx + w, sy + h))
+
+def layout_block(lines: Sequence[str], size, style="regular", line_pad=25, box_padding=40, frame=FRAME_SIZE):
+    """
+    Centred layout shared by the raster and ASS renderers: returns the background
+    box (x1, y1, x2, y2) and each line's draw.text origin and width as (x, y, w).
+    """
+    frame_w, frame_h = frame
+    bboxes = [text_bbox(line, size, style) for line in lines]
+    widths = [b[2] - b[0] for b in bboxes]
+    heights = [b[3] - b[1] + line_pad for b in bboxes]
+    total_h = sum(heights)
+    max_w = max(widths) if widths else 0
+    y = (frame_h - total_h) / 2
+    box = (int((frame_w - max_w) / 2 - box_padding), int(y - box_padding),
+           int((frame_w + max_w) / 2 + box_padding), int(y + total_h + box_padding))
+    origins = []
+    for w, h in zip(widths, heights):
+        origins.append(((frame_w - w) / 2, y, w))
+        y += h
+    return box, origins
+
+def compose_block(lines: Sequence[str], fills: Sequence, size, style="regular", line_pad=25,
+                  box_padding=40, box_alpha=140, frame=FRAME_SIZE) -> TextBlock:
+    """Lines centred in the frame over a semi-transparent box, like the full-frame renderer drew them."""
+    frame_w, frame_h = frame
+    box, origins = layout_block(lines, size, style, line_pad, box_padding, frame)
+
+    placed, spans = [], []
+    for line, fill, (x, y, w) in zip(lines, fills, origins):
+        img, (dx, dy) = render_line(line, size, fill, style)
+        placed.append((img, int(x) + dx, int(y) + dy))
+        spans.append((x, x + w))
+
+    # Canvas covers the box and every stroked line, clipped to the frame
+    x1 = max(0, min([box[0]] + [px for _, px, _ in placed]))
+    y1 = max(0, min([box[1]] + [py for _, _, py in placed]))
+    x2 = min(frame_w, max([box[2] + 1] + [px + img.width for img, px, _ in placed]))
+    y2 = min(frame_h, max([box[3] + 1] + [py + img.height for img, _, py in placed]))
+    canvas = Image.new("RGBA", (max(1, x2 - x1), max(1, y2 - y1)), (0, 0, 0, 0))
+    ImageDraw.Draw(canvas).rectangle([box[0] - x1, box[1] - y1, box[2] - x1, box[3] - y1], fill=(0, 0, 0, box_alpha))
+    for img, px, py in placed:
+        _paste(canvas, img, px - x1, py - y1)
+    return TextBlock(np.array(canvas), (x1, y1), spans, box)
+
+def wrap_text(txt, size, style="regular", max_width=1800):
+    """Greedy word wrap that keeps explicit newlines."""
+    lines = []
+    for raw_line in txt.split("\n"):
+        current = []
+        for word in raw_line.split(" "):
+            current.append(word)
+            if text_width(" ".join(current), size, style) > max_width:
+                current.pop()
+                if current:
+                    lines.append(" ".join(current))
+                current = [word]
+        if current:
+            lines.append(" ".join(current))
+    return lines
+
+# Block looks: font style, line padding, box padding, box alpha
+CAPTION_LOOK = {"style": "bold", "line_pad": 20, "box_padding": 20, "box_alpha": 100}
+PAGE_LOOK = {"style": "regular", "line_pad": 25, "box_padding": 40, "box_alpha": 140}
+
+def caption_block(txt, size=110, color="white") -> TextBlock:
+    """Bold, wrapped caption (titles, countdown digits, CTA, unsynced lyrics)."""
+    lines = wrap_text(txt, size, CAPTION_LOOK["style"])
+    return compose_block(lines, [color] * len(lines), size, **CAPTION_LOOK)
+
+def page_block(lines, fills, size=60) -> TextBlock:
+    """A page of lyric lines, each in its own colour."""
+    return compose_block(lines, fills, size, **PAGE_LOOK)
+
+def to_full_frame(block: TextBlock, frame=FRAME_SIZE) -> np.ndarray:
+    """The block pasted onto a transparent full-frame canvas (the old renderer's output shape)."""
+    out = np.zeros((frame[1], frame[0], 4), dtype=np.uint8)
+    x, y = block.origin
+    h, w = block.image.shape[:2]
+    out[y:y + h, x:x + w] = block.image
+    return out
+
+class WipeFrames:
+    """
+    Frame function for a karaoke wipe from `inactive` to `active` (same-size RGBA blocks).
+
+    The wipe position comes from a binary search over the word spans (a prefix
+    maximum of their end times reproduces the old first-match linear scan
+    exactly), and each frame only updates the columns that moved since the
+    previous frame, inside the rows where the two images actually differ (the
+    active line). The returned array is a reused buffer: callers must consume
+    it before asking for the next frame, as MoviePy's compositor does.
+    """
+
+    def __init__(self, inactive, active, x_start, x_end, duration, spans=None, channels=3):
+        self.inactive = inactive[:, :, :channels]
+        self.active = active[:, :, :channels]
+        self.buffer = self.inactive.copy()  # never alias the (possibly shared) source image
+        self.width = self.buffer.shape[1]
+        self.x_start, self.x_end, self.duration = x_start, x_end, duration
+        self.drawn = 0  # columns [0, drawn) currently show the active image
+
+        differs = np.nonzero(np.any(self.inactive != self.active, axis=(1, 2)))[0]
+        self.rows = slice(differs[0], differs[-1] + 1) if len(differs) else slice(0, 0)
+
+        spans = spans or []
+        self.starts = np.array([s["start"] for s in spans], dtype=np.float64)
+        self.ends = np.array([s["end"] for s in spans], dtype=np.float64)
+        self.xs0 = [s["x_start"] for s in spans]
+        self.xs1 = [s["x_end"] for s in spans]
+        # The scan stopped at the first span with t < start or start <= t <= end
+        self.stop_at = np.maximum.accumulate(np.maximum(self.ends, np.nextafter(self.starts, -np.inf))) if spans else None
+
+    def wipe_x(self, t):
+        if self.stop_at is None:
+            progress = min(1, t / self.duration) if self.duration > 0 else 1
+            return int(self.x_start + (self.x_end - self.x_start) * progress)
+        i = int(np.searchsorted(self.stop_at, t, side="left"))
+        if i == len(self.starts):
+            return int(self.xs1[-1])  # past the last word: hold the full wipe
+        start, end = self.starts[i], self.ends[i]
+        if t < start:
+            return int(self.xs0[i])  # silence before this word
+        if end - start > 0:
+            return int(self.xs0[i] + (self.xs1[i] - self.xs0[i]) * (t - start) / (end - start))
+        return int(self.xs1[i])
+
+    def __call__(self, t):
+        x = min(max(0, self.wipe_x(t)), self.width)
+        if x > self.drawn:
+            self.buffer[self.rows, self.drawn:x] = self.active[self.rows, self.drawn:x]
+        elif x < self.drawn:
+            self.buffer[self.rows, x:self.drawn] = self.inactive[self.rows, x:self.drawn]
+        self.drawn = x
+        return self.buffer
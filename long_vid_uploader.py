@@ -21,9 +21,12 @@ import time
 import shlex
 import tempfile
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Tuple, Dict, Optional, Callable
 from difflib import SequenceMatcher
 import story_picker
+from media_cache import file_fingerprint, atomic_write_json
 
 # --- Constants for optimization ---
 TEXT_SIMILARITY_THRESHOLD = 0.72
@@ -90,20 +93,19 @@ except Exception:
 # Utilities
 # =========================
 
+def _tool_path(name: str) -> str:
+    """Prefer a bundled ffmpeg.exe/ffprobe.exe next to this script over PATH."""
+    local = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}.exe")
+    return local if os.path.exists(local) else name
+
 def run(cmd: List[str], timeout: int = 7200, check: bool = False) -> subprocess.CompletedProcess:
     """Run a subprocess, capture stdout/stderr. Expects list command."""
     try:
         # cmd is expected to be a list already, no shlex.split here
         parts = cmd  # Already a list from calling sites
         # Prefer local ffmpeg/ffprobe binaries if present
-        if parts:
-            root = os.path.dirname(os.path.abspath(__file__))
-            local_ffmpeg = os.path.join(root, "ffmpeg.exe")
-            local_ffprobe = os.path.join(root, "ffprobe.exe")
-            if parts[0] == "ffmpeg" and os.path.exists(local_ffmpeg):
-                parts[0] = local_ffmpeg
-            elif parts[0] == "ffprobe" and os.path.exists(local_ffprobe):
-                parts[0] = local_ffprobe
+        if parts and parts[0] in ("ffmpeg", "ffprobe"):
+            parts[0] = _tool_path(parts[0])
         # Auto-inject -loglevel error for ffmpeg/ffprobe calls when not provided
         if parts and (os.path.basename(parts[0]).lower().startswith("ffmpeg") or os.path.basename(parts[0]).lower().startswith("ffprobe")) and "-loglevel" not in parts:
             parts = [parts[0], "-loglevel", "error"] + parts[1:]
@@ -213,11 +215,194 @@ def run_ffmpeg(cmd: str, output: str) -> bool:
         return False
     return True
 
-def trim_out(input_path: str, start: float, end: float, output_path: str, vf_extra: Optional[str] = None) -> bool:
+# =========================
+# Keyframe-aware smart trim (re-encode only the GOP edges, stream-copy the middle)
+# =========================
+
+SMART_TRIM_ENABLED = True
+SMART_TRIM_MIN_COPY_S = 4.0  # below this the copied middle isn't worth three extra passes
+SMART_TRIM_FPS = 60
+_X264_PROFILES = {"high": "high", "main": "main", "baseline": "baseline", "constrained baseline": "baseline"}
+# x264 settings of the PRO mezzanine. smart_trim encodes its head and tail with
+# the same ones so they carry the SPS/PPS of the stream-copied middle.
+MEZZ_X264_ARGS = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "ultrafast", "-crf", "23"]
+
+_KEYFRAME_MEMO: Dict[str, List[float]] = {}
+_KEYFRAME_LOCK = threading.Lock()
+
+def _keyframe_cache_dir() -> str:
+    base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keyframe_cache")
+    try:
+        os.makedirs(base, exist_ok=True)
+    except Exception:
+        pass
+    return base
+
+def index_keyframes(path: str) -> List[float]:
+    """
+    Sorted keyframe timestamps of the first video stream, read from packet flags
+    (demux only, no decode). Cached in memory and under keyframe_cache/ by content
+    fingerprint, so each source is indexed once.
+    """
+    try:
+        fingerprint = file_fingerprint(path)
+    except OSError:
+        return []
+    with _KEYFRAME_LOCK:
+        if fingerprint in _KEYFRAME_MEMO:
+            return _KEYFRAME_MEMO[fingerprint]
+    cache_fp = os.path.join(_keyframe_cache_dir(), f"{fingerprint}.json")
+    keyframes: Optional[List[float]] = None
+    try:
+        with open(cache_fp, "r", encoding="utf-8") as f:
+            keyframes = [float(t) for t in json.load(f)]
+    except Exception:
+        keyframes = None
+    if keyframes is None:
+        p = run([
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path
+        ])
+        keyframes = []
+        for line in (p.stdout or "").splitlines():
+            pts, _, flags = line.partition(",")
+            if "K" in flags:
+                try:
+                    keyframes.append(float(pts))
+                except ValueError:
+                    pass
+        keyframes.sort()
+        if keyframes:
+            try:
+                atomic_write_json(cache_fp, keyframes)
+            except Exception:
+                pass
+    with _KEYFRAME_LOCK:
+        _KEYFRAME_MEMO[fingerprint] = keyframes
+    return keyframes
+
+def probe_smart_trim_params(path: str) -> Optional[Dict]:
+    """
+    Container parameters of path if its video can be stream-copied into
+    trim_out's output unchanged (h264 yuv420p, even size, square pixels,
+    60 fps); else None.
+    """
+    p = run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "stream=codec_name,profile,level,pix_fmt,width,height,r_frame_rate,sample_aspect_ratio,time_base",
+        "-of", "json", path
+    ])
+    try:
+        st = (json.loads(p.stdout or "{}").get("streams") or [{}])[0]
+        num, _, den = str(st.get("r_frame_rate", "0/1")).partition("/")
+        fps = float(num) / float(den or 1)
+        width, height = int(st.get("width", 0)), int(st.get("height", 0))
+        timescale = int(str(st.get("time_base", "1/0")).partition("/")[2] or 0)
+    except Exception:
+        return None
+    profile = _X264_PROFILES.get(str(st.get("profile", "")).lower())
+    if (st.get("codec_name") != "h264" or st.get("pix_fmt") != "yuv420p" or not profile
+            or width % 2 or height % 2 or abs(fps - SMART_TRIM_FPS) > 0.01
+            or st.get("sample_aspect_ratio", "1:1") not in ("1:1", "0:1", "N/A")):
+        return None
+    return {"timescale": timescale}
+
+def probe_h264_extradata_hash(path: str) -> Optional[str]:
+    """Hash of the first video stream's avcC extradata (its SPS and PPS)."""
+    p = run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-show_data_hash", "sha256",
+        "-show_entries", "stream=extradata_hash", "-of", "csv=p=0", path
+    ])
+    return (p.stdout or "").strip() or None
+
+def smart_trim(input_path: str, start: float, end: float, output_path: str,
+               threads: Optional[int] = None, runner: Optional[Callable] = None) -> Optional[bool]:
+    """
+    Cut [start, end) re-encoding only the head up to the first keyframe and the
+    tail after the last one with the mezzanine's x264 settings; the middle is
+    stream-copied and the three pieces are joined by the concat demuxer. The
+    output has a single avcC, so the pieces must share their SPS/PPS: when the
+    source wasn't encoded with MEZZ_X264_ARGS the extradata differs and the cut
+    is abandoned. Audio is re-encoded over the whole range in the final mux
+    (cheap, and avoids AAC priming gaps at the joins). Returns None when the
+    range or source doesn't qualify, so the caller can fall back to a full
+    re-encode.
+    """
+    if not os.path.exists(input_path) or end - start < SMART_TRIM_MIN_COPY_S:
+        return None
+    params = probe_smart_trim_params(input_path)
+    if not params:
+        return None
+    keyframes = index_keyframes(input_path)
+    k1 = next((k for k in keyframes if k >= start), None)
+    k2 = next((k for k in reversed(keyframes) if k <= end), None)
+    if k1 is None or k2 is None or k2 - k1 < SMART_TRIM_MIN_COPY_S:
+        return None
+    runner = runner or run
+    frame = 1.0 / SMART_TRIM_FPS
+    work = tempfile.mkdtemp(prefix="smart_trim_")
+    enc = ["-vf", "format=yuv420p,setsar=1", "-r", str(SMART_TRIM_FPS)] + MEZZ_X264_ARGS
+    if params["timescale"]:
+        enc += ["-video_track_timescale", str(params["timescale"])]
+    if threads:
+        enc += ["-threads", str(threads)]
+    pieces: List[str] = []
+    try:
+        def edge(a: float, b: float, name: str):
+            if b - a < frame:
+                return
+            out = os.path.join(work, name)
+            runner(["ffmpeg", "-hide_banner", "-nostats", "-ss", f"{a:.6f}", "-i", input_path,
+                    "-t", f"{b - a:.6f}", "-an"] + enc + ["-y", out], check=True)
+            pieces.append(out)
+
+        edge(start, k1, "head.mp4")
+        mid = os.path.join(work, "mid.mp4")
+        mid_cmd = ["ffmpeg", "-hide_banner", "-nostats", "-ss", f"{k1:.6f}", "-i", input_path,
+                   "-t", f"{k2 - k1:.6f}", "-an", "-c:v", "copy", "-avoid_negative_ts", "make_zero"]
+        if params["timescale"]:
+            mid_cmd += ["-video_track_timescale", str(params["timescale"])]
+        runner(mid_cmd + ["-y", mid], check=True)
+        pieces.append(mid)
+        edge(k2, end, "tail.mp4")
+        parameter_sets = {probe_h264_extradata_hash(piece) for piece in pieces}
+        if len(parameter_sets) != 1 or None in parameter_sets:
+            print("[DEBUG] smart_trim: re-encoded edges don't match the source's SPS/PPS, using a full re-encode")
+            return None
+
+        list_file = os.path.join(work, "pieces.txt")
+        with open(list_file, "w", encoding="utf-8") as f:
+            for piece in pieces:
+                f.write(f"file '{path_for_filter(piece)}'\n")
+        video_only = os.path.join(work, "video.mp4")
+        runner(["ffmpeg", "-hide_banner", "-nostats", "-f", "concat", "-safe", "0", "-i", list_file,
+                "-c", "copy", "-y", video_only], check=True)
+        cmd = ["ffmpeg", "-hide_banner", "-nostats", "-i", video_only,
+               "-ss", f"{start:.3f}", "-to", f"{end:.3f}", "-i", input_path,
+               "-map", "0:v:0", "-map", "1:a:0?", "-c:v", "copy",
+               "-c:a", "aac", "-b:a", "320k", "-ar", "48000", "-af", "aresample=async=1000",
+               "-shortest", "-movflags", "+faststart", "-y", output_path]
+        runner(cmd, check=True)
+        ok = os.path.exists(output_path) and os.path.getsize(output_path) > 0
+        if ok:
+            print(f"[DEBUG] smart_trim: copied {k2 - k1:.1f}s of {end - start:.1f}s, re-encoded {(k1 - start) + (end - k2):.2f}s")
+        return ok or None
+    except Exception as e:
+        print(f"[WARN] smart_trim failed, falling back to full re-encode: {e}")
+        return None
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+def trim_out(input_path: str, start: float, end: float, output_path: str, vf_extra: Optional[str] = None,
+             threads: Optional[int] = None, runner: Optional[Callable] = None, smart: bool = True) -> bool:
     dur = max(0.0, end - start)
     # Reduced minimum duration from 0.05 to 0.01 to preserve more content
     if dur <= 0.01:
         return False
+    # Without extra filters the GOP-aligned middle can be stream-copied
+    if smart and SMART_TRIM_ENABLED and not vf_extra:
+        if smart_trim(input_path, start, end, output_path, threads=threads, runner=runner):
+            return True
     vf_base = "format=yuv420p,setsar=1,scale=trunc(iw/2)*2:trunc(ih/2)*2"
     vf_final = f"{vf_base},{vf_extra}" if vf_extra else vf_base
     cmd = [
@@ -230,7 +415,9 @@ def trim_out(input_path: str, start: float, end: float, output_path: str, vf_ext
         "-movflags", "+faststart",
         "-y", output_path
     ]
-    run(cmd, check=True)
+    if threads:
+        cmd[-2:-2] = ["-threads", str(threads)]
+    (runner or run)(cmd, check=True)
     return os.path.exists(output_path) and os.path.getsize(output_path) > 0
 
 def concat_hard_cut(a_path: str, b_path: str, out_path: str) -> bool:
@@ -3987,28 +4174,284 @@ def detect_scene_scores(path: str) -> List[Tuple[float, float]]:
     return scores
 
 # =========================
-# Whisper transcription + scoring (attempt to use faster_whisper if installed)
+# Whisper model pool (one warm model per size/device/compute_type, shared by all passes)
 # =========================
 
-def transcribe_segments(input_path: str, model_size: str = "small") -> List[Dict]:
+WHISPER_IDLE_EVICT_S = 600.0  # drop a model after 10 minutes without use
+WHISPER_REAPER_INTERVAL_S = 60.0
+
+def _process_rss_mb() -> float:
+    """Resident memory of this process in MB (0.0 when it can't be measured)."""
     try:
+        import psutil  # type: ignore
+        return psutil.Process(os.getpid()).memory_info().rss / (1024.0 * 1024.0)
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+    except Exception:
+        return 0.0
+
+class WhisperModelPool:
+    """
+    Thread-safe, process-wide cache of faster_whisper models keyed by
+    (model_size, device, compute_type). Models are loaded lazily on first use,
+    evicted after `idle_timeout` seconds without use, and each load reports
+    its wall time and the RSS growth it caused.
+    """
+
+    def __init__(self, idle_timeout: float = WHISPER_IDLE_EVICT_S):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str, str], Dict] = {}
+        self._reaper: Optional[threading.Thread] = None
+
+    def _entry(self, key: Tuple[str, str, str]) -> Dict:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "model": None, "lock": threading.RLock(), "last_used": time.time(),
+                    "load_s": 0.0, "rss_mb": 0.0, "uses": 0, "in_use": 0,
+                }
+                self._entries[key] = entry
+            entry["in_use"] += 1
+            return entry
+
+    def _release(self, entry: Dict):
+        with self._lock:
+            entry["in_use"] -= 1
+            entry["last_used"] = time.time()
+
+    def _load(self, key: Tuple[str, str, str], entry: Dict):
         from faster_whisper import WhisperModel  # type: ignore
+        model_size, device, compute_type = key
+        rss_before = _process_rss_mb()
+        t0 = time.time()
+        entry["model"] = WhisperModel(model_size, device=device, compute_type=compute_type)
+        entry["load_s"] = time.time() - t0
+        entry["rss_mb"] = max(0.0, _process_rss_mb() - rss_before)
+        print(f"[WHISPER] Loaded {model_size} ({device}/{compute_type}) in {entry['load_s']:.1f}s, ~{entry['rss_mb']:.0f} MB")
+        self._ensure_reaper()
+
+    def transcribe(self, input_path: str, model_size: str = "small", device: str = "cpu",
+                   compute_type: str = "auto", **kwargs) -> Tuple[list, object]:
+        """
+        Transcribe with the pooled model for this key, loading it if needed.
+        faster_whisper yields segments lazily, so they are drained while the
+        model lock is held; concurrent callers of the same model are serialized.
+        """
+        key = (model_size, device, compute_type)
+        entry = self._entry(key)
+        try:
+            with entry["lock"]:
+                if entry["model"] is None:
+                    self._load(key, entry)
+                entry["uses"] += 1
+                segments, info = entry["model"].transcribe(input_path, **kwargs)
+                return list(segments), info
+        finally:
+            self._release(entry)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop models unused for longer than idle_timeout. Returns how many were evicted."""
+        now = time.time() if now is None else now
+        evicted = 0
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["in_use"] == 0 and now - entry["last_used"] >= self.idle_timeout:
+                    if entry["model"] is not None:
+                        print(f"[WHISPER] Evicting idle model {key[0]} ({key[1]}/{key[2]}) after {entry['uses']} uses")
+                        evicted += 1
+                    del self._entries[key]
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries = {k: e for k, e in self._entries.items() if e["in_use"] > 0}
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {"model_size": k[0], "device": k[1], "compute_type": k[2], "loaded": e["model"] is not None,
+                 "load_s": round(e["load_s"], 2), "rss_mb": round(e["rss_mb"], 1), "uses": e["uses"]}
+                for k, e in self._entries.items()
+            ]
+
+    def _ensure_reaper(self):
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="whisper-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(min(WHISPER_REAPER_INTERVAL_S, self.idle_timeout))
+            self.evict_idle()
+            with self._lock:
+                if not self._entries:
+                    self._reaper = None
+                    return
+
+_WHISPER_POOL = WhisperModelPool()
+
+def get_whisper_pool() -> WhisperModelPool:
+    return _WHISPER_POOL
+
+# =========================
+# Transcript store (content-addressed, word-level, served for any sub-range)
+# =========================
+
+def _transcript_cache_dir() -> str:
+    base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcript_cache")
+    try:
+        os.makedirs(base, exist_ok=True)
     except Exception:
-        return []
-    device = "cpu"
-    compute_type = "auto"
+        pass
+    return base
+
+def slice_transcript(segments: List[Dict], start: float, end: float) -> List[Dict]:
+    """Segments overlapping [start, end], with word lists trimmed to that window."""
+    out: List[Dict] = []
+    for seg in segments:
+        if seg["end"] < start or seg["start"] > end:
+            continue
+        s = dict(seg)
+        if seg.get("words"):
+            s["words"] = [w for w in seg["words"] if w["end"] >= start and w["start"] <= end]
+        out.append(s)
+    return out
+
+class TranscriptStore:
+    """
+    On-disk transcript cache. One JSON file per (fingerprint, model) records the
+    language, the time ranges that were transcribed and their word-level segments,
+    so any sub-range of a covered range is answered without running Whisper.
+    A lookup without a language accepts whatever was cached; a lookup for a given
+    language also accepts an auto-detected transcript that came out in it.
+    Loaded files are also kept in memory for the rest of the process.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or _transcript_cache_dir()
+        self._lock = threading.Lock()
+        self._mem: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, fingerprint: str, model_size: str) -> str:
+        key = hashlib.sha1(f"{fingerprint}|{model_size}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, fp_path: str) -> Optional[Dict]:
+        with self._lock:
+            if fp_path in self._mem:
+                return self._mem[fp_path]
+        try:
+            with open(fp_path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+        except Exception:
+            return None
+        with self._lock:
+            self._mem[fp_path] = doc
+        return doc
+
+    def lookup(self, path: str, model_size: str = "small", language: Optional[str] = None,
+               start: float = 0.0, end: Optional[float] = None) -> Optional[List[Dict]]:
+        """Cached segments for [start, end] (end=None means to the end of the file), or None on a miss."""
+        segments = self._find(path, model_size, language, start, end)
+        with self._lock:
+            if segments is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return segments
+
+    def _find(self, path: str, model_size: str, language: Optional[str],
+              start: float, end: Optional[float]) -> Optional[List[Dict]]:
+        try:
+            doc = self._load(self._path(file_fingerprint(path), model_size))
+        except OSError:
+            return None
+        if not doc:
+            return None
+        if language and language not in (doc.get("language"), doc.get("detected_language")):
+            return None
+        for a, b in doc.get("ranges", []):
+            full = b is None
+            if a <= start and (full or (end is not None and end <= b)):
+                return slice_transcript(doc["segments"], start, float("inf") if end is None else end)
+        return None
+
+    def store(self, path: str, segments: List[Dict], model_size: str = "small", language: Optional[str] = None,
+              start: float = 0.0, end: Optional[float] = None, detected_language: Optional[str] = None):
+        fingerprint = file_fingerprint(path)
+        fp_path = self._path(fingerprint, model_size)
+        doc = self._load(fp_path)
+        if not doc or doc.get("language") != language:
+            doc = {"fingerprint": fingerprint, "model": model_size, "language": language,
+                   "detected_language": detected_language, "ranges": [], "segments": []}
+        if end is None:
+            # A whole-file transcript supersedes any partial ranges
+            doc["ranges"] = [[start, None]]
+            doc["segments"] = segments
+        else:
+            doc["ranges"].append([start, end])
+            kept = [s for s in doc["segments"] if s["end"] <= start or s["start"] >= end]
+            doc["segments"] = sorted(kept + segments, key=lambda s: s["start"])
+        try:
+            atomic_write_json(fp_path, doc)
+        except Exception as e:
+            print(f"[WARN] Could not persist transcript cache: {e}")
+        with self._lock:
+            self._mem[fp_path] = doc
+
+_TRANSCRIPT_STORE = TranscriptStore()
+
+def get_transcript_store() -> TranscriptStore:
+    return _TRANSCRIPT_STORE
+
+# =========================
+# Whisper transcription + scoring (attempt to use faster_whisper if installed)
+# =========================
+
+def transcribe_segments(input_path: str, model_size: str = "small", language: Optional[str] = None,
+                        start: float = 0.0, end: Optional[float] = None) -> List[Dict]:
+    """
+    Word-level transcript of input_path restricted to [start, end]. Served from the
+    transcript store when this file has been transcribed before; otherwise the whole
+    file is transcribed once with the pooled model and cached for every later pass.
+    """
+    cached = _TRANSCRIPT_STORE.lookup(input_path, model_size, language, start, end)
+    if cached is not None:
+        return cached
     try:
-        model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        import faster_whisper  # type: ignore  # noqa: F401
     except Exception:
         return []
+    device = "cpu"
+    compute_type = "auto"
     try:
-        segments, _ = model.transcribe(input_path, beam_size=5)
+        segments, info = _WHISPER_POOL.transcribe(input_path, model_size=model_size, device=device,
+                                                  compute_type=compute_type, beam_size=5, language=language,
+                                                  word_timestamps=True)
     except Exception:
         return []
     out: List[Dict] = []
     for s in segments:
-        out.append({"start": float(getattr(s, "start", 0.0)), "end": float(getattr(s, "end", 0.0)), "text": (getattr(s, "text", "") or "").strip()})
-    return out
+        words = [
+            {"start": float(getattr(w, "start", 0.0)), "end": float(getattr(w, "end", 0.0)),
+             "word": (getattr(w, "word", "") or "").strip(), "probability": float(getattr(w, "probability", 0.0))}
+            for w in (getattr(s, "words", None) or [])
+        ]
+        out.append({"start": float(getattr(s, "start", 0.0)), "end": float(getattr(s, "end", 0.0)),
+                    "text": (getattr(s, "text", "") or "").strip(), "words": words})
+    _TRANSCRIPT_STORE.store(input_path, out, model_size, language,
+                            detected_language=getattr(info, "language", None))
+    return slice_transcript(out, start, float("inf") if end is None else end)
 
 def find_phrase_boundaries(text: str) -> List[int]:
     """
@@ -4476,8 +4919,333 @@ def frame_phash(video_path: str, t: float = 1.0) -> Optional[str]:
         except Exception:
             pass
 
+# =========================
+# Single-pass media analysis (per-second time series; the scorers below become window lookups)
+# =========================
+
+ANALYSIS_VERSION = 1
+ANALYSIS_FPS = 4
+ANALYSIS_FRAME_W = 160
+ANALYSIS_FRAME_H = 90
+ANALYSIS_AUDIO_SR = 16000
+ANALYSIS_FFT_SIZE = 512
+SCENE_CHANGE_THRESHOLD = 0.3
+SILENCE_FLOOR_DB = -70.0
+
+_MEDIA_ANALYSIS_MEMO: Dict[str, "MediaAnalysis"] = {}
+_MEDIA_ANALYSIS_LOCK = threading.Lock()
+
+def _analysis_cache_dir() -> str:
+    base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analysis_cache")
+    try:
+        os.makedirs(base, exist_ok=True)
+    except Exception:
+        pass
+    return base
+
+class MediaAnalysis:
+    """
+    Per-second time series for one media file, produced by a single decode:
+    loudness_db, flatness (spectral flatness), luma, contrast (luma std),
+    saturation, scene (max scene-change score), scene_events (frames over
+    SCENE_CHANGE_THRESHOLD) and motion (mean absolute frame difference).
+    Prefix sums make every window mean/std/total O(1), so each scorer costs
+    the same regardless of window length or candidate count.
+    """
+
+    AUDIO_SERIES = ("loudness_db", "flatness")
+    VIDEO_SERIES = ("luma", "contrast", "saturation", "scene", "scene_events", "motion")
+
+    def __init__(self, series: Dict, probe: Dict):
+        import numpy as np
+        self.series = {k: np.asarray(v, dtype=np.float32) for k, v in series.items()}
+        self.probe = dict(probe or {})
+        self._csum = {k: np.concatenate(([0.0], np.cumsum(v, dtype=np.float64))) for k, v in self.series.items()}
+        self._csum_sq = {k: np.concatenate(([0.0], np.cumsum(np.square(v, dtype=np.float64)))) for k, v in self.series.items()}
+
+    def _bounds(self, name: str, a: float, b: float) -> Tuple[int, int]:
+        n = len(self.series.get(name, ()))
+        i = min(max(int(a), 0), n)
+        j = min(max(int(b + 0.999), i + 1), n)
+        return min(i, max(0, j - 1)), j
+
+    def total(self, name: str, a: float, b: float) -> float:
+        i, j = self._bounds(name, a, b)
+        if j <= i:
+            return 0.0
+        return float(self._csum[name][j] - self._csum[name][i])
+
+    def mean(self, name: str, a: float, b: float, default: float = 0.0) -> float:
+        i, j = self._bounds(name, a, b)
+        if j <= i:
+            return default
+        return float((self._csum[name][j] - self._csum[name][i]) / (j - i))
+
+    def std(self, name: str, a: float, b: float) -> float:
+        i, j = self._bounds(name, a, b)
+        if j <= i:
+            return 0.0
+        m = (self._csum[name][j] - self._csum[name][i]) / (j - i)
+        m2 = (self._csum_sq[name][j] - self._csum_sq[name][i]) / (j - i)
+        return float(max(0.0, m2 - m * m) ** 0.5)
+
+    # --- scorers (same bands as the per-window ffmpeg versions) ---
+
+    def audio_quality(self, a: float, b: float) -> float:
+        if not len(self.series.get("loudness_db", ())):
+            return 0.5
+        loudness = self.mean("loudness_db", a, b, SILENCE_FLOOR_DB)
+        if -16 <= loudness <= -12:
+            loudness_score = 1.0
+        elif -20 <= loudness <= -8:
+            loudness_score = 0.8
+        else:
+            loudness_score = 0.4
+        # Loudness range estimate: ~p10..p95 spread of the short-term loudness
+        lra = 2.9 * self.std("loudness_db", a, b)
+        if 8 <= lra <= 15:
+            dynamic_range_score = 1.0
+        elif 5 <= lra <= 20:
+            dynamic_range_score = 0.7
+        else:
+            dynamic_range_score = 0.4
+        # Speech and music are tonal (low flatness); broadband noise is flat
+        flatness = self.mean("flatness", a, b, 0.5)
+        if flatness < 0.2:
+            clarity_score = 1.0
+        elif flatness < 0.4:
+            clarity_score = 0.7
+        else:
+            clarity_score = 0.4
+        return (loudness_score + dynamic_range_score + clarity_score) / 3.0
+
+    def motion_appeal(self, a: float, b: float) -> float:
+        if not len(self.series.get("scene_events", ())):
+            return 0.5
+        duration = b - a
+        if duration > 0:
+            changes_per_second = self.total("scene_events", a, b) / duration
+            if 0.1 <= changes_per_second <= 0.5:
+                return 1.0
+            elif 0.05 <= changes_per_second <= 0.8:
+                return 0.7
+            elif changes_per_second > 0:
+                return 0.5
+        return 0.3
+
+    def visual_appeal(self, a: float, b: float) -> float:
+        if not len(self.series.get("luma", ())):
+            return 0.5
+        yavg = self.mean("luma", a, b, 0.5)
+        if 0.35 <= yavg <= 0.65:
+            brightness_score = 1.0
+        elif 0.25 <= yavg <= 0.75:
+            brightness_score = 0.8
+        elif 0.15 <= yavg <= 0.85:
+            brightness_score = 0.6
+        else:
+            brightness_score = 0.3
+        contrast = self.mean("contrast", a, b)
+        if contrast > 0.15:
+            contrast_score = 1.0
+        elif contrast > 0.08:
+            contrast_score = 0.8
+        elif contrast > 0.04:
+            contrast_score = 0.6
+        else:
+            contrast_score = 0.3
+        chroma = self.mean("saturation", a, b)
+        if chroma > 0.1:
+            saturation_score = 1.0
+        elif chroma > 0.05:
+            saturation_score = 0.7
+        else:
+            saturation_score = 0.4
+        base_score = brightness_score * 0.4 + contrast_score * 0.4 + saturation_score * 0.2
+        return min(1.0, base_score * 0.8 + self.motion_appeal(a, b) * 0.2)
+
+    def technical_quality(self) -> float:
+        width = int(self.probe.get("width", 0) or 0)
+        height = int(self.probe.get("height", 0) or 0)
+        frame_rate = float(self.probe.get("fps", 0.0) or 0.0)
+        if not (width and height):
+            return 0.5
+        if width >= 1920 and height >= 1080:
+            resolution_score = 1.0
+        elif width >= 1280 and height >= 720:
+            resolution_score = 0.8
+        elif width >= 854 and height >= 480:
+            resolution_score = 0.6
+        else:
+            resolution_score = 0.3
+        if frame_rate >= 30:
+            framerate_score = 1.0
+        elif frame_rate >= 24:
+            framerate_score = 0.8
+        elif frame_rate >= 15:
+            framerate_score = 0.6
+        else:
+            framerate_score = 0.4
+        return (resolution_score + framerate_score) / 2.0
+
+    # --- persistence ---
+
+    def save(self, path: str):
+        import numpy as np
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp.npz"
+        np.savez(tmp, _probe=np.array(json.dumps(self.probe)), **self.series)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MediaAnalysis":
+        import numpy as np
+        with np.load(path, allow_pickle=False) as z:
+            probe = json.loads(str(z["_probe"]))
+            series = {k: z[k] for k in z.files if k != "_probe"}
+        return cls(series, probe)
+
+def _probe_video_props(path: str) -> Dict:
+    p = run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,r_frame_rate", "-of", "json", path
+    ])
+    try:
+        st = (json.loads(p.stdout or "{}").get("streams") or [{}])[0]
+        num, _, den = str(st.get("r_frame_rate", "0/1")).partition("/")
+        fps = float(num) / float(den or 1) if float(den or 1) else 0.0
+        return {"width": int(st.get("width", 0)), "height": int(st.get("height", 0)), "fps": fps}
+    except Exception:
+        return {}
+
+def _audio_series(pcm, sr: int = ANALYSIS_AUDIO_SR) -> Dict:
+    """Per-second loudness (dBFS RMS) and mean spectral flatness from mono float PCM."""
+    import numpy as np
+    seconds = len(pcm) // sr
+    if seconds <= 0:
+        return {"loudness_db": np.zeros(0, np.float32), "flatness": np.zeros(0, np.float32)}
+    x = pcm[:seconds * sr].reshape(seconds, sr)
+    ms = np.mean(np.square(x, dtype=np.float64), axis=1)
+    loudness = np.maximum(10.0 * np.log10(ms + 1e-12), SILENCE_FLOOR_DB)
+    frames_per_s = sr // ANALYSIS_FFT_SIZE
+    fr = x[:, :frames_per_s * ANALYSIS_FFT_SIZE].reshape(seconds, frames_per_s, ANALYSIS_FFT_SIZE)
+    power = np.square(np.abs(np.fft.rfft(fr * np.hanning(ANALYSIS_FFT_SIZE), axis=2))) + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=2)) / np.mean(power, axis=2)
+    return {"loudness_db": loudness.astype(np.float32), "flatness": flatness.mean(axis=1).astype(np.float32)}
+
+def _video_second_stats(frames, prev_y, prev_hist) -> Tuple[Dict, object, object]:
+    """Stats for one second of yuv444p frames shaped (n, 3, H, W) in uint8."""
+    import numpy as np
+    y = frames[:, 0].astype(np.float32) / 255.0
+    u = frames[:, 1].astype(np.float32) - 128.0
+    v = frames[:, 2].astype(np.float32) - 128.0
+    hists = np.stack([np.histogram(f, bins=32, range=(0.0, 1.0))[0] for f in y]).astype(np.float32)
+    hists /= max(1.0, float(y[0].size))
+    prev_ys = np.concatenate((prev_y[None], y[:-1])) if prev_y is not None else np.concatenate((y[:1], y[:-1]))
+    prev_hs = np.concatenate((prev_hist[None], hists[:-1])) if prev_hist is not None else np.concatenate((hists[:1], hists[:-1]))
+    motion = np.mean(np.abs(y - prev_ys), axis=(1, 2))
+    scene = 0.5 * np.sum(np.abs(hists - prev_hs), axis=1)
+    stats = {
+        "luma": float(y.mean()),
+        "contrast": float(y.std(axis=(1, 2)).mean()),
+        "saturation": float((np.sqrt(u * u + v * v).mean(axis=(1, 2)) / 128.0).mean()),
+        "scene": float(scene.max()),
+        "scene_events": float(np.count_nonzero(scene > SCENE_CHANGE_THRESHOLD)),
+        "motion": float(motion.mean()),
+    }
+    return stats, y[-1], hists[-1]
+
+def build_media_analysis(video_path: str) -> Optional[MediaAnalysis]:
+    """
+    Decode video_path once: ffmpeg writes downscaled yuv444p frames at
+    ANALYSIS_FPS to stdout and 16 kHz mono PCM to a temp file in the same
+    process, and both are reduced to per-second series with numpy.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    if not os.path.exists(video_path):
+        return None
+    has_audio = has_audio_stream(video_path)
+    pcm_path = tempfile.mktemp(suffix=".f32")
+    cmd = [_tool_path("ffmpeg"), "-hide_banner", "-nostats", "-loglevel", "error", "-i", video_path,
+           "-map", "0:v:0", "-vf", f"fps={ANALYSIS_FPS},scale={ANALYSIS_FRAME_W}:{ANALYSIS_FRAME_H},format=yuv444p",
+           "-f", "rawvideo", "pipe:1"]
+    if has_audio:
+        cmd += ["-map", "0:a:0", "-ac", "1", "-ar", str(ANALYSIS_AUDIO_SR), "-f", "f32le", "-y", pcm_path]
+    frame_bytes = ANALYSIS_FRAME_W * ANALYSIS_FRAME_H * 3
+    chunk_bytes = frame_bytes * ANALYSIS_FPS
+    video: Dict[str, List[float]] = {k: [] for k in MediaAnalysis.VIDEO_SERIES}
+    t0 = time.time()
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        prev_y = prev_hist = None
+        while True:
+            buf = proc.stdout.read(chunk_bytes)
+            n = len(buf) // frame_bytes
+            if n == 0:
+                break
+            frames = np.frombuffer(buf[:n * frame_bytes], dtype=np.uint8).reshape(n, 3, ANALYSIS_FRAME_H, ANALYSIS_FRAME_W)
+            stats, prev_y, prev_hist = _video_second_stats(frames, prev_y, prev_hist)
+            for k, val in stats.items():
+                video[k].append(val)
+        proc.stdout.close()
+        if proc.wait() != 0 and not video["luma"]:
+            return None
+        series: Dict = {k: np.asarray(v, dtype=np.float32) for k, v in video.items()}
+        pcm = np.fromfile(pcm_path, dtype=np.float32) if has_audio and os.path.exists(pcm_path) else np.zeros(0, np.float32)
+        series.update(_audio_series(pcm))
+    except Exception as e:
+        print(f"[WARN] Media analysis failed for {video_path}: {e}")
+        return None
+    finally:
+        try:
+            if os.path.exists(pcm_path):
+                os.remove(pcm_path)
+        except OSError:
+            pass
+    analysis = MediaAnalysis(series, _probe_video_props(video_path))
+    print(f"[INFO] Media analysis: {len(series['luma'])}s of video analysed in one pass ({time.time() - t0:.1f}s)")
+    return analysis
+
+def get_media_analysis(video_path: str, build: bool = True) -> Optional[MediaAnalysis]:
+    """
+    Memoised MediaAnalysis for video_path, keyed by its content fingerprint and
+    persisted under analysis_cache/. With build=False only existing analyses are
+    returned, so cheap one-off callers never trigger a full decode.
+    """
+    try:
+        fingerprint = file_fingerprint(video_path)
+    except OSError:
+        return None
+    with _MEDIA_ANALYSIS_LOCK:
+        cached = _MEDIA_ANALYSIS_MEMO.get(fingerprint)
+    if cached is not None:
+        return cached
+    cache_fp = os.path.join(_analysis_cache_dir(), f"{fingerprint}_v{ANALYSIS_VERSION}.npz")
+    analysis = None
+    if os.path.exists(cache_fp):
+        try:
+            analysis = MediaAnalysis.load(cache_fp)
+        except Exception:
+            analysis = None
+    if analysis is None and build:
+        analysis = build_media_analysis(video_path)
+        if analysis is not None:
+            try:
+                analysis.save(cache_fp)
+            except Exception as e:
+                print(f"[WARN] Could not persist media analysis: {e}")
+    if analysis is not None:
+        with _MEDIA_ANALYSIS_LOCK:
+            _MEDIA_ANALYSIS_MEMO[fingerprint] = analysis
+    return analysis
+
 def analyze_audio_quality(video_path: str, start_time: float, end_time: float) -> float:
     """Analyze audio quality of a segment (loudness, clarity, noise level)."""
+    analysis = get_media_analysis(video_path, build=False)
+    if analysis is not None:
+        return analysis.audio_quality(start_time, end_time)
     try:
         # Extract audio segment and analyze
         temp_audio = tempfile.mktemp(suffix=".wav")
@@ -4542,6 +5310,9 @@ def analyze_audio_quality(video_path: str, start_time: float, end_time: float) -
 
 def analyze_visual_appeal(video_path: str, start_time: float, end_time: float) -> float:
     """Enhanced visual appeal analysis with motion detection, color analysis, and composition scoring."""
+    analysis = get_media_analysis(video_path, build=False)
+    if analysis is not None:
+        return analysis.visual_appeal(start_time, end_time)
     try:
         # Extract multiple frames for better analysis
         segment_duration = end_time - start_time
@@ -4565,7 +5336,7 @@ def analyze_visual_appeal(video_path: str, start_time: float, end_time: float) -
                 "-ss", str(frame_time), "-i", video_path,
                 "-frames:v", "1", "-q:v", "2", temp_frame
             ]
-            self.run_tracked_subprocess(cmd, check=True)
+            run(cmd, check=True)
             
             if not os.path.exists(temp_frame):
                 continue
@@ -4650,6 +5421,9 @@ def analyze_visual_appeal(video_path: str, start_time: float, end_time: float) -
 
 def analyze_motion_appeal(video_path: str, start_time: float, end_time: float) -> float:
     """Analyze motion and scene changes for visual appeal."""
+    analysis = get_media_analysis(video_path, build=False)
+    if analysis is not None:
+        return analysis.motion_appeal(start_time, end_time)
     try:
         # Use scene detection to measure visual dynamics
         cmd = [
@@ -4721,6 +5495,9 @@ def analyze_speech_content(text: str, duration: float) -> float:
 
 def analyze_technical_quality(video_path: str, start_time: float, end_time: float) -> float:
     """Analyze technical quality (resolution, frame rate, compression)."""
+    analysis = get_media_analysis(video_path, build=False)
+    if analysis is not None and analysis.probe:
+        return analysis.technical_quality()
     try:
         # Get video properties
         cmd = [
@@ -4780,6 +5557,8 @@ def calculate_ai_content_score(video_path: str, start_time: float, end_time: flo
                              text: str, base_score: float = 0.0) -> Dict:
     """Calculate comprehensive AI-driven content score for a video segment."""
     duration = end_time - start_time
+    # One decode per file; the analyze_* calls below are then window lookups
+    get_media_analysis(video_path)
     
     # Analyze different aspects
     audio_quality = analyze_audio_quality(video_path, start_time, end_time)
@@ -6210,6 +6989,116 @@ def optimize_filter_chain(filters: List[str]) -> List[str]:
     
     return optimized
 
+# =========================
+# Parallel part rendering
+# =========================
+
+RENDER_THREADS_PER_ENCODE = 4  # libx264 threads per part encode when running several side by side
+
+def plan_render_workers(job_count: int, requested_workers: int = 0, cpu_count: Optional[int] = None,
+                        threads_per_encode: int = RENDER_THREADS_PER_ENCODE) -> Tuple[int, int]:
+    """
+    (workers, threads per encode) for job_count part renders: one worker per
+    threads_per_encode cores, never more than the job count, and the cores are
+    then split evenly so workers x threads matches the machine.
+    """
+    cpus = cpu_count or os.cpu_count() or 1
+    workers = requested_workers or cpus // max(1, threads_per_encode)
+    workers = max(1, min(job_count, workers, cpus))
+    return workers, max(1, cpus // workers)
+
+# =========================
+# Single-pass timeline renderer (whole part list + transitions in one filter graph)
+# =========================
+
+TIMELINE_FPS = 60
+TIMELINE_MAX_PARTS_PER_GRAPH = 24  # keep graphs (and open decoders) bounded on long timelines
+TIMELINE_XFADE_ALIASES = {"crossfade": "fade", "fadeblack": "fade"}
+
+def timeline_transition_duration(dur_a: float, dur_b: float) -> float:
+    """Same rule as quick_crossfade: 0.8s or 15% of the shorter clip."""
+    return min(0.8, min(dur_a, dur_b) * 0.15)
+
+def build_timeline_filter_graph(durations: List[float], joins: List[str], has_audio: List[bool],
+                                width: int = 1920, height: int = 1080, fps: int = TIMELINE_FPS) -> Tuple[str, float]:
+    """
+    Compile an ordered part list into one filter_complex.
+    joins[i] (i >= 1) is how part i-1 meets part i: "cut" or an xfade transition name.
+    Runs of hard cuts become a single concat node; each transition becomes an
+    xfade/acrossfade pair whose offset comes from the known part durations.
+    Parts without audio get silence of the right length. Returns (graph, output duration).
+    """
+    fc: List[str] = []
+    n = len(durations)
+    for i in range(n):
+        fc.append(
+            f"[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format=yuv420p,settb=AVTB[v{i}]"
+        )
+        if has_audio[i]:
+            fc.append(f"[{i}:a]aresample=48000,aformat=sample_fmts=fltp:channel_layouts=stereo,asetpts=PTS-STARTPTS[a{i}]")
+        else:
+            fc.append(f"anullsrc=r=48000:cl=stereo,atrim=duration={durations[i]:.3f}[a{i}]")
+
+    node = 0
+    pend_v, pend_a = ["[v0]"], ["[a0]"]
+    total = durations[0]
+
+    def flush() -> Tuple[str, str]:
+        nonlocal node
+        if len(pend_v) == 1:
+            return pend_v[0], pend_a[0]
+        node += 1
+        fc.append(f"{''.join(pend_v)}concat=n={len(pend_v)}:v=1:a=0[cv{node}]")
+        fc.append(f"{''.join(pend_a)}concat=n={len(pend_a)}:v=0:a=1[ca{node}]")
+        return f"[cv{node}]", f"[ca{node}]"
+
+    for i in range(1, n):
+        kind = TIMELINE_XFADE_ALIASES.get(joins[i], joins[i])
+        if kind == "cut":
+            pend_v.append(f"[v{i}]")
+            pend_a.append(f"[a{i}]")
+            total += durations[i]
+            continue
+        v, a = flush()
+        td = timeline_transition_duration(durations[i - 1], durations[i])
+        node += 1
+        fc.append(f"{v}[v{i}]xfade=transition={kind}:duration={td:.3f}:offset={max(0.0, total - td):.3f}[xv{node}]")
+        fc.append(f"{a}[a{i}]acrossfade=d={td:.3f}:curve1=tri:curve2=tri[xa{node}]")
+        pend_v, pend_a = [f"[xv{node}]"], [f"[xa{node}]"]
+        total += durations[i] - td
+
+    v, a = flush()
+    fc.append(f"{v}null[vout]")
+    fc.append(f"{a}anull[aout]")
+    return ";".join(fc), total
+
+def plan_timeline_chunks(joins: List[str], max_parts: int = TIMELINE_MAX_PARTS_PER_GRAPH) -> List[Tuple[int, int]]:
+    """
+    Split parts [0, len(joins)) into [start, end) chunks of at most max_parts,
+    preferring to break where the join is a hard cut so no transition is lost.
+    """
+    n = len(joins)
+    chunks: List[Tuple[int, int]] = []
+    start = 0
+    while start < n:
+        end = min(n, start + max_parts)
+        if end < n and joins[end] != "cut":
+            end = next((k for k in range(end - 1, start, -1) if joins[k] == "cut"), end)
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+def incremental_fold_encode_seconds(durations: List[float], joins: List[str]) -> float:
+    """Media seconds the fold-into-accumulator path re-encodes (it re-encodes the whole prefix at every step)."""
+    acc = durations[0] if durations else 0.0
+    work = 0.0
+    for i in range(1, len(durations)):
+        kind = TIMELINE_XFADE_ALIASES.get(joins[i], joins[i])
+        acc += durations[i] - (0.0 if kind == "cut" else timeline_transition_duration(durations[i - 1], durations[i]))
+        work += acc
+    return work
+
 class ProcessorThread(QThread):
     progress = pyqtSignal(int)
     log = pyqtSignal(str)
@@ -6229,20 +7118,26 @@ class ProcessorThread(QThread):
         self.opts.setdefault("hook_text", "You need to see this!")
         self._stop = False
         self._current_process = None  # Track current subprocess for immediate termination
+        self._active_processes = set()  # All tracked subprocesses (parallel renders run several)
+        self._process_lock = threading.Lock()
 
     def request_stop(self):
         self._stop = True
         # Immediately terminate any running subprocess
-        if self._current_process and self._current_process.poll() is None:
+        with self._process_lock:
+            procs = list(self._active_processes)
+        for proc in procs:
+            if proc.poll() is not None:
+                continue
             try:
-                self._current_process.terminate()
+                proc.terminate()
                 # Give it a moment to terminate gracefully
                 try:
-                    self._current_process.wait(timeout=2)
+                    proc.wait(timeout=2)
                 except subprocess.TimeoutExpired:
                     # Force kill if it doesn't terminate gracefully
-                    self._current_process.kill()
-                    self._current_process.wait()
+                    proc.kill()
+                    proc.wait()
             except Exception as e:
                 print(f"[DEBUG] Error terminating process: {e}")
 
@@ -6254,24 +7149,33 @@ class ProcessorThread(QThread):
         if self.check_stop():
             raise subprocess.CalledProcessError(1, cmd, "Process cancelled")
         
+        proc = None
         try:
             parts = cmd
+            if parts and parts[0] in ("ffmpeg", "ffprobe"):
+                parts[0] = _tool_path(parts[0])
             print(f"[DEBUG] run_tracked: Executing: {' '.join(parts)}")
             
             # Start the process and track it
-            self._current_process = subprocess.Popen(
+            proc = subprocess.Popen(
                 parts,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True
             )
+            self._current_process = proc
+            with self._process_lock:
+                self._active_processes.add(proc)
+            if self.check_stop():
+                # request_stop may have run between the check above and registration
+                proc.terminate()
             
             try:
-                stdout, stderr = self._current_process.communicate(timeout=timeout)
-                returncode = self._current_process.returncode
+                stdout, stderr = proc.communicate(timeout=timeout)
+                returncode = proc.returncode
                 
                 # Clear the tracked process
-                self._current_process = None
+                self._forget_process(proc)
                 
                 if stderr:
                     truncated = (stderr[:1000] + '...') if len(stderr) > 1000 else stderr
@@ -6285,23 +7189,30 @@ class ProcessorThread(QThread):
                 return result
                 
             except subprocess.TimeoutExpired:
-                self._current_process.terminate()
+                proc.terminate()
                 try:
-                    self._current_process.wait(timeout=5)
+                    proc.wait(timeout=5)
                 except subprocess.TimeoutExpired:
-                    self._current_process.kill()
-                    self._current_process.wait()
-                self._current_process = None
+                    proc.kill()
+                    proc.wait()
+                self._forget_process(proc)
                 raise
                 
         except Exception as e:
-            self._current_process = None
+            if proc is not None:
+                self._forget_process(proc)
             if self.check_stop():
                 print(f"[DEBUG] Process cancelled: {' '.join(cmd)}")
                 raise subprocess.CalledProcessError(1, cmd, "Process cancelled")
             print(f"[DEBUG] run_tracked: Exception: {e}")
             return subprocess.CompletedProcess(cmd, returncode=1, stdout="", stderr=str(e))
 
+    def _forget_process(self, proc: subprocess.Popen):
+        with self._process_lock:
+            self._active_processes.discard(proc)
+        if self._current_process is proc:
+            self._current_process = None
+
     def emit_log(self, text: str):
         ts = time.strftime("%H:%M:%S")
         self.log.emit(f"[{ts}] {text}")
@@ -6359,7 +7270,7 @@ class ProcessorThread(QThread):
                 "-vf", "scale=1920:1080:force_original_aspect_ratio=decrease,"
                       "pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p",
                 "-r", "60",
-                "-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "ultrafast", "-crf", "23",
+                *MEZZ_X264_ARGS,
                 "-c:a", "aac", "-q:a", "2", "-ar", "48000", "-ac", "2",
                 "-movflags", "+faststart", "-y", mezz_path
             ]
@@ -6751,11 +7662,8 @@ class ProcessorThread(QThread):
             self.emit_log("[PRO] Rendering selected parts...")
             tmp_dir = os.path.join(self.out_dir, f"_pro_tmp_{uuid.uuid4().hex[:6]}")
             os.makedirs(tmp_dir, exist_ok=True)
-            rendered_parts: List[str] = []
+            render_jobs: List[Dict] = []
             for i, seg in enumerate(ordered_segments, 1):
-                if self.check_stop():
-                    self.finished.emit("Canceled")
-                    return
                 s = seg["start"]; e = seg["end"]
                 src = seg["source"]
                 current_vf_extra: List[str] = []
@@ -6766,15 +7674,16 @@ class ProcessorThread(QThread):
                     lt_filter = get_lower_third_filter(name=name, title=title)
                     if lt_filter:
                         current_vf_extra.append(lt_filter)
-                
-                outp = os.path.join(tmp_dir, f"part_{i:02d}.mp4")
-                ok = trim_out(src, s, e, outp, vf_extra=",".join(current_vf_extra) if current_vf_extra else None)
-                if ok:
-                    rendered_parts.append(outp)
-                    self.emit_log(f"[PRO] Rendered part {i}: {outp} ({s:.1f}-{e:.1f})")
-                else:
-                    self.emit_log(f"[PRO] Failed to render part {i} ({s:.1f}-{e:.1f})")
-                self.progress.emit(int(40 + 30 * (i / max(1, len(ordered_segments)))))
+                render_jobs.append({
+                    "index": i, "source": src, "start": s, "end": e,
+                    "output": os.path.join(tmp_dir, f"part_{i:02d}.mp4"),
+                    "vf_extra": ",".join(current_vf_extra) if current_vf_extra else None,
+                })
+
+            rendered_parts = [p for p in self.render_parts_parallel(render_jobs) if p]
+            if self.check_stop():
+                self.finished.emit("Canceled")
+                return
 
             if not rendered_parts:
                 self.finished.emit("Error: No rendered parts.")
@@ -6938,10 +7847,66 @@ class ProcessorThread(QThread):
                 else:
                     self.emit_log(f"[PRO] Last segment end unchanged at {orig_end:.2f}s.")
 
+            store = get_transcript_store()
+            self.emit_log(f"[PRO] Transcript cache: {store.hits} hits, {store.misses} misses")
+            for st in get_whisper_pool().stats():
+                self.emit_log(f"[PRO] Whisper {st['model_size']} ({st['device']}/{st['compute_type']}): "
+                              f"loaded in {st['load_s']:.1f}s, ~{st['rss_mb']:.0f} MB, reused for {st['uses']} transcriptions")
+
         except Exception as exc:
             self.emit_log(f"[PRO] Exception: {exc}")
             self.finished.emit(f"Error: {exc}")
 
+    def render_parts_parallel(self, jobs: List[Dict]) -> List[Optional[str]]:
+        """
+        Render trim jobs on a bounded worker pool sized by plan_render_workers.
+        Results keep job order (None for failed or cancelled parts); each finished
+        part logs its wall time and advances the progress bar.
+        """
+        if not jobs:
+            return []
+        workers, threads = plan_render_workers(len(jobs), int(self.opts.get("render_workers", 0) or 0))
+        self.emit_log(f"[PRO] Rendering {len(jobs)} parts with {workers} workers x {threads} encoder threads...")
+        results: List[Optional[str]] = [None] * len(jobs)
+        t0 = time.time()
+
+        def render(job: Dict) -> Tuple[bool, float]:
+            if self.check_stop():
+                return False, 0.0
+            started = time.time()
+            ok = trim_out(job["source"], job["start"], job["end"], job["output"], vf_extra=job["vf_extra"],
+                          threads=threads, runner=self.run_tracked_subprocess)
+            return ok, time.time() - started
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="part-render") as pool:
+            futures = {pool.submit(render, job): pos for pos, job in enumerate(jobs)}
+            for fut in as_completed(futures):
+                pos = futures[fut]
+                job = jobs[pos]
+                try:
+                    ok, elapsed = fut.result()
+                except Exception as e:
+                    ok, elapsed = False, 0.0
+                    if not self.check_stop():
+                        self.emit_log(f"[PRO] Part {job['index']} error: {e}")
+                done += 1
+                if ok:
+                    results[pos] = job["output"]
+                    self.emit_log(f"[PRO] Rendered part {job['index']}: {job['output']} "
+                                  f"({job['start']:.1f}-{job['end']:.1f}) in {elapsed:.1f}s")
+                elif not self.check_stop():
+                    self.emit_log(f"[PRO] Failed to render part {job['index']} ({job['start']:.1f}-{job['end']:.1f})")
+                self.progress.emit(int(40 + 30 * (done / len(jobs))))
+                if self.check_stop():
+                    for f in futures:
+                        f.cancel()
+        media_s = sum(j["end"] - j["start"] for j, r in zip(jobs, results) if r)
+        wall = max(1e-6, time.time() - t0)
+        self.emit_log(f"[PRO] Rendered {sum(1 for r in results if r)}/{len(jobs)} parts ({media_s:.0f}s of video) "
+                      f"in {wall:.1f}s ({media_s / wall:.2f}x realtime)")
+        return results
+
     def batch_assemble_timeline(self, rendered_parts: List[str], tmp_dir: str, first_segment: str) -> Optional[str]:
         """Optimized batch timeline assembly with minimal transitions"""
         try:
@@ -6955,13 +7920,101 @@ class ProcessorThread(QThread):
             # Smart transition selection: only add transitions at major scene changes
             transition_points = self.select_smart_transition_points(rendered_parts, max_transitions)
             
+            # Compile the whole timeline into one filter graph and encode it once
+            parts = [first_segment] + rendered_parts[1:]
+            durations = [ffprobe_duration(p) for p in parts]
+            joins = ["cut"] * len(parts)
+            for i in transition_points:
+                if 0 < i < len(parts):
+                    joins[i] = choose_transition(parts[i - 1], parts[i], getattr(self, 'opts', {}), durations[i - 1], durations[i])
+            assembled = self.render_timeline_single_pass(parts, joins, tmp_dir, durations)
+            if assembled or self.check_stop():
+                return assembled
+            
             # Batch process with selected transitions
+            self.emit_log("[PRO] Single-pass timeline render failed; folding transitions incrementally...")
             return self.process_smart_transitions(rendered_parts, transition_points, tmp_dir, first_segment)
             
         except Exception as e:
             self.emit_log(f"[PRO] Batch assembly error: {e}")
             return None
     
+    def render_timeline_single_pass(self, parts: List[str], joins: List[str], tmp_dir: str,
+                                    durations: Optional[List[float]] = None) -> Optional[str]:
+        """
+        Encode the ordered parts with their joins (see build_timeline_filter_graph) in
+        one pass. Long timelines are split into bounded chunks that are encoded with
+        identical settings and joined by stream copy. Logs encode fps and the
+        estimated speedup over folding parts into an accumulated file one by one.
+        """
+        try:
+            durations = durations or [ffprobe_duration(p) for p in parts]
+            if not parts or any(d <= 0 for d in durations):
+                self.emit_log("[PRO] Single-pass timeline: missing or empty part, skipping")
+                return None
+            audio = [has_audio_stream(p) for p in parts]
+            width, height = ffprobe_dimensions(parts[0])
+            if not (width and height):
+                width, height = 1920, 1080
+
+            chunks = plan_timeline_chunks(joins)
+            chunk_outputs: List[str] = []
+            out_seconds = 0.0
+            t0 = time.time()
+            for ci, (a, b) in enumerate(chunks):
+                if self.check_stop():
+                    return None
+                if b < len(parts) and TIMELINE_XFADE_ALIASES.get(joins[b], joins[b]) != "cut":
+                    self.emit_log(f"[PRO] Timeline chunk boundary at part {b}: {joins[b]} transition becomes a cut")
+                graph, chunk_dur = build_timeline_filter_graph(durations[a:b], ["cut"] + joins[a + 1:b], audio[a:b], width, height)
+                out = os.path.join(tmp_dir, f"timeline_chunk_{ci:02d}.mp4")
+                inputs: List[str] = []
+                for p in parts[a:b]:
+                    inputs.extend(["-i", p])
+                cmd = [
+                    "ffmpeg", "-hide_banner", "-nostats"
+                ] + inputs + [
+                    "-filter_complex", graph, "-map", "[vout]", "-map", "[aout]",
+                    "-r", str(TIMELINE_FPS),
+                    "-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "medium", "-crf", "18",
+                    "-c:a", "aac", "-b:a", "320k", "-ar", "48000",
+                    "-movflags", "+faststart", "-y", out
+                ]
+                self.run_tracked_subprocess(cmd, check=True)
+                if not (os.path.exists(out) and os.path.getsize(out) > 0):
+                    self.emit_log(f"[PRO] Single-pass timeline: chunk {ci + 1}/{len(chunks)} produced no output")
+                    return None
+                chunk_outputs.append(out)
+                out_seconds += chunk_dur
+                self.emit_log(f"[PRO] Timeline chunk {ci + 1}/{len(chunks)}: parts {a}-{b - 1} ({chunk_dur:.1f}s)")
+                self.progress.emit(40 + int(30 * ((ci + 1) / len(chunks))))
+
+            if len(chunk_outputs) == 1:
+                result = chunk_outputs[0]
+            else:
+                concat_file = os.path.join(tmp_dir, "timeline_chunks.txt")
+                with open(concat_file, 'w', encoding='utf-8') as f:
+                    for c in chunk_outputs:
+                        f.write(f"file '{c}'\n")
+                result = os.path.join(tmp_dir, "timeline_single_pass.mp4")
+                self.run_tracked_subprocess([
+                    "ffmpeg", "-hide_banner", "-nostats", "-f", "concat", "-safe", "0",
+                    "-i", concat_file, "-c", "copy", "-movflags", "+faststart", "-y", result
+                ], check=True)
+                if not (os.path.exists(result) and os.path.getsize(result) > 0):
+                    return None
+
+            wall = max(1e-6, time.time() - t0)
+            fold_seconds = incremental_fold_encode_seconds(durations, joins)
+            self.emit_log(
+                f"[PRO] Timeline encoded once: {len(parts)} parts, {out_seconds:.1f}s in {wall:.1f}s "
+                f"({out_seconds * TIMELINE_FPS / wall:.0f} fps, ~{fold_seconds / max(1e-6, out_seconds):.1f}x less encode work than incremental folding)"
+            )
+            return result
+        except Exception as e:
+            self.emit_log(f"[PRO] Single-pass timeline error: {e}")
+            return None
+
     def select_smart_transition_points(self, rendered_parts: List[str], max_transitions: int) -> List[int]:
         """Select optimal points for transitions based on content analysis"""
         if len(rendered_parts) <= 2:
@@ -4,10 +4,11 @@ import requests
 import re
 import numpy as np
 import scipy.io.wavfile as wavfile
-import edge_tts
 import asyncio
 from media_manager import MediaManager
 from ai_visual_generator import AIVisualGenerator
+from tts_scheduler import TTSScheduler
+from sd_worker import run_sd_jobs
 
 # MoviePy imports with fallback
 try:
@@ -28,7 +29,6 @@ OLLAMA_URL = "http://localhost:11434/api/generate"
 DEFAULT_MODEL = "llama3"
 
 import sys
-import subprocess
 import gc
 import time
 
@@ -247,12 +247,13 @@ class LongVideoManager:
             try:
                 # Add src to sys.path to ensure we can import
                 sys.path.append(os.path.dirname(__file__))
-                from tts_chatterbox import generate_cloned_audio
+                from tts_chatterbox import generate_cloned_audio_batch
                 use_cloning = True
             except ImportError:
                 print("⚠️ Chatterbox module not found, falling back to Edge TTS.")
         
         files = []
+        speech = []  # (text, out_path) for every non-pause segment
         for i, text in enumerate(segments):
             # Check for [PAUSE_N] tag
             if re.match(r'^\[PAUSE_\d+\]$', text):
@@ -261,24 +262,33 @@ class LongVideoManager:
                 continue
                 
             out_path = os.path.join(output_dir, f"seg_{i}.mp3")
-            success = False
-            
-            if use_cloning:
-                try:
-                    # Run synchronous cloning in thread to avoid blocking async loop too much
-                    # (Though here we are just awaiting the loop, so simple call is fine for now)
-                    res = generate_cloned_audio(text, out_path, voice_sample)
-                    if isinstance(res, tuple): success = res[0]
-                    else: success = res
-                except Exception as e:
-                    print(f"   ❌ Cloning failed for seg {i}: {e}")
-            
-            if not success:
-                if use_cloning: print("   ⚠️ Fallback to Edge TTS for this segment.")
-                communicate = edge_tts.Communicate(text, "en-US-ChristopherNeural", rate="-20%", pitch="-15Hz")
-                await communicate.save(out_path)
-                
+            speech.append((text, out_path))
             files.append(out_path)
+
+        cloned = [False] * len(speech)
+        if use_cloning and speech:
+            try:
+                # One reference-voice encode for the whole script, run off the event loop
+                cloned = await asyncio.to_thread(generate_cloned_audio_batch,
+                                                 [t for t, _ in speech], [p for _, p in speech], voice_sample)
+            except Exception as e:
+                print(f"   ❌ Cloning failed: {e}")
+
+        edge_jobs = []
+        for (text, out_path), success in zip(speech, cloned):
+            if not success:
+                if use_cloning: print(f"   ⚠️ Fallback to Edge TTS for {os.path.basename(out_path)}.")
+                edge_jobs.append({"text": text, "output": out_path, "voice": "en-US-ChristopherNeural",
+                                  "rate": "-20%", "pitch": "-15Hz"})
+
+        # Edge TTS is network-bound: synthesize all remaining segments concurrently
+        if edge_jobs:
+            scheduler = TTSScheduler()
+            results = await scheduler.synthesize_all(edge_jobs)
+            print(f"   🔊 {scheduler.summary()}")
+            failed = [r for r in results if not r["ok"]]
+            if failed:
+                raise RuntimeError(f"Edge TTS failed for {len(failed)} segment(s): {failed[0]['error']}")
         return files
 
     def _ensure_grid_background(self):
@@ -311,9 +321,8 @@ class LongVideoManager:
                 print("⚠️ PIL not found, skipping grid generation.")
 
     def generate_ai_images(self, topic, segments):
-        """Generates AI images for each script segment (via subprocess)."""
+        """Generates AI images for each script segment (via the persistent SD worker)."""
         images = []
-        unique_images = []
         MAX_UNIQUE_IMAGES = 5 # Limit to prevent memory exhaustion/long wait
         
         print(f"🎨 Generating AI images for topic: {topic} (Max Unique: {MAX_UNIQUE_IMAGES})...")
@@ -323,50 +332,34 @@ class LongVideoManager:
         if not os.path.exists(out_dir):
             os.makedirs(out_dir)
             
-        script_path = os.path.join(os.path.dirname(__file__), "ai_visual_generator.py")
-            
-        for i, seg in enumerate(segments):
+        # Missing images are submitted together so the worker can batch them
+        jobs = []
+        for i in range(min(len(segments), MAX_UNIQUE_IMAGES)):
+            path = os.path.join(out_dir, f"visual_{i}.png")
+            if not os.path.exists(path):
+                prompt_topic = f"{topic} illustration part {i}"
+                if i == 0: prompt_topic = f"{topic} gentle introduction"
+                elif i == len(segments)-1: prompt_topic = f"{topic} peaceful conclusion"
+                jobs.append({"mode": "image", "topic": prompt_topic, "output": path})
+        if jobs:
+            print(f"   🤖 Generating {len(jobs)} image(s) via SD worker...")
+            for job, res in zip(jobs, run_sd_jobs(jobs)):
+                if res["ok"]:
+                    print(f"   ✅ {job['topic']} ({res['seconds']}s)")
+                else:
+                    print(f"   ⚠️ AI generation failed for '{job['topic']}': {res['error']}")
+
+        unique_images = []
+        for i in range(len(segments)):
             # Reuse images if we exceed max unique limit
             if i >= MAX_UNIQUE_IMAGES:
                 images.append(unique_images[i % MAX_UNIQUE_IMAGES])
                 continue
-
             path = os.path.join(out_dir, f"visual_{i}.png")
-            
             if not os.path.exists(path):
-                prompt_topic = f"{topic} illustration part {i}"
-                if i == 0: prompt_topic = f"{topic} gentle introduction"
-                elif i == len(segments)-1: prompt_topic = f"{topic} peaceful conclusion"
-                
-                print(f"   🤖 Generating image {i+1}/{min(len(segments), MAX_UNIQUE_IMAGES)}: {prompt_topic}")
-                
-                try:
-                    # Force garbage collection before subprocess
-                    gc.collect()
-                    time.sleep(1) 
-                    
-                    # Run generation in separate process to manage VRAM
-                    subprocess.run(
-                        [sys.executable, script_path, "--topic", prompt_topic, "--output", path],
-                        check=True
-                    )
-                    
-                    if os.path.exists(path):
-                        unique_images.append(path)
-                        images.append(path)
-                    else:
-                        print("   ⚠️ AI generation failed (no file), using fallback.")
-                        fallback = unique_images[-1] if unique_images else self.grid_bg_file
-                        unique_images.append(fallback)
-                        images.append(fallback)
-                except Exception as e:
-                    print(f"   ❌ Subprocess Error: {e}")
-                    fallback = unique_images[-1] if unique_images else self.grid_bg_file
-                    unique_images.append(fallback)
-                    images.append(fallback)
-            else:
-                unique_images.append(path)
-                images.append(path)
+                path = unique_images[-1] if unique_images else self.grid_bg_file
+            unique_images.append(path)
+            images.append(path)
                 
         return images
 
@@ -405,28 +398,19 @@ class LongVideoManager:
             print(f"   ✅ Found cached AI background: {cache_file}")
             return cache_file
             
-        # Call AI Generator via subprocess
-        script_path = os.path.join(os.path.dirname(__file__), "ai_visual_generator.py")
-        
         try:
-            # Force GC
-            gc.collect()
-            
             print("   ⏳ Running AI generation (this may take 30-60s)...")
-            subprocess.run(
-                [sys.executable, script_path, "--topic", topic, "--output", cache_file, "--mode", "video"],
-                check=True
-            )
+            res = run_sd_jobs([{"mode": "ken_burns", "topic": topic, "output": cache_file}])[0]
             
-            if os.path.exists(cache_file):
+            if res["ok"] and os.path.exists(cache_file):
                 print(f"   ✅ Generated AI background: {cache_file}")
                 return cache_file
             else:
-                print("   ❌ AI generation failed (no file produced).")
+                print(f"   ❌ AI generation failed: {res['error'] or 'no file produced'}")
                 return None
                 
         except Exception as e:
-            print(f"   ❌ Subprocess Error: {e}")
+            print(f"   ❌ SD Worker Error: {e}")
             return None
 
     def search_long_background(self, topic, min_duration=60, target_duration=7200):
@@ -634,9 +618,8 @@ class LongVideoManager:
             if not os.path.exists(ai_vis_dir):
                 os.makedirs(ai_vis_dir)
                 
-            script_path = os.path.join(os.path.dirname(__file__), "ai_visual_generator.py")
-            
-            # Iterate through segments to generate synced visuals
+            # Iterate through segments to plan synced visuals, then render them in one worker session
+            planned = []
             i = 0
             while i < len(segments):
                 seg_text = segments[i]
@@ -674,45 +657,33 @@ class LongVideoManager:
                     else:
                         break
                 
-                # Generate Ken Burns Video
                 # Sanitize filename
                 safe_name = "".join([c if c.isalnum() else "_" for c in seg_text[:20]])
                 out_path = os.path.join(ai_vis_dir, f"kb_{i}_{safe_name}.mp4")
+                planned.append({"mode": "ken_burns", "topic": seg_text, "output": out_path, "duration": total_dur})
                 
-                print(f"   🎬 Generating Visual for segment {i} ({total_dur:.1f}s): {seg_text[:40]}...")
-                
+                # Advance index
+                i = j
+
+            print(f"   🎬 Generating {len(planned)} Ken Burns visuals via SD worker...")
+            gc.collect()
+            for job, res in zip(planned, run_sd_jobs(planned)):
+                out_path, total_dur = job["output"], job["duration"]
                 try:
-                    # Force GC
-                    gc.collect()
-                    
-                    cmd = [
-                        sys.executable, script_path,
-                        "--topic", seg_text,
-                        "--output", out_path,
-                        "--mode", "ken_burns",
-                        "--duration", str(total_dur)
-                    ]
-                    
-                    subprocess.run(cmd, check=True)
-                    
-                    if os.path.exists(out_path):
+                    if res["ok"] and os.path.exists(out_path):
+                        print(f"   ✅ Segment visual ({total_dur:.1f}s, {res['seconds']}s): {job['topic'][:40]}...")
                         vc = VideoFileClip(out_path)
                         visual_clips.append(vc)
                         file_paths.append(out_path)
                     else:
                         print("   ❌ AI Gen Failed (No Output). Using fallback.")
-                        raise Exception("No output")
+                        raise Exception(res["error"] or "No output")
                         
                 except Exception as e:
                     print(f"   ⚠️ Visual Gen Error: {e}. Using Grid Fallback.")
                     # Fallback: Grid Image
-                    # We need to generate a static image or use grid
-                    # Just use grid for now to save complexity
                     fallback_clip = ImageClip(self.grid_bg_file).set_duration(total_dur)
                     visual_clips.append(fallback_clip)
-                
-                # Advance index
-                i = j
 
         else:
             # Default: Try YouTube first for high quality real footage
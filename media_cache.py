@@ -0,0 +1,199 @@
+"""
+Small helpers shared by the on-disk caches (transcripts, media analysis,
+scene indexes, TTS audio, generated images): a fast content fingerprint,
+atomic writes, and ContentCache, the size-bounded key -> file store behind the
+TTS and image caches. No heavy imports here so any generator can use it.
+"""
+import os
+import json
+import time
+import uuid
+import atexit
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+FINGERPRINT_SAMPLES = 16
+
+_FINGERPRINT_MEMO: Dict[Tuple[str, int, int], str] = {}
+_FINGERPRINT_LOCK = threading.Lock()
+
+def file_fingerprint(path: str, block_size: int = FINGERPRINT_BLOCK_SIZE, samples: int = FINGERPRINT_SAMPLES) -> str:
+    """
+    Fast content fingerprint: sha1 over the file size plus `samples` evenly spaced
+    blocks. (size, mtime) memoise the hash per process so unchanged files are never
+    re-read; mtime is deliberately not part of the digest, so a byte-identical
+    re-render of a file on the next run still maps to the same key.
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _FINGERPRINT_LOCK:
+        cached = _FINGERPRINT_MEMO.get(memo_key)
+    if cached:
+        return cached
+    h = hashlib.sha1(f"{st.st_size}|".encode())
+    with open(path, "rb") as f:
+        if st.st_size <= block_size * samples:
+            h.update(f.read())
+        else:
+            step = (st.st_size - block_size) // (samples - 1)
+            for i in range(samples):
+                f.seek(i * step)
+                h.update(f.read(block_size))
+    digest = h.hexdigest()
+    with _FINGERPRINT_LOCK:
+        _FINGERPRINT_MEMO[memo_key] = digest
+    return digest
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Write via a unique temp file + os.replace so concurrent readers never see a partial file."""
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+def atomic_write_json(path: str, obj):
+    atomic_write_bytes(path, json.dumps(obj).encode("utf-8"))
+
+def atomic_copy_file(src: str, dst: str):
+    """Copy src to dst through a temp file + os.replace (same guarantee as atomic_write_bytes)."""
+    import shutil
+    tmp = f"{dst}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+class ContentCache:
+    """
+    Directory of content-addressed files: <key[:2]>/<key><ext> plus a <key>.json
+    sidecar holding the extension, the seconds the file took to make and any
+    caller fields. Writes go through temp files + os.replace, the sidecar last,
+    so parallel workers and separate processes can share the directory. The
+    total size is bounded; least recently used entries (sidecar mtime, touched
+    on every hit) are evicted first.
+    """
+    name = "Cache"
+    saved = "work"  # what a hit saves, for report()
+
+    def __init__(self, cache_dir: str, max_bytes: int, evict_every: int = 20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every  # stores between size checks
+        self._lock = threading.Lock()
+        self._stores = 0
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+    def _paths(self, key, ext=None):
+        folder = os.path.join(self.cache_dir, key[:2])
+        meta = os.path.join(folder, key + ".json")
+        if ext is None:
+            return folder, meta, None
+        return folder, meta, os.path.join(folder, key + ext)
+
+    def lookup(self, key: str, output_path: str) -> Optional[dict]:
+        """Copies the cached file to output_path and returns its metadata, or None on a miss."""
+        _, meta_path, _ = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            _, _, data_path = self._paths(key, meta["ext"])
+            atomic_copy_file(data_path, output_path)
+            os.utime(meta_path)  # LRU clock
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.seconds_saved += float(meta.get("seconds", 0.0))
+        return meta
+
+    def store_file(self, key: str, path: str, ext: str, seconds: float = 0.0, **fields):
+        if not path or not os.path.exists(path):
+            return
+        folder, meta_path, data_path = self._paths(key, ext)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            atomic_copy_file(path, data_path)
+            # Sidecar last: an entry only exists once its file is complete
+            atomic_write_json(meta_path, dict(fields, ext=ext, seconds=round(seconds, 3), created=time.time()))
+        except Exception as e:
+            print(f"⚠️ {self.name} write failed: {e}")
+            return
+        with self._lock:
+            self._stores += 1
+            check = self._stores % self.evict_every == 1
+        if check:
+            self.evict()
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits in max_bytes."""
+        entries, total = [], 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                meta_path = os.path.join(root, name)
+                key = name[:-5]
+                size = 0
+                for other in files:
+                    if other.startswith(key):
+                        try:
+                            size += os.path.getsize(os.path.join(root, other))
+                        except OSError:
+                            pass
+                try:
+                    entries.append((os.path.getmtime(meta_path), size, root, key))
+                except OSError:
+                    continue
+                total += size
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for _, size, root, key in sorted(entries):
+            for name in os.listdir(root):
+                if name.startswith(key):
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except OSError:
+                        pass
+            total -= size
+            removed += 1
+            if total <= self.max_bytes:
+                break
+        return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "seconds_saved": self.seconds_saved}
+
+    def report(self) -> str:
+        s = self.stats()
+        return (f"{self.name}: {s['hits']}/{s['hits'] + s['misses']} hits ({s['hit_rate']:.0%}), "
+                f"~{s['seconds_saved']:.1f}s {self.saved} saved")
+
+    def report_at_exit(self, icon: str):
+        """Prints report() when the process exits, if the cache was used at all."""
+        def _report():
+            if self.hits or self.misses:
+                print(f"{icon} {self.report()}")
+        atexit.register(_report)
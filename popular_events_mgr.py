@@ -9,6 +9,7 @@ import random
 import textwrap
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
+from tts_cache import get_tts_cache, tts_cache_key
 # import tts_manager  # Removed as user requested no Kokoro
 
 # MoviePy imports with proper fallback
@@ -211,8 +212,14 @@ def generate_audio(text, output_file="commentary_audio.mp3"):
     """
     try:
         voice = "en-US-ChristopherNeural"
-        communicate = edge_tts.Communicate(text, voice)
-        asyncio.run(communicate.save(output_file))
+
+        def _synthesize():
+            communicate = edge_tts.Communicate(text, voice)
+            asyncio.run(communicate.save(output_file))
+            return os.path.exists(output_file)
+
+        key = tts_cache_key(text, "edge", voice, fmt=os.path.splitext(output_file)[1])
+        get_tts_cache().cached(key, output_file, _synthesize)
         return output_file
     except Exception as e:
         print(f"⚠️ TTS Generation failed: {e}")
@@ -0,0 +1,212 @@
+"""
+ffmpeg-based quiz video assembly.
+
+Quiz videos are a sequence of static slides (plus pre-encoded countdown clips)
+with sound cues on top, so compositing them frame by frame in MoviePy is wasted
+work. QuizTimeline records the segments and the audio cues as a manifest, then:
+
+1. encodes each slide once as a still-image segment (-tune stillimage),
+   identical slide/duration pairs only once, several ffmpeg processes at a time.
+   Slides may be image files or in-memory PIL images / numpy frames (see
+   quiz_slides); either way one raw frame is piped to ffmpeg and looped there,
+   and encoding starts as soon as the slide is added;
+2. joins the segments with the concat demuxer (video stream copied, no re-encode);
+3. mixes every cue in the same pass with adelay + amix (plus looped background
+   music), from a filter script so long quizzes don't hit command-line limits.
+
+Memory stays flat however long the quiz is: nothing but ffmpeg touches a frame.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from imageio_ffmpeg import get_ffmpeg_exe
+from PIL import Image
+
+from quiz_countdown import COUNTDOWN_FPS, STILL_VIDEO_ARGS
+
+ASSEMBLER_WORKERS = max(1, min(4, os.cpu_count() or 1))
+AUDIO_SAMPLE_RATE = 44100
+AUDIO_ARGS = ["-c:a", "aac", "-b:a", "192k"]
+
+def media_duration(path):
+    """Duration in seconds as ffmpeg reports it (the same header MoviePy reads), or None."""
+    proc = subprocess.run([get_ffmpeg_exe(), "-hide_banner", "-i", path], capture_output=True, text=True)
+    match = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", proc.stderr)
+    if not match:
+        return None
+    h, m, s = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+def slide_frame(image, size):
+    """RGB uint8 array of `size` from an image path, PIL image or array."""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    if not isinstance(image, Image.Image):
+        with Image.open(image) as img:
+            image = img.convert("RGB")
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != tuple(size):
+        image = image.resize(size, Image.Resampling.BICUBIC)
+    return np.asarray(image)
+
+class QuizTimeline:
+    """
+    Slides and pre-encoded clips in order, each with audio cues relative to its
+    start. Durations are snapped to whole frames so the mixed audio stays on
+    the cut points of the joined video. Segments are encoded in the background
+    as they are added; render() waits for them, then joins and mixes.
+    """
+
+    def __init__(self, size, fps=COUNTDOWN_FPS, workdir=None):
+        self.size = tuple(size)
+        self.fps = fps
+        self.segments = []  # {"kind": "slide"|"clip", "path", "start", "duration", "file"}
+        self.cues = []      # {"path", "start", "volume"}
+        self._own_workdir = workdir is None
+        self.workdir = workdir or tempfile.mkdtemp(prefix="quiz_assembly_")
+        self._pool = ThreadPoolExecutor(max_workers=ASSEMBLER_WORKERS)
+        self._jobs = {}  # (kind, source key, frames) -> (segment file, future)
+        # In-memory frames waiting for an encoder are bounded, so a long quiz never holds them all
+        self._pending = threading.BoundedSemaphore(2 * ASSEMBLER_WORKERS)
+
+    @property
+    def duration(self):
+        return sum(seg["duration"] for seg in self.segments)
+
+    def _submit(self, kind, source, frames):
+        """Segment file for this source, encoding it in the background the first time it is seen."""
+        if kind == "clip":
+            key, path = (kind, os.path.abspath(source), frames), source
+        elif isinstance(source, (str, os.PathLike)):
+            key, path = (kind, os.path.abspath(source), frames), os.fspath(source)
+        else:
+            # In-memory slide: identical pixels share a segment
+            frame = slide_frame(source, self.size)
+            key, path = (kind, hashlib.sha1(frame.tobytes()).hexdigest(), frames), None
+        if key in self._jobs:
+            return path, self._jobs[key][0]
+        out = os.path.join(self.workdir, f"seg_{len(self._jobs):05d}.mp4")
+        if kind == "clip":
+            future = self._pool.submit(self._strip_audio, source, out)
+        else:
+            self._pending.acquire()
+            future = self._pool.submit(self._encode_slide, frame if path is None else path, frames, out)
+            future.add_done_callback(lambda _: self._pending.release())
+        self._jobs[key] = (out, future)
+        return path, out
+
+    def _add(self, kind, source, duration, audio):
+        start = self.duration
+        frames = max(1, int(round(duration * self.fps)))
+        path, seg_file = self._submit(kind, source, frames)
+        self.segments.append({"kind": kind, "path": path, "start": start, "duration": frames / self.fps,
+                              "file": seg_file})
+        for cue in audio or []:
+            cue_path, offset, volume = (tuple(cue) + (1.0,))[:3]
+            if cue_path:
+                self.cues.append({"path": cue_path, "start": start + offset, "volume": volume})
+        return start
+
+    def add_slide(self, image, duration, audio=None):
+        """
+        Still slide for `duration` seconds: an image path, PIL image or RGB array
+        (in-memory slides are never written as images). audio is
+        [(path, offset[, volume]), ...]. Returns its start time.
+        """
+        return self._add("slide", image, duration, audio)
+
+    def add_clip(self, video_path, duration, audio=None):
+        """
+        Pre-encoded clip, encoded with STILL_VIDEO_ARGS at the timeline's size and
+        fps (quiz_countdown clips are). Its own audio track is mixed in as a cue.
+        """
+        return self._add("clip", video_path, duration, [(video_path, 0.0)] + list(audio or []))
+
+    def manifest(self):
+        return {"size": list(self.size), "fps": self.fps, "duration": self.duration,
+                "segments": self.segments, "cues": self.cues}
+
+    def _encode_slide(self, image, frames, output_path):
+        """One raw frame on stdin, looped by ffmpeg (no image decode per output frame)."""
+        frame = slide_frame(image, self.size)
+        w, h = self.size
+        cmd = [get_ffmpeg_exe(), "-y", "-v", "error", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}",
+               "-framerate", str(self.fps), "-i", "-", "-vf", "loop=loop=-1:size=1,setsar=1",
+               "-frames:v", str(frames), "-r", str(self.fps), *STILL_VIDEO_ARGS, "-an", output_path]
+        subprocess.run(cmd, input=frame.tobytes(), check=True)
+        return output_path
+
+    def _strip_audio(self, video_path, output_path):
+        """Video stream only, so every concat entry has the same streams."""
+        subprocess.run([get_ffmpeg_exe(), "-y", "-v", "error", "-i", video_path, "-map", "0:v", "-c", "copy",
+                        output_path], check=True)
+        return output_path
+
+    def _audio_graph(self, music_input, music_volume):
+        total = self.duration
+        graph, labels = [], []
+        for k, cue in enumerate(self.cues):
+            delay = int(round(cue["start"] * 1000))
+            graph.append(f"[{k + 1}:a]aresample={AUDIO_SAMPLE_RATE},aformat=channel_layouts=stereo,"
+                         f"adelay={delay}:all=1,volume={cue['volume']}[c{k}]")
+            labels.append(f"[c{k}]")
+        if music_input is not None:
+            graph.append(f"[{music_input}:a]aresample={AUDIO_SAMPLE_RATE},aformat=channel_layouts=stereo,"
+                         f"atrim=0:{total:.3f},volume={music_volume}[music]")
+            labels.append("[music]")
+        # A silent bed of exactly the video's length sets the mix duration; normalize=0 sums like CompositeAudioClip
+        graph.append(f"anullsrc=r={AUDIO_SAMPLE_RATE}:cl=stereo,atrim=0:{total:.3f}[bed]")
+        graph.append(f"[bed]{''.join(labels)}amix=inputs={len(labels) + 1}:duration=first:normalize=0[aout]")
+        return ";\n".join(graph)
+
+    def close(self):
+        """Stops the encoders and removes the working directory (if the timeline created it)."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def render(self, output_path, music=None, music_volume=0.2):
+        """Joins and mixes the timeline into output_path, then cleans up. Returns output_path."""
+        workdir = self.workdir
+        try:
+            with open(os.path.join(workdir, "timeline.json"), "w", encoding="utf-8") as f:
+                json.dump(self.manifest(), f, indent=1)
+
+            # 1. Wait for the segments (encoded in the background since they were added)
+            for _, future in self._jobs.values():
+                future.result()
+
+            list_path = os.path.join(workdir, "segments.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                f.write("ffconcat version 1.0\n")
+                for seg in self.segments:
+                    f.write(f"file '{os.path.abspath(seg['file'])}'\n")
+
+            # 2 + 3. Join (stream copy) and mix all cues in one pass
+            inputs = ["-f", "concat", "-safe", "0", "-i", list_path]
+            for cue in self.cues:
+                inputs += ["-i", cue["path"]]
+            music_input = None
+            if music and os.path.exists(music):
+                music_input = len(self.cues) + 1
+                inputs += ["-stream_loop", "-1", "-i", music]
+            script_path = os.path.join(workdir, "mix.txt")
+            with open(script_path, "w", encoding="utf-8") as f:
+                f.write(self._audio_graph(music_input, music_volume))
+
+            cmd = [get_ffmpeg_exe(), "-y", "-v", "error", "-stats", *inputs, "-filter_complex_script", script_path,
+                   "-map", "0:v", "-map", "[aout]", "-c:v", "copy", *AUDIO_ARGS, "-t", f"{self.duration:.3f}",
+                   "-movflags", "+faststart", output_path]
+            subprocess.run(cmd, check=True)
+            return output_path
+        finally:
+            self.close()
@@ -0,0 +1,71 @@
+"""
+Pre-rendered quiz countdown clips.
+
+The thinking-time countdown used to be built per second: a countdown slide PNG,
+a beep wav, an AudioFileClip and an ImageClip for every number, so a long quiz
+handed MoviePy ten tiny clips per question. Here the whole countdown for a
+question is encoded once into a single clip: the question slide is the static
+layer, the digits come from anim_cache's number overlay cache (rendered once
+per number for the whole process), and the beep track comes from the sfx_bank
+(synthesised once per (seconds, beep)) and is muxed in. ffmpeg gets one frame
+per second and repeats it at the output frame rate, which x264's stillimage tuning encodes almost for free.
+"""
+import os
+import subprocess
+import tempfile
+
+from imageio_ffmpeg import get_ffmpeg_exe
+from PIL import Image
+
+from anim_cache import overlay_number
+from sfx_bank import get_sound_bank
+
+COUNTDOWN_FPS = 24
+# Shared with quiz_assembler's slide segments so they can be joined with the concat demuxer
+STILL_VIDEO_ARGS = ["-c:v", "libx264", "-preset", "ultrafast", "-tune", "stillimage", "-crf", "18", "-pix_fmt", "yuv420p"]
+COUNTDOWN_ENCODE_ARGS = STILL_VIDEO_ARGS + ["-c:a", "aac", "-b:a", "192k"]
+NUMBER_STYLE = {"size": 300, "fill": "white", "stroke_fill": "black", "stroke_width": 8}
+
+def beep_track(seconds, beep_duration=0.1, freq=800, final_freq=None):
+    """
+    wav path of a `seconds`-long track with a beep at the start of every second
+    (the last one at final_freq if given), from the shared sound-effect bank.
+    """
+    return get_sound_bank().path("beep_track", seconds=seconds, beep_duration=beep_duration, freq=freq,
+                                 final_freq=final_freq)
+
+def countdown_frames(base_img, seconds):
+    """One RGB frame per second: the slide (path or PIL image) with seconds, seconds-1, ..., 1 on top."""
+    if isinstance(base_img, Image.Image):
+        slide = base_img.convert("RGB")
+    else:
+        with Image.open(base_img) as img:
+            slide = img.convert("RGB")
+    return [overlay_number(slide, n, **NUMBER_STYLE) for n in range(seconds, 0, -1)]
+
+def render_countdown_clip(base_img, output_path=None, seconds=10, beep_duration=0.1, freq=800,
+                          final_freq=None, fps=COUNTDOWN_FPS):
+    """
+    Encodes the countdown over base_img (a path or an in-memory PIL image) into
+    one clip with its beeps baked in. Returns the clip path (a new temp .mp4
+    unless output_path is given).
+    """
+    if output_path is None:
+        fd, output_path = tempfile.mkstemp(suffix=".mp4", prefix="countdown_")
+        os.close(fd)
+    frames = countdown_frames(base_img, seconds)
+    width, height = frames[0].size
+    cmd = [get_ffmpeg_exe(), "-y", "-v", "error",
+           "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-framerate", "1", "-i", "-",
+           "-i", beep_track(seconds, beep_duration, freq, final_freq),
+           "-map", "0:v", "-map", "1:a", "-r", str(fps), "-t", str(seconds),
+           *COUNTDOWN_ENCODE_ARGS, output_path]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    try:
+        for frame in frames:
+            proc.stdin.write(frame.tobytes())
+    finally:
+        proc.stdin.close()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed to encode countdown clip {output_path}")
+    return output_path
@@ -2,51 +2,23 @@ import os
 import random
 import time
 import re
-import textwrap
-import tempfile
 import subprocess
 import shutil
 import requests
 import html
-import wave
-import struct
-import math
 from script_generator import ScriptGenerator
-from PIL import Image, ImageDraw, ImageFont
-# MoviePy imports with proper submodule paths
-try:
-    # Try MoviePy 2.x import style first
-    from moviepy.editor import ImageClip, concatenate_videoclips, AudioFileClip, CompositeVideoClip, CompositeAudioClip, concatenate_audioclips, vfx
-except ImportError:
-    # Fallback to MoviePy 1.x import style
-    try:
-        from moviepy.video.VideoClip import ImageClip
-        from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
-        from moviepy.video.compositing.concatenate import concatenate_videoclips
-        from moviepy.audio.AudioClip import CompositeAudioClip
-        from moviepy.audio.compositing.CompositeAudioClip import CompositeAudioClip
-        from moviepy.audio.compositing.concatenate import concatenate_audioclips
-        from moviepy.audio.io.AudioFileClip import AudioFileClip
-        from moviepy.video.fx import vfx
-    except ImportError:
-        # Final fallback - try direct import
-        try:
-            from moviepy import ImageClip, concatenate_videoclips, AudioFileClip, CompositeVideoClip, CompositeAudioClip, concatenate_audioclips, vfx
-        except ImportError:
-            # If all imports fail, provide helpful error
-            raise ImportError("Could not import MoviePy components. Please check your MoviePy installation.")
 from tts_chatterbox import generate_cloned_audio
-from duckduckgo_search import DDGS
+from tts_cache import CALM_FILTER_CHAIN, get_tts_cache, tts_cache_key
+from tts_scheduler import TTSScheduler
+from quiz_slides import BG_COLOR_PINK, BG_COLOR_BLUE, render_slide, render_landscape_slide
+from quiz_countdown import render_countdown_clip
+from quiz_assembler import QuizTimeline, media_duration
+from sfx_bank import get_sound_bank, wav_bytes
+from image_prefetch import ImagePrefetcher, copy_image
+from media_cache import atomic_write_bytes
 import asyncio
 import edge_tts
 
-# Default colors
-BG_COLOR_PINK = (255, 192, 203) # Pink
-BG_COLOR_BLUE = (137, 207, 240) # Baby Blue
-GRID_COLOR = (255, 220, 230)
-TEXT_COLOR = (255, 255, 0) # Yellow
-STROKE_COLOR = (0, 0, 0)   # Black
-
 def get_ffmpeg_path() -> str:
     """Return local ffmpeg.exe if present, otherwise use ffmpeg from PATH."""
     local = os.path.join(os.getcwd(), "ffmpeg.exe")
@@ -59,17 +31,11 @@ def post_process_audio(input_path: str) -> bool:
         base, ext = os.path.splitext(input_path)
         output_path = f"{base}_calm{ext or '.mp3'}"
 
-        filter_chain = (
-            "acompressor=ratio=2:threshold=-18dB:attack=10:release=250:makeup=1.5,"
-            "equalizer=f=6000:t=h:w=250:g=-4,"
-            "highpass=f=60,"
-            "loudnorm=I=-20:LRA=7:TP=-2.0"
-        )
 
         cmd = [
             ffmpeg, "-hide_banner", "-nostats", "-loglevel", "error",
             "-y", "-i", input_path,
-            "-af", filter_chain,
+            "-af", CALM_FILTER_CHAIN,
             "-c:a", "libmp3lame", "-b:a", "160k",
             output_path
         ]
@@ -88,28 +54,28 @@ def post_process_audio(input_path: str) -> bool:
         return False
 
 def download_image_from_ddg(query, filename):
-    """Downloads an image from DuckDuckGo."""
-    print(f"🔍 Searching image for: {query}")
-    try:
-        # Use DDGS context manager
-        with DDGS() as ddgs:
-            # Fetch 1 image
-            results = list(ddgs.images(query, max_results=1))
-            if results:
-                image_url = results[0]['image']
-                # Download
-                response = requests.get(image_url, stream=True, timeout=10)
-                if response.status_code == 200:
-                    with open(filename, 'wb') as f:
-                        response.raw.decode_content = True
-                        shutil.copyfileobj(response.raw, f)
-                    return filename
-    except Exception as e:
-        print(f"⚠️ Image Download Failed for '{query}': {e}")
-    return None
+    """Downloads an image from DuckDuckGo (through the shared, rate-limited web image cache)."""
+    return copy_image(ImagePrefetcher().resolve(query), filename)
+
+def fallback_image_search_term(question):
+    """Search term for a question when no generator is available: its longest meaningful word."""
+    # Remove common words, take longest remaining
+    words = question.split()
+    clean_words = [w.strip("?,.!\"'").lower() for w in words if len(w) > 3]
+    # Filter common stop words (keep nouns like color, movie, song)
+    stop_words = ["what", "where", "when", "which", "does", "this", "that", "have", "make", "like", "love", "prefer", "would", "could", "should"]
+    meaningful = [w for w in clean_words if w not in stop_words]
+    if meaningful:
+        # Prefer nouns if possible (this is a simple length heuristic though)
+        return max(meaningful, key=len)
+    # If literally nothing (e.g. "What is it?"), try generic
+    return "abstract art"
 
 def generate_audio(text, filename, voice="en-US-AriaNeural", reference_audio=None):
-    """Generates TTS audio using Chatterbox (cloning) or Edge TTS (standard)."""
+    """Generates TTS audio using Chatterbox (cloning) or Edge TTS (standard).
+    Finished (post-processed) audio is shared through the TTS cache."""
+    cache = get_tts_cache()
+    fmt = os.path.splitext(filename)[1]
     
     # 0. Try Cloning first if reference provided
     if reference_audio and os.path.exists(reference_audio):
@@ -118,11 +84,17 @@ def generate_audio(text, filename, voice="en-US-AriaNeural", reference_audio=Non
                 try: os.remove(filename)
                 except: pass
                 
-            print(f"🎙️ Attempting voice cloning using {reference_audio}...")
-            if generate_cloned_audio(text, filename, reference_audio):
-                # Post-process cloned audio too
-                if post_process_audio(filename):
-                    return filename
+            def _clone():
+                print(f"🎙️ Attempting voice cloning using {reference_audio}...")
+                res = generate_cloned_audio(text, filename, reference_audio)
+                ok = res[0] if isinstance(res, tuple) else res
+                # Post-process cloned audio too; a failed pass must not be cached
+                return bool(ok) and post_process_audio(filename)
+
+            key = tts_cache_key(text, "chatterbox", reference_audio=reference_audio,
+                                post_process=CALM_FILTER_CHAIN, fmt=fmt)
+            ok, _ = cache.cached(key, filename, _clone)
+            if ok:
                 return filename
             else:
                 print("⚠️ Cloning failed. Falling back to Edge TTS.")
@@ -135,28 +107,49 @@ def generate_audio(text, filename, voice="en-US-AriaNeural", reference_audio=Non
             try: os.remove(filename)
             except: pass
             
-        print(f"🎙️ Generating Edge TTS ({voice}): {text[:30]}...")
-        async def _run_edge():
-            communicate = edge_tts.Communicate(text, voice)
-            await communicate.save(filename)
+        def _edge():
+            print(f"🎙️ Generating Edge TTS ({voice}): {text[:30]}...")
+            async def _run_edge():
+                communicate = edge_tts.Communicate(text, voice)
+                await communicate.save(filename)
+                
+            asyncio.run(_run_edge())
             
-        asyncio.run(_run_edge())
-        
-        if os.path.exists(filename) and os.path.getsize(filename) > 100:
-             # Post-process
-             if post_process_audio(filename):
-                 return filename
-             return filename
-        else:
+            if os.path.exists(filename) and os.path.getsize(filename) > 100:
+                 # Post-process
+                 return post_process_audio(filename)
             print(f"❌ Edge TTS failed (empty file): {filename}")
+            return False
+
+        key = tts_cache_key(text, "edge", voice, post_process=CALM_FILTER_CHAIN, fmt=fmt)
+        ok, _ = cache.cached(key, filename, _edge)
+        if ok:
+            return filename
             
     except Exception as e:
         print(f"❌ Edge TTS Error: {e}")
         
     return None
 
+def generate_audio_batch(items, voice="en-US-AriaNeural"):
+    """Edge TTS for many (text, filename) pairs at once through the concurrent scheduler.
+    Returns a list aligned with items: filename on success, None on failure
+    (same contract as generate_audio without a reference voice)."""
+    if not items:
+        return []
+    for _, filename in items:
+        if os.path.exists(filename):
+            try: os.remove(filename)
+            except: pass
+    scheduler = TTSScheduler(post_process=post_process_audio, post_process_key=CALM_FILTER_CHAIN)
+    results = scheduler.run([{"text": text, "output": filename, "voice": voice} for text, filename in items])
+    print(f"🎙️ {scheduler.summary()}")
+    return [r["output"] if r["ok"] else None for r in results]
+
 USED_QUESTIONS_FILE = "used_quiz_questions.txt"
 USED_LONG_QUESTIONS_FILE = "used_long_quiz_questions.txt"
+# Auto-mode shorts stop at ~30s (about four questions), so images are fetched this many questions ahead
+QUIZ_IMAGE_WINDOW = 4
 
 def load_used_questions(file_path=USED_QUESTIONS_FILE):
     if not os.path.exists(file_path):
@@ -364,445 +357,19 @@ def fetch_long_questions_from_api(amount=20):
         
     return final_questions
 
-def create_landscape_slide(text, options=None, correct_idx=None, width=1920, height=1080, type="question", show_answer=False):
-    """Creates a landscape 16:9 slide with options."""
-    img = create_background(width, height) # We'll need to update create_background to handle size or just use Image.new here
-    
-    # Override create_background logic for landscape if needed, but the existing one takes w,h
-    # Re-drawing background to be safe as the existing one draws grid based on hardcoded step maybe?
-    # Existing create_background uses BG_COLOR and draws grid.
-    
-    draw = ImageDraw.Draw(img)
-    
-    # Fonts
-    try:
-        font_large = ImageFont.truetype("arialbd.ttf", 90)
-        font_option = ImageFont.truetype("arial.ttf", 60)
-        font_header = ImageFont.truetype("arialbd.ttf", 120)
-    except IOError:
-        font_large = ImageFont.load_default()
-        font_option = ImageFont.load_default()
-        font_header = ImageFont.load_default()
-
-    # Draw Title/Question
-    # Split text into lines
-    lines = textwrap.wrap(text, width=40)
-    y_text = 150
-    for line in lines:
-        bbox = draw.textbbox((0, 0), line, font=font_large)
-        text_w = bbox[2] - bbox[0]
-        x_text = (width - text_w) // 2
-        draw_text_with_outline(draw, (x_text, y_text), line, font_large, TEXT_COLOR, STROKE_COLOR, 3)
-        y_text += bbox[3] - bbox[1] + 20
-
-    # Draw Options
-    if options:
-        y_start = 500
-        # 2x2 Grid or List? List is easier to read.
-        # Let's do a 2x2 grid for "engaging" look or centered list.
-        # 4 options.
-        
-        # Option Box Config
-        box_w = 800
-        box_h = 100
-        margin_x = 100
-        margin_y = 50
-        
-        # Coordinates for 2 columns
-        # Col 1: X = width/2 - box_w - margin_x/2
-        # Col 2: X = width/2 + margin_x/2
-        
-        positions = [
-            (width//2 - box_w - 20, y_start),          # Top Left
-            (width//2 + 20, y_start),                  # Top Right
-            (width//2 - box_w - 20, y_start + box_h + 30), # Bottom Left
-            (width//2 + 20, y_start + box_h + 30)      # Bottom Right
-        ]
-        
-        labels = ["A", "B", "C", "D"]
-        
-        for i, option in enumerate(options):
-            if i >= 4: break
-            
-            x, y = positions[i]
-            
-            # Determine Color
-            fill_color = (255, 255, 255) # White box
-            text_col = (0, 0, 0)
-            
-            if show_answer and i == correct_idx:
-                fill_color = (0, 255, 0) # Green for correct
-            
-            # Draw Box
-            draw.rectangle([x, y, x+box_w, y+box_h], fill=fill_color, outline=(0,0,0), width=4)
-            
-            # Draw Text
-            opt_text = f"{labels[i]}. {option}"
-            bbox = draw.textbbox((0, 0), opt_text, font=font_option)
-            tw = bbox[2] - bbox[0]
-            th = bbox[3] - bbox[1]
-            
-            # Center text in box
-            tx = x + (box_w - tw) // 2
-            ty = y + (box_h - th) // 2
-            
-            draw.text((tx, ty), opt_text, font=font_option, fill=text_col)
-
-    # Save
-    fd, filename = tempfile.mkstemp(suffix=".png")
-    os.close(fd)
-    img.save(filename)
-    return filename
-
 def generate_beep_wav(filename, duration=0.1, freq=1000):
-    """Generate a sine wave beep using standard library."""
-    sample_rate = 44100
-    n_samples = int(sample_rate * duration)
-    
-    with wave.open(filename, 'w') as obj:
-        obj.setnchannels(1) # mono
-        obj.setsampwidth(2) # 2 bytes (16 bit)
-        obj.setframerate(sample_rate)
-        
-        data = []
-        for i in range(n_samples):
-            value = int(32767.0 * 0.3 * math.sin(2.0 * math.pi * freq * i / sample_rate))
-            data.append(struct.pack('<h', value))
-            
-        obj.writeframes(b''.join(data))
-    return filename
-
-def generate_whoosh_wav(filename, duration=0.5):
-    """Generate a white noise whoosh."""
-    sample_rate = 44100
-    n_samples = int(sample_rate * duration)
-    with wave.open(filename, 'w') as obj:
-        obj.setnchannels(1)
-        obj.setsampwidth(2)
-        obj.setframerate(sample_rate)
-        data = []
-        for i in range(n_samples):
-            # Simple white noise with envelope
-            noise = random.uniform(-1, 1)
-            # Envelope: fade in, fade out
-            t = i / n_samples
-            envelope = 4 * t * (1 - t) # Parabolic
-            value = int(32767.0 * 0.3 * noise * envelope)
-            data.append(struct.pack('<h', value))
-        obj.writeframes(b''.join(data))
-    return filename
-
-def generate_ding_wav(filename, duration=1.0, freq=2000):
-    """Generate a high pitch ding with decay."""
-    sample_rate = 44100
-    n_samples = int(sample_rate * duration)
-    with wave.open(filename, 'w') as obj:
-        obj.setnchannels(1)
-        obj.setsampwidth(2)
-        obj.setframerate(sample_rate)
-        data = []
-        for i in range(n_samples):
-            t = i / sample_rate
-            # Exponential decay
-            envelope = math.exp(-5 * t)
-            value = int(32767.0 * 0.3 * math.sin(2.0 * math.pi * freq * t) * envelope)
-            data.append(struct.pack('<h', value))
-        obj.writeframes(b''.join(data))
-    return filename
-
-def create_countdown_slide(base_img_path, number):
-    """Overlay a large number on the existing slide."""
-    with Image.open(base_img_path) as img:
-        img = img.convert("RGB")
-        draw = ImageDraw.Draw(img)
-        width, height = img.size
-        
-        try:
-            font = ImageFont.truetype("arialbd.ttf", 300)
-        except:
-            font = ImageFont.load_default()
-            
-        text = str(number)
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_w = bbox[2] - bbox[0]
-        text_h = bbox[3] - bbox[1]
-        x = (width - text_w) // 2
-        y = (height - text_h) // 2
-        
-        # Stroke (Black)
-        stroke_width = 8
-        for adj in range(-stroke_width, stroke_width+1):
-            for adj2 in range(-stroke_width, stroke_width+1):
-                draw.text((x+adj, y+adj2), text, font=font, fill=(0,0,0))
-        
-        # Fill (White)
-        draw.text((x, y), text, font=font, fill=(255, 255, 255))
-        
-        fd, filename = tempfile.mkstemp(suffix=".png")
-        os.close(fd)
-        img.save(filename)
-        return filename
-
-def generate_ding_wav(filename, duration=0.5, freq=800):
-    """Generate a 'ding' sound (sine wave with decay)."""
-    sample_rate = 44100
-    n_samples = int(sample_rate * duration)
-    
-    with wave.open(filename, 'w') as obj:
-        obj.setnchannels(1)
-        obj.setsampwidth(2)
-        obj.setframerate(sample_rate)
-        
-        data = []
-        for i in range(n_samples):
-            t = i / sample_rate
-            # Decay envelope: e^(-5t)
-            envelope = math.exp(-5 * t)
-            value = int(32767.0 * 0.5 * envelope * math.sin(2.0 * math.pi * freq * t))
-            data.append(struct.pack('<h', value))
-            
-        obj.writeframes(b''.join(data))
+    """Write a sine wave beep to filename (prefer sfx_bank.get_sound_bank().path("beep", ...))."""
+    atomic_write_bytes(filename, wav_bytes(get_sound_bank().samples("beep", duration=duration, freq=freq)))
     return filename
 
 def generate_whoosh_wav(filename, duration=0.3):
-    """Generate a 'whoosh' sound (white noise with rise/fall envelope)."""
-    sample_rate = 44100
-    n_samples = int(sample_rate * duration)
-    
-    with wave.open(filename, 'w') as obj:
-        obj.setnchannels(1)
-        obj.setsampwidth(2)
-        obj.setframerate(sample_rate)
-        
-        data = []
-        for i in range(n_samples):
-            t = i / duration
-            # Rise and fall envelope (sine squared)
-            envelope = math.sin(math.pi * t) ** 2
-            # White noise
-            noise = random.uniform(-1, 1)
-            value = int(32767.0 * 0.3 * envelope * noise)
-            data.append(struct.pack('<h', value))
-            
-        obj.writeframes(b''.join(data))
+    """Write a 'whoosh' (seeded white noise, rise/fall envelope) to filename."""
+    atomic_write_bytes(filename, wav_bytes(get_sound_bank().samples("whoosh", duration=duration)))
     return filename
 
-def strip_emojis(text):
-    """Removes emojis and cleans text."""
-    # Remove specific emojis
-    remove_list = ["❤️", "🔥", "🧠", "😱", "🍔", "🏆", "🤔", "🍕", "👫", "💄", "🎮", "💅", "👗", "👠", "👛", "⚽", "🍺"]
-    for char in remove_list:
-        text = text.replace(char, "")
-    return text.strip()
-
-def draw_heart(draw, x, y, size, color=(255, 0, 0)):
-    """Draws a smooth heart shape using parametric equation."""
-    # Parametric heart formula
-    # x = 16 * sin(t)^3
-    # y = 13 * cos(t) - 5 * cos(2*t) - 2 * cos(3*t) - cos(4*t)
-    
-    scale = size / 35.0
-    points = []
-    steps = 100
-    
-    for i in range(steps):
-        t = (i / steps) * 2 * math.pi
-        
-        # Calculate raw coords
-        raw_x = 16 * math.pow(math.sin(t), 3)
-        raw_y = 13 * math.cos(t) - 5 * math.cos(2*t) - 2 * math.cos(3*t) - math.cos(4*t)
-        
-        # Transform to screen coords (Flip Y because screen Y is down)
-        px = x + raw_x * scale
-        py = y - raw_y * scale
-        
-        points.append((px, py))
-        
-    draw.polygon(points, fill=color, outline=(0,0,0), width=4)
-
-def draw_fire(draw, x, y, size):
-    """Draws a flame shape."""
-    color_outer = (255, 69, 0)
-    color_inner = (255, 255, 0)
-    
-    # Outer Flame
-    draw.ellipse([x - size//2, y, x + size//2, y + size], fill=color_outer)
-    draw.polygon([(x - size//2, y + size//2), (x + size//2, y + size//2), (x, y - size//2)], fill=color_outer)
-    
-    # Inner Flame
-    s = size // 2
-    draw.ellipse([x - s//2, y + s//2, x + s//2, y + s + s//2], fill=color_inner)
-    draw.polygon([(x - s//2, y + s), (x + s//2, y + s), (x, y)], fill=color_inner)
-
-def draw_star(draw, x, y, size, color=(255, 215, 0)):
-    """Draws a star."""
-    points = []
-    for i in range(10):
-        angle = i * 36 * math.pi / 180 - math.pi / 2
-        r = size if i % 2 == 0 else size * 0.4
-        px = x + r * math.cos(angle)
-        py = y + r * math.sin(angle)
-        points.append((px, py))
-    draw.polygon(points, fill=color, outline=(0,0,0), width=3)
-
-def create_background(width=1080, height=1920, theme_color=None):
-    """Creates a gradient background with grid."""
-    
-    if theme_color:
-        top_color = theme_color
-        # Create a complementary bottom color (shift hue or darken)
-        # Simple darken: 0.7x
-        bottom_color = (int(theme_color[0]*0.7), int(theme_color[1]*0.7), int(theme_color[2]*0.7))
-        # Or shift towards purple/blue for aesthetic?
-        # If blue (137, 207, 240) -> Darker Blue
-        # If pink (255, 192, 203) -> Darker Pink/Red
-    else:
-        # Default Gradient: Pink to Purple
-        top_color = (255, 105, 180) # Hot Pink
-        bottom_color = (147, 112, 219) # Medium Purple
-    
-    img = Image.new('RGB', (width, height), top_color)
-    draw = ImageDraw.Draw(img)
-    
-    # Draw Gradient
-    for y in range(height):
-        r = int(top_color[0] + (bottom_color[0] - top_color[0]) * y / height)
-        g = int(top_color[1] + (bottom_color[1] - top_color[1]) * y / height)
-        b = int(top_color[2] + (bottom_color[2] - top_color[2]) * y / height)
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-
-    # Draw grid (white with low opacity? PIL doesn't support alpha on RGB draw easily without composition)
-    # We'll just use a light color for grid lines
-    grid_color = (255, 255, 255)
-    
-    step = 100
-    # Draw thicker, more sparse grid for "modern" look
-    for x in range(0, width, step):
-        width_line = 1 if x % 200 != 0 else 3
-        draw.line([(x, 0), (x, height)], fill=grid_color, width=width_line)
-    for y in range(0, height, step):
-        width_line = 1 if y % 200 != 0 else 3
-        draw.line([(0, y), (width, y)], fill=grid_color, width=width_line)
-        
-    return img
-
-def draw_text_with_outline(draw, position, text, font, fill_color, outline_color, outline_width=2):
-    x, y = position
-    # Draw outline
-    for adj in range(-outline_width, outline_width+1):
-        for adj2 in range(-outline_width, outline_width+1):
-            draw.text((x+adj, y+adj2), text, font=font, fill=outline_color)
-    # Draw text
-    draw.text((x, y), text, font=font, fill=fill_color)
-
-def create_slide(text, subtext=None, width=1080, height=1920, type="question", theme_color=None, image_path=None):
-    """Creates a slide image."""
-    img = create_background(width, height, theme_color=theme_color)
-    draw = ImageDraw.Draw(img)
-    
-    # Detect icons BEFORE stripping
-    show_heart = "❤️" in text or "COUPLES" in text.upper() or "PARTNER" in text.upper()
-    show_fire = "🔥" in text or "HARD" in text.upper() or "TEST" in text.upper()
-    show_star = "🌟" in text or "WIN" in text.upper()
-    
-    # Clean text
-    text = strip_emojis(text)
-    if subtext:
-        subtext = strip_emojis(subtext)
-    
-    # Load fonts (try to find a bold font)
-    try:
-        font_large = ImageFont.truetype("arialbd.ttf", 80)
-        font_small = ImageFont.truetype("arial.ttf", 50)
-        font_level = ImageFont.truetype("arialbd.ttf", 60)
-    except IOError:
-        font_large = ImageFont.load_default()
-        font_small = ImageFont.load_default()
-        font_level = ImageFont.load_default()
-
-    # Draw Title/Question
-    # Increase width for wrapping to avoid too many short lines
-    lines = textwrap.wrap(text, width=25)
-    
-    # Layout adjustments
-    y_text = 400 # Default start
-    if image_path:
-        y_text = 150 # Move text up significantly if image present
-    
-    # Draw Icons if detected (Above text)
-    icon_y = y_text - 120
-    icon_size = 100
-    if show_heart:
-        draw_heart(draw, width//2, icon_y, icon_size)
-    elif show_fire:
-        draw_fire(draw, width//2, icon_y, icon_size)
-    elif show_star:
-        draw_star(draw, width//2, icon_y, icon_size)
-
-    # Draw Text
-    for line in lines:
-        # Get text size (bbox)
-        bbox = draw.textbbox((0, 0), line, font=font_large)
-        text_w = bbox[2] - bbox[0]
-        text_h = bbox[3] - bbox[1]
-        
-        x_text = (width - text_w) // 2
-        draw_text_with_outline(draw, (x_text, y_text), line, font_large, TEXT_COLOR, STROKE_COLOR, 5)
-        y_text += text_h + 20
-
-    # Draw Image if provided
-    if image_path and os.path.exists(image_path):
-        try:
-            with Image.open(image_path) as q_img:
-                q_img = q_img.convert("RGBA")
-                
-                # Resize to fit max width/height
-                max_w = 800
-                max_h = 600
-                
-                # Calculate aspect ratio
-                ratio = min(max_w / q_img.width, max_h / q_img.height)
-                new_size = (int(q_img.width * ratio), int(q_img.height * ratio))
-                q_img = q_img.resize(new_size, Image.Resampling.LANCZOS)
-                
-                # Center horizontally
-                img_x = (width - new_size[0]) // 2
-                # Place below text (y_text is currently at end of text)
-                img_y = y_text + 50
-                
-                # Draw border/shadow
-                shadow = Image.new('RGBA', (new_size[0]+20, new_size[1]+20), (0,0,0,100))
-                img.paste(shadow, (img_x-10, img_y+10), shadow)
-                
-                # Paste image (handle transparency)
-                img.paste(q_img, (img_x, img_y), q_img)
-                
-                # Update y_text to be below image for subtext
-                y_text = img_y + new_size[1] + 50
-        except Exception as e:
-            print(f"⚠️ Failed to load image {image_path}: {e}")
-
-    # Draw Subtext/Answer if present
-    if subtext:
-        # If no image, add some padding
-        if not image_path:
-            y_text += 100
-            
-        bbox = draw.textbbox((0, 0), subtext, font=font_small)
-        text_w = bbox[2] - bbox[0]
-        x_text = (width - text_w) // 2
-        draw_text_with_outline(draw, (x_text, y_text), subtext, font_small, (255, 255, 255), STROKE_COLOR, 4)
-
-    # Draw Level (Bottom)
-    level_text = "Level: HARD"
-    bbox = draw.textbbox((0, 0), level_text, font=font_level)
-    text_w = bbox[2] - bbox[0]
-    draw_text_with_outline(draw, ((width - text_w) // 2, height - 200), level_text, font_level, (255, 0, 0), STROKE_COLOR, 2)
-    
-    # Save to temp file
-    fd, filename = tempfile.mkstemp(suffix=".png")
-    os.close(fd)
-    img.save(filename)
+def generate_ding_wav(filename, duration=0.5, freq=800):
+    """Write a 'ding' (sine wave with decay) to filename."""
+    atomic_write_bytes(filename, wav_bytes(get_sound_bank().samples("ding", duration=duration, freq=freq)))
     return filename
 
 # Funny replacements dictionary
@@ -979,21 +546,15 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
     questions: list of dict {'q': 'Question?', 'a': 'Answer'}
     auto_mode: If True, fetches questions automatically and fits them into 30-58s duration.
     """
-    clips = []
+    timeline = QuizTimeline((1080, 1920))
     temp_files = []
     final_questions_used = []
 
     try:
-        # Generate Common SFX
-        whoosh_file = f"temp_whoosh_{random.randint(0,1000)}.wav"
-        generate_whoosh_wav(whoosh_file)
-        temp_files.append(whoosh_file)
-        whoosh_audio = AudioFileClip(whoosh_file)
-
-        ding_file = f"temp_ding_{random.randint(0,1000)}.wav"
-        generate_ding_wav(ding_file)
-        temp_files.append(ding_file)
-        ding_audio = AudioFileClip(ding_file)
+        # Common SFX: shared files from the sound-effect bank (not temp files, never deleted here)
+        sfx = get_sound_bank()
+        whoosh_file = sfx.path("whoosh")
+        ding_file = sfx.path("ding")
 
         # Determine Video Theme/Gender
         # Randomly decide if this video is for Him or Her
@@ -1087,8 +648,7 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
                     current_voice_ref = p
                     break
             
-        intro_img = create_slide(intro_text, type="intro", theme_color=current_theme_color)
-        temp_files.append(intro_img)
+        intro_img = render_slide(intro_text, type="intro", theme_color=current_theme_color)
         
         # Faster Intro Audio
         intro_audio_path = generate_audio(intro_audio_text, f"temp_intro_{random.randint(0,1000)}.mp3", reference_audio=current_voice_ref)
@@ -1096,14 +656,10 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
         
         if intro_audio_path:
             temp_files.append(intro_audio_path)
-            intro_audio = AudioFileClip(intro_audio_path)
-            intro_duration = intro_audio.duration + 0.1 # Reduced buffer for snappiness
-            # Add Zoom Effect (Disabled)
-            intro_clip = ImageClip(intro_img).set_duration(intro_duration).set_audio(intro_audio)
-            # intro_clip = intro_clip.resize(lambda t: 1 + 0.05*t)
-            clips.append(intro_clip)
+            intro_duration = media_duration(intro_audio_path) + 0.1 # Reduced buffer for snappiness
+            timeline.add_slide(intro_img, intro_duration, audio=[(intro_audio_path, 0)])
         else:
-            clips.append(ImageClip(intro_img).set_duration(intro_duration))
+            timeline.add_slide(intro_img, intro_duration)
 
         current_duration = intro_duration
         
@@ -1153,6 +709,31 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
              except:
                  gen = None
 
+        # --- Fetch Images ---
+        # One batched search-term request, then the images (with their fallbacks)
+        # fetched in parallel: every question in manual mode, a window ahead of
+        # the loop in auto mode so questions that never air don't spend the DDG
+        # budget; repeats come from the web image cache
+        search_terms = []
+        if gen:
+            try:
+                search_terms = gen.extract_image_search_terms([q['q'] for q in source_questions])
+            except Exception as e:
+                print(f"⚠️ Failed to extract keywords: {e}")
+        search_terms = [(search_terms[i] if i < len(search_terms) else None) or fallback_image_search_term(q['q'])
+                        for i, q in enumerate(source_questions)]
+        prefetcher = ImagePrefetcher()
+        image_window = QUIZ_IMAGE_WINDOW if auto_mode else max(1, len(source_questions))
+        image_entries = {}
+
+        def question_image(i):
+            if i not in image_entries:
+                window = range(i, min(i + image_window, len(source_questions)))
+                fetched = prefetcher.prefetch(
+                    [[search_terms[j], f"minimalist {search_terms[j]}", "aesthetic background"] for j in window])
+                image_entries.update(zip(window, fetched))
+            return image_entries[i]
+
         for i, q in enumerate(source_questions):
             # Check if we are approaching the limit (auto_mode only)
             if auto_mode and current_duration >= 30:
@@ -1160,103 +741,35 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
                  print(f"DEBUG: Reached duration limit {current_duration}s. Stopping.")
                  break
             
-            # --- Fetch Image ---
-            q_image_path = None
-            search_term = None
-            
-            # 1. Try to get search term from Gen (LLM/Heuristic)
-            if gen:
-                try:
-                    search_term = gen.extract_image_search_term(q['q'])
-                except Exception as e:
-                    print(f"⚠️ Failed to extract keyword: {e}")
-            
-            # 2. Fallback Heuristic if no search term
-            if not search_term:
-                 # Remove common words, take longest remaining
-                 words = q['q'].split()
-                 clean_words = [w.strip("?,.!\"'").lower() for w in words if len(w) > 3]
-                 # Filter common stop words (keep nouns like color, movie, song)
-                 stop_words = ["what", "where", "when", "which", "does", "this", "that", "have", "make", "like", "love", "prefer", "would", "could", "should"]
-                 meaningful = [w for w in clean_words if w not in stop_words]
-                 if meaningful:
-                     # Prefer nouns if possible (this is a simple length heuristic though)
-                     search_term = max(meaningful, key=len)
-                 else:
-                     # If literally nothing (e.g. "What is it?"), try generic
-                     search_term = "abstract art"
-            
-            print(f"🖼️  Image Search Term: {search_term}")
-            
-            if search_term:
-                # Add delay to avoid rate limiting
-                if i > 0:
-                    time.sleep(1.0)
-                    
-                # Try downloading
-                q_image_path = download_image_from_ddg(search_term, f"temp_q_img_{i}_{random.randint(0,1000)}.jpg")
-                
-                # Retry with simpler term if failed
-                if not q_image_path:
-                     print(f"⚠️ Image download failed for '{search_term}'. Retrying with 'minimalist {search_term}'...")
-                     time.sleep(1.0)
-                     q_image_path = download_image_from_ddg(f"minimalist {search_term}", f"temp_q_img_{i}_{random.randint(0,1000)}.jpg")
-
-                if q_image_path:
-                    temp_files.append(q_image_path)
-                else:
-                    # Final fallback to ensure an image exists
-                    print("⚠️ All image downloads failed. Using generic fallback.")
-                    time.sleep(1.0)
-                    q_image_path = download_image_from_ddg("aesthetic background", f"temp_q_img_{i}_fallback_{random.randint(0,1000)}.jpg")
-                    if q_image_path:
-                        temp_files.append(q_image_path)
+            print(f"🖼️  Image Search Term: {search_terms[i]}")
+            # Shared cache file: read by render_slide, never deleted here
+            q_image_entry = question_image(i)
+            q_image_path = q_image_entry["path"] if q_image_entry else None
+            if not q_image_path:
+                print("⚠️ All image downloads failed.")
 
             # --- Question ---
             # Remove "Q1:" prefix for cleaner look
             q_text_display = q['q']
             q_text_spoken = f"Question {i+1}. {q['q']}"
             
-            q_img = create_slide(q_text_display, theme_color=current_theme_color, image_path=q_image_path)
-            temp_files.append(q_img)
+            q_img = render_slide(q_text_display, theme_color=current_theme_color, image_path=q_image_path)
             
             q_audio_path = generate_audio(q_text_spoken, f"temp_q{i}_{random.randint(0,1000)}.mp3", reference_audio=current_voice_ref)
             q_dur = 5.0
-            q_clip = None
+            # Whoosh at start (0.0), TTS at 0.1 (Reduced from 0.2)
+            q_cues = [(whoosh_file, 0)]
             
             if q_audio_path:
                 temp_files.append(q_audio_path)
-                q_tts_audio = AudioFileClip(q_audio_path)
-                q_dur = q_tts_audio.duration + 0.2 # Reduced from 0.5
-                
-                # Composite TTS + Whoosh
-                # Whoosh at start (0.0), TTS at 0.1 (Reduced from 0.2)
-                q_final_audio = CompositeAudioClip([
-                    whoosh_audio.set_start(0),
-                    q_tts_audio.set_start(0.1)
-                ])
-                
-                q_clip = ImageClip(q_img).set_duration(q_dur).set_audio(q_final_audio)
-            else:
-                q_clip = ImageClip(q_img).set_duration(q_dur).set_audio(whoosh_audio)
+                q_dur = media_duration(q_audio_path) + 0.2 # Reduced from 0.5
+                q_cues.append((q_audio_path, 0.1))
             
             # --- Thinking Time (2s) ---
-            thinking_clips = []
-            thinking_dur = 0.0
-            for countdown in range(2, 0, -1):
-                # Visual: Number overlay
-                count_img = create_countdown_slide(q_img, countdown)
-                temp_files.append(count_img)
-                
-                # Audio: Beep (0.15s beep)
-                beep_file = f"temp_beep_{countdown}_{random.randint(0,1000)}.wav"
-                generate_beep_wav(beep_file, duration=0.15, freq=800 if countdown > 1 else 1200) # Higher pitch on 1
-                temp_files.append(beep_file)
-                
-                beep_audio = AudioFileClip(beep_file)
-                count_clip = ImageClip(count_img).set_duration(1.0).set_audio(beep_audio)
-                thinking_clips.append(count_clip)
-                thinking_dur += 1.0
+            # 2..1 over the question slide, 0.15s beeps baked in (higher pitch on 1)
+            countdown_file = render_countdown_clip(q_img, seconds=2, beep_duration=0.15, freq=800, final_freq=1200)
+            temp_files.append(countdown_file)
+            thinking_dur = 2.0
 
             # --- Answer ---
             # If Couples Quiz, SKIP the answer (User Request: "you do NOT have to give answers to these ones")
@@ -1264,22 +777,18 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
                 print(f"DEBUG: Skipping answer for Question {i+1} (Couples Quiz Mode)")
                 
                 # Add Question and Thinking Clips (which were previously skipped by 'continue')
-                clips.append(q_clip)
-                clips.extend(thinking_clips)
+                timeline.add_slide(q_img, q_dur, audio=q_cues)
+                timeline.add_clip(countdown_file, thinking_dur)
                 current_duration += q_dur + thinking_dur
 
                 # Add a transition/pause before next question
                 # User requested "wait atleast 2-3 seconds between questions"
                 # Thinking time is 2s. We add 1.5s transition -> Total ~3.5s wait.
                 
-                ding_file = f"temp_ding_transition_{random.randint(0,1000)}.wav"
-                generate_ding_wav(ding_file, duration=0.5, freq=1200) # Higher pitch ding
-                temp_files.append(ding_file)
-                ding_audio = AudioFileClip(ding_file)
+                transition_ding = sfx.path("ding", freq=1200) # Higher pitch ding
                 
                 # Keep showing the question image
-                transition_clip = ImageClip(q_img).set_duration(1.5).set_audio(ding_audio)
-                clips.append(transition_clip)
+                timeline.add_slide(q_img, 1.5, audio=[(transition_ding, 0)])
                 current_duration += 1.5
                 
                 # Skip the rest of answer logic
@@ -1298,28 +807,17 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
             else:
                 a_text_spoken = a_text_spoken_raw
             
-            a_img = create_slide(q_text_display, subtext=a_text_display, theme_color=current_theme_color)
-            temp_files.append(a_img)
+            a_img = render_slide(q_text_display, subtext=a_text_display, theme_color=current_theme_color)
             
             a_audio_path = generate_audio(a_text_spoken, f"temp_a{i}_{random.randint(0,1000)}.mp3", reference_audio=current_voice_ref)
             a_dur = 3.0
-            a_clip = None
+            # Ding at start (0.0), TTS at 0.2
+            a_cues = [(ding_file, 0)]
             
             if a_audio_path:
                 temp_files.append(a_audio_path)
-                a_tts_audio = AudioFileClip(a_audio_path)
-                a_dur = a_tts_audio.duration + 0.5
-                
-                # Composite TTS + Ding
-                # Ding at start (0.0), TTS at 0.1
-                a_final_audio = CompositeAudioClip([
-                    ding_audio.set_start(0),
-                    a_tts_audio.set_start(0.2)
-                ])
-
-                a_clip = ImageClip(a_img).set_duration(a_dur).set_audio(a_final_audio)
-            else:
-                a_clip = ImageClip(a_img).set_duration(a_dur).set_audio(ding_audio)
+                a_dur = media_duration(a_audio_path) + 0.5
+                a_cues.append((a_audio_path, 0.2))
 
             # Check Total Duration BEFORE adding to main list
             segment_duration = q_dur + thinking_dur + a_dur
@@ -1329,9 +827,9 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
                     break
             
             # Add to main list
-            clips.append(q_clip)
-            clips.extend(thinking_clips)
-            clips.append(a_clip)
+            timeline.add_slide(q_img, q_dur, audio=q_cues)
+            timeline.add_clip(countdown_file, thinking_dur)
+            timeline.add_slide(a_img, a_dur, audio=a_cues)
             current_duration += segment_duration
             final_questions_used.append(q)
             
@@ -1345,38 +843,16 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
         # NO OUTRO - Loop effect (User requested viral style)
         # We just end on the last answer.
 
-        # Concatenate
-        final_video = concatenate_videoclips(clips, method="compose")
-        
-        # Add Background Music (Funny Audio)
+        # Assemble (ffmpeg: still segments + concat demuxer, one audio mix)
+        # Add Background Music (Funny Audio) at 20%
         bg_music_path = os.path.join("assets", "funny_bg.mp3")
         if os.path.exists(bg_music_path):
-            try:
-                print(f"Adding background music from {bg_music_path}")
-                bg_music = AudioFileClip(bg_music_path)
-                
-                # Loop logic: concatenate self until long enough
-                if bg_music.duration < final_video.duration:
-                    loop_count = int(final_video.duration / bg_music.duration) + 2
-                    bg_clips = [bg_music] * loop_count
-                    bg_music = concatenate_audioclips(bg_clips)
-                
-                # Trim to video length
-                bg_music = bg_music.subclipped(0, final_video.duration)
-                
-                # Lower volume (20%)
-                bg_music = bg_music.volumex(0.20)
-                
-                # Composite
-                final_audio = CompositeAudioClip([final_video.audio, bg_music])
-                final_video.audio = final_audio
-            except Exception as e:
-                print(f"⚠️ Failed to add background music: {e}")
+            print(f"Adding background music from {bg_music_path}")
         else:
             print(f"ℹ️ No background music found at {bg_music_path}. Skipping.")
         
         # Export
-        final_video.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac", ffmpeg_params=["-pix_fmt", "yuv420p"])
+        timeline.render(output_path, music=bg_music_path, music_volume=0.20)
         
         # --- Generate YouTube Title & Metadata ---
         is_couples_check = "COUPLES" in intro_text.upper()
@@ -1399,6 +875,7 @@ def generate_quiz_video(questions=None, output_path="quiz_output.mp4", auto_mode
         
     finally:
         # Cleanup
+        timeline.close()
         for f in temp_files:
             if os.path.exists(f):
                 try:
@@ -1410,7 +887,7 @@ def generate_long_quiz_video(output_path="long_quiz_output.mp4"):
     """
     Generates a 15-25 minute landscape quiz video with 4 choices and 10s thinking time.
     """
-    clips = []
+    timeline = QuizTimeline((1920, 1080))
     temp_files = []
     final_questions_used = []
     
@@ -1420,19 +897,17 @@ def generate_long_quiz_video(output_path="long_quiz_output.mp4"):
     try:
         # Intro
         intro_text = "Ultimate General Knowledge Quiz!\n\nCan you get them all right?"
-        intro_img = create_landscape_slide(intro_text, type="intro")
-        temp_files.append(intro_img)
+        intro_img = render_landscape_slide(intro_text, type="intro")
         
         intro_audio_path = generate_audio("Welcome to the Ultimate General Knowledge Quiz! Can you answer these questions correctly?", f"temp_intro_long_{random.randint(0,1000)}.mp3")
         
         intro_duration = 3.0
         if intro_audio_path:
             temp_files.append(intro_audio_path)
-            intro_audio = AudioFileClip(intro_audio_path)
-            intro_duration = intro_audio.duration + 0.5
-            clips.append(ImageClip(intro_img).set_duration(intro_duration).set_audio(intro_audio))
+            intro_duration = media_duration(intro_audio_path) + 0.5
+            timeline.add_slide(intro_img, intro_duration, audio=[(intro_audio_path, 0)])
         else:
-            clips.append(ImageClip(intro_img).set_duration(intro_duration))
+            timeline.add_slide(intro_img, intro_duration)
 
         current_duration = intro_duration
         
@@ -1450,6 +925,15 @@ def generate_long_quiz_video(output_path="long_quiz_output.mp4"):
                 else: # If we have some content, finish up.
                      break
                 
+            # Voice the whole batch concurrently (question + answer per item)
+            batch_items = []
+            for j, q in enumerate(questions):
+                n = len(final_questions_used) + j
+                batch_items.append((f"{q['q']}", f"temp_qlong_{n}_{random.randint(0,1000)}.mp3"))
+                batch_items.append((f"The answer is {q['a']}", f"temp_along_{n}_{random.randint(0,1000)}.mp3"))
+            batch_audio = generate_audio_batch(batch_items)
+            temp_files.extend(p for p in batch_audio if p)
+
             for i, q in enumerate(questions):
                 if current_duration >= TARGET_DURATION_MIN:
                     break
@@ -1460,100 +944,55 @@ def generate_long_quiz_video(output_path="long_quiz_output.mp4"):
                 q_text_spoken = f"{q['q']}" # Just read question
                 
                 # Create slide with options (no answer highlighted)
-                q_img = create_landscape_slide(q_text_display, options=q['options'])
-                temp_files.append(q_img)
+                q_img = render_landscape_slide(q_text_display, options=q['options'])
                 
-                q_audio_path = generate_audio(q_text_spoken, f"temp_qlong_{random.randint(0,1000)}.mp3")
+                q_audio_path = batch_audio[2 * i]
                 q_dur = 5.0
-                q_clip = None
                 
                 if q_audio_path:
                     temp_files.append(q_audio_path)
-                    q_audio = AudioFileClip(q_audio_path)
-                    q_dur = q_audio.duration + 0.5 # A bit of pause
-                    q_clip = ImageClip(q_img).set_duration(q_dur).set_audio(q_audio)
-                else:
-                    q_clip = ImageClip(q_img).set_duration(q_dur)
+                    q_dur = media_duration(q_audio_path) + 0.5 # A bit of pause
                 
-                clips.append(q_clip)
+                timeline.add_slide(q_img, q_dur, audio=[(q_audio_path, 0)])
                 current_duration += q_dur
                 
                 # --- Thinking Time (10s) ---
                 # Visual countdown on top of the question slide
-                for countdown in range(10, 0, -1):
-                    # Only create image for even numbers or every second to save time? 
-                    # User requested 10s thinking time.
-                    count_img = create_countdown_slide(q_img, countdown)
-                    temp_files.append(count_img)
-                    
-                    # Tick sound
-                    tick_file = f"temp_tick_{countdown}_{random.randint(0,1000)}.wav"
-                    generate_beep_wav(tick_file, duration=0.1, freq=800)
-                    temp_files.append(tick_file)
-                    
-                    tick_audio = AudioFileClip(tick_file)
-                    count_clip = ImageClip(count_img).set_duration(1.0).set_audio(tick_audio)
-                    clips.append(count_clip)
-                    current_duration += 1.0
+                # One pre-rendered clip per question (digits cached, tick track baked in)
+                countdown_file = render_countdown_clip(q_img, seconds=10, beep_duration=0.1, freq=800)
+                temp_files.append(countdown_file)
+                timeline.add_clip(countdown_file, 10.0)
+                current_duration += 10.0
                 
                 # --- Answer Slide ---
                 # Highlight correct answer
-                a_img = create_landscape_slide(q_text_display, options=q['options'], correct_idx=q['correct_idx'], show_answer=True)
-                temp_files.append(a_img)
+                a_img = render_landscape_slide(q_text_display, options=q['options'], correct_idx=q['correct_idx'], show_answer=True)
                 
                 a_text_spoken = f"The answer is {q['a']}"
-                a_audio_path = generate_audio(a_text_spoken, f"temp_along_{random.randint(0,1000)}.mp3")
+                a_audio_path = batch_audio[2 * i + 1]
                 
                 a_dur = 3.0
                 if a_audio_path:
                     temp_files.append(a_audio_path)
-                    a_audio = AudioFileClip(a_audio_path)
-                    a_dur = a_audio.duration + 0.5
-                    a_clip = ImageClip(a_img).set_duration(a_dur).set_audio(a_audio)
-                    clips.append(a_clip)
-                else:
-                    clips.append(ImageClip(a_img).set_duration(a_dur))
+                    a_dur = media_duration(a_audio_path) + 0.5
+                timeline.add_slide(a_img, a_dur, audio=[(a_audio_path, 0)])
                     
                 current_duration += a_dur
                 final_questions_used.append(q)
                 
         # Outro
         outro_text = "Thanks for watching!\nDon't forget to subscribe!"
-        outro_img = create_landscape_slide(outro_text, type="outro")
-        temp_files.append(outro_img)
-        clips.append(ImageClip(outro_img).set_duration(5))
+        outro_img = render_landscape_slide(outro_text, type="outro")
+        timeline.add_slide(outro_img, 5)
         
-        # Concatenate
-        print("Concatenating clips...")
-        final_video = concatenate_videoclips(clips, method="compose")
-        
-        # Background Music
+        # Assemble (ffmpeg: still segments + concat demuxer, one audio mix), background music at 15%
+        print(f"Assembling {len(timeline.segments)} segments ({timeline.duration:.0f}s)...")
         bg_music_path = os.path.join("assets", "funny_bg.mp3")
         if os.path.exists(bg_music_path):
-            try:
-                print(f"Adding background music from {bg_music_path}")
-                bg_music = AudioFileClip(bg_music_path)
-                
-                # Loop logic
-                if bg_music.duration < final_video.duration:
-                    loop_count = int(final_video.duration / bg_music.duration) + 2
-                    bg_clips = [bg_music] * loop_count
-                    bg_music = concatenate_audioclips(bg_clips)
-                
-                # Trim
-                bg_music = bg_music.subclipped(0, final_video.duration)
-                
-                # Volume
-                bg_music = bg_music.volumex(0.15)
-                
-                # Composite
-                final_audio = CompositeAudioClip([final_video.audio, bg_music])
-                final_video.audio = final_audio
-            except Exception as e:
-                print(f"⚠️ Failed to add background music: {e}")
-             
+            print(f"Adding background music from {bg_music_path}")
+
         print(f"Writing video to {output_path}...")
-        final_video.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac", ffmpeg_params=["-pix_fmt", "yuv420p"])
+        timeline.render(output_path, music=bg_music_path, music_volume=0.15)
         
         # Save used questions
         save_used_questions([q['q'] for q in final_questions_used], USED_LONG_QUESTIONS_FILE)
@@ -1562,6 +1001,7 @@ def generate_long_quiz_video(output_path="long_quiz_output.mp4"):
         return final_questions_used
 
     finally:
+        timeline.close()
         for f in temp_files:
             try:
                 if os.path.exists(f):
@@ -0,0 +1,380 @@
+"""
+Quiz slide rendering: portrait (shorts) and landscape (long-form) layouts.
+
+Every slide used to be drawn from scratch and saved to a temp PNG, which the
+video assembly then decoded again: the gradient background was drawn row by
+row for every slide and the fonts were reopened each time. Here:
+
+- fonts are loaded once per (file, size) (load_font);
+- the gradient + grid background is built once per (size, theme) with numpy
+  (background_layer) and each slide draws on a copy;
+- outlined text is rasterized once and stamped at each outline offset instead
+  of being re-rendered (2w+1)^2 times (same pixels);
+- finished slides are memoized by their parameters (render_slide,
+  render_landscape_slide), so repeated intros, outros and answer slides cost a
+  dictionary lookup. The images are shared and read-only;
+- quiz_assembler.QuizTimeline and quiz_countdown take these images directly and
+  pipe raw frames to ffmpeg, so no PNG is written and read back. create_slide,
+  create_landscape_slide and create_countdown_slide still write a temp PNG for
+  callers that want a file.
+"""
+import os
+import math
+import tempfile
+import textwrap
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from anim_cache import overlay_number
+
+# Default colors
+BG_COLOR_PINK = (255, 192, 203) # Pink
+BG_COLOR_BLUE = (137, 207, 240) # Baby Blue
+GRID_COLOR = (255, 220, 230)
+TEXT_COLOR = (255, 255, 0) # Yellow
+STROKE_COLOR = (0, 0, 0)   # Black
+
+# Rendered slides kept per process (~6 MB each at 1080x1920)
+SLIDE_CACHE_SIZE = int(os.environ.get("QUIZ_SLIDE_CACHE", "16"))
+
+@lru_cache(maxsize=32)
+def load_font(name, size):
+    """Truetype font, or PIL's default if it isn't installed. Shared across slides."""
+    try:
+        return ImageFont.truetype(name, size)
+    except IOError:
+        return ImageFont.load_default()
+
+def save_temp_png(img):
+    fd, filename = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    img.save(filename)
+    return filename
+
+def strip_emojis(text):
+    """Removes emojis and cleans text."""
+    # Remove specific emojis
+    remove_list = ["❤️", "🔥", "🧠", "😱", "🍔", "🏆", "🤔", "🍕", "👫", "💄", "🎮", "💅", "👗", "👠", "👛", "⚽", "🍺"]
+    for char in remove_list:
+        text = text.replace(char, "")
+    return text.strip()
+
+def draw_heart(draw, x, y, size, color=(255, 0, 0)):
+    """Draws a smooth heart shape using parametric equation."""
+    # Parametric heart formula
+    # x = 16 * sin(t)^3
+    # y = 13 * cos(t) - 5 * cos(2*t) - 2 * cos(3*t) - cos(4*t)
+    
+    scale = size / 35.0
+    points = []
+    steps = 100
+    
+    for i in range(steps):
+        t = (i / steps) * 2 * math.pi
+        
+        # Calculate raw coords
+        raw_x = 16 * math.pow(math.sin(t), 3)
+        raw_y = 13 * math.cos(t) - 5 * math.cos(2*t) - 2 * math.cos(3*t) - math.cos(4*t)
+        
+        # Transform to screen coords (Flip Y because screen Y is down)
+        px = x + raw_x * scale
+        py = y - raw_y * scale
+        
+        points.append((px, py))
+        
+    draw.polygon(points, fill=color, outline=(0,0,0), width=4)
+
+def draw_fire(draw, x, y, size):
+    """Draws a flame shape."""
+    color_outer = (255, 69, 0)
+    color_inner = (255, 255, 0)
+    
+    # Outer Flame
+    draw.ellipse([x - size//2, y, x + size//2, y + size], fill=color_outer)
+    draw.polygon([(x - size//2, y + size//2), (x + size//2, y + size//2), (x, y - size//2)], fill=color_outer)
+    
+    # Inner Flame
+    s = size // 2
+    draw.ellipse([x - s//2, y + s//2, x + s//2, y + s + s//2], fill=color_inner)
+    draw.polygon([(x - s//2, y + s), (x + s//2, y + s), (x, y)], fill=color_inner)
+
+def draw_star(draw, x, y, size, color=(255, 215, 0)):
+    """Draws a star."""
+    points = []
+    for i in range(10):
+        angle = i * 36 * math.pi / 180 - math.pi / 2
+        r = size if i % 2 == 0 else size * 0.4
+        px = x + r * math.cos(angle)
+        py = y + r * math.sin(angle)
+        points.append((px, py))
+    draw.polygon(points, fill=color, outline=(0,0,0), width=3)
+
+@lru_cache(maxsize=8)
+def background_layer(width=1080, height=1920, theme_color=None):
+    """Gradient background with grid, built once per (size, theme). Shared; draw on a copy."""
+    if theme_color:
+        top_color = theme_color
+        # Create a complementary bottom color (shift hue or darken)
+        # Simple darken: 0.7x
+        bottom_color = (int(theme_color[0]*0.7), int(theme_color[1]*0.7), int(theme_color[2]*0.7))
+    else:
+        # Default Gradient: Pink to Purple
+        top_color = (255, 105, 180) # Hot Pink
+        bottom_color = (147, 112, 219) # Medium Purple
+
+    # Gradient: one colour per row, same rounding as drawing it line by line
+    y = np.arange(height)[:, None]
+    top, bottom = np.array(top_color), np.array(bottom_color)
+    rows = (top + (bottom - top) * y / height).astype(np.uint8)
+    img = Image.fromarray(np.ascontiguousarray(np.broadcast_to(rows[:, None, :], (height, width, 3))))
+    draw = ImageDraw.Draw(img)
+
+    # Draw grid (white with low opacity? PIL doesn't support alpha on RGB draw easily without composition)
+    # We'll just use a light color for grid lines
+    grid_color = (255, 255, 255)
+    
+    step = 100
+    # Draw thicker, more sparse grid for "modern" look
+    for x in range(0, width, step):
+        width_line = 1 if x % 200 != 0 else 3
+        draw.line([(x, 0), (x, height)], fill=grid_color, width=width_line)
+    for y in range(0, height, step):
+        width_line = 1 if y % 200 != 0 else 3
+        draw.line([(0, y), (width, y)], fill=grid_color, width=width_line)
+
+    return img
+
+def create_background(width=1080, height=1920, theme_color=None):
+    """Creates a gradient background with grid."""
+    return background_layer(width, height, tuple(theme_color) if theme_color else None).copy()
+
+def draw_text_with_outline(draw, position, text, font, fill_color, outline_color, outline_width=2):
+    x, y = position
+    # Rasterize the text once and stamp it at every outline offset (same pixels
+    # as drawing the text (2w+1)^2 times, without re-rendering the glyphs each time)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    mask = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+    # Draw outline
+    for adj in range(-outline_width, outline_width+1):
+        for adj2 in range(-outline_width, outline_width+1):
+            draw.bitmap((x+adj+left, y+adj2+top), mask, fill=outline_color)
+    # Draw text
+    draw.text((x, y), text, font=font, fill=fill_color)
+
+@lru_cache(maxsize=SLIDE_CACHE_SIZE)
+def _render_slide(text, subtext, width, height, type, theme_color, image_stamp):
+    image_path = image_stamp[0] if image_stamp else None
+    img = background_layer(width, height, theme_color).copy()
+    draw = ImageDraw.Draw(img)
+    
+    # Detect icons BEFORE stripping
+    show_heart = "❤️" in text or "COUPLES" in text.upper() or "PARTNER" in text.upper()
+    show_fire = "🔥" in text or "HARD" in text.upper() or "TEST" in text.upper()
+    show_star = "🌟" in text or "WIN" in text.upper()
+    
+    # Clean text
+    text = strip_emojis(text)
+    if subtext:
+        subtext = strip_emojis(subtext)
+    
+    # Fonts (try to find a bold font; loaded once per process)
+    font_large = load_font("arialbd.ttf", 80)
+    font_small = load_font("arial.ttf", 50)
+    font_level = load_font("arialbd.ttf", 60)
+
+    # Draw Title/Question
+    # Increase width for wrapping to avoid too many short lines
+    lines = textwrap.wrap(text, width=25)
+    
+    # Layout adjustments
+    y_text = 400 # Default start
+    if image_path:
+        y_text = 150 # Move text up significantly if image present
+    
+    # Draw Icons if detected (Above text)
+    icon_y = y_text - 120
+    icon_size = 100
+    if show_heart:
+        draw_heart(draw, width//2, icon_y, icon_size)
+    elif show_fire:
+        draw_fire(draw, width//2, icon_y, icon_size)
+    elif show_star:
+        draw_star(draw, width//2, icon_y, icon_size)
+
+    # Draw Text
+    for line in lines:
+        # Get text size (bbox)
+        bbox = draw.textbbox((0, 0), line, font=font_large)
+        text_w = bbox[2] - bbox[0]
+        text_h = bbox[3] - bbox[1]
+        
+        x_text = (width - text_w) // 2
+        draw_text_with_outline(draw, (x_text, y_text), line, font_large, TEXT_COLOR, STROKE_COLOR, 5)
+        y_text += text_h + 20
+
+    # Draw Image if provided
+    if image_path and os.path.exists(image_path):
+        try:
+            with Image.open(image_path) as q_img:
+                q_img = q_img.convert("RGBA")
+                
+                # Resize to fit max width/height
+                max_w = 800
+                max_h = 600
+                
+                # Calculate aspect ratio
+                ratio = min(max_w / q_img.width, max_h / q_img.height)
+                new_size = (int(q_img.width * ratio), int(q_img.height * ratio))
+                q_img = q_img.resize(new_size, Image.Resampling.LANCZOS)
+                
+                # Center horizontally
+                img_x = (width - new_size[0]) // 2
+                # Place below text (y_text is currently at end of text)
+                img_y = y_text + 50
+                
+                # Draw border/shadow
+                shadow = Image.new('RGBA', (new_size[0]+20, new_size[1]+20), (0,0,0,100))
+                img.paste(shadow, (img_x-10, img_y+10), shadow)
+                
+                # Paste image (handle transparency)
+                img.paste(q_img, (img_x, img_y), q_img)
+                
+                # Update y_text to be below image for subtext
+                y_text = img_y + new_size[1] + 50
+        except Exception as e:
+            print(f"⚠️ Failed to load image {image_path}: {e}")
+
+    # Draw Subtext/Answer if present
+    if subtext:
+        # If no image, add some padding
+        if not image_path:
+            y_text += 100
+            
+        bbox = draw.textbbox((0, 0), subtext, font=font_small)
+        text_w = bbox[2] - bbox[0]
+        x_text = (width - text_w) // 2
+        draw_text_with_outline(draw, (x_text, y_text), subtext, font_small, (255, 255, 255), STROKE_COLOR, 4)
+
+    # Draw Level (Bottom)
+    level_text = "Level: HARD"
+    bbox = draw.textbbox((0, 0), level_text, font=font_level)
+    text_w = bbox[2] - bbox[0]
+    draw_text_with_outline(draw, ((width - text_w) // 2, height - 200), level_text, font_level, (255, 0, 0), STROKE_COLOR, 2)
+    
+    return img
+
+@lru_cache(maxsize=SLIDE_CACHE_SIZE)
+def _render_landscape_slide(text, options, correct_idx, width, height, type, show_answer):
+    img = background_layer(width, height, None).copy()
+    
+    # Override create_background logic for landscape if needed, but the existing one takes w,h
+    # Re-drawing background to be safe as the existing one draws grid based on hardcoded step maybe?
+    # Existing create_background uses BG_COLOR and draws grid.
+    
+    draw = ImageDraw.Draw(img)
+    
+    # Fonts (loaded once per process)
+    font_large = load_font("arialbd.ttf", 90)
+    font_option = load_font("arial.ttf", 60)
+
+    # Draw Title/Question
+    # Split text into lines
+    lines = textwrap.wrap(text, width=40)
+    y_text = 150
+    for line in lines:
+        bbox = draw.textbbox((0, 0), line, font=font_large)
+        text_w = bbox[2] - bbox[0]
+        x_text = (width - text_w) // 2
+        draw_text_with_outline(draw, (x_text, y_text), line, font_large, TEXT_COLOR, STROKE_COLOR, 3)
+        y_text += bbox[3] - bbox[1] + 20
+
+    # Draw Options
+    if options:
+        y_start = 500
+        # 2x2 Grid or List? List is easier to read.
+        # Let's do a 2x2 grid for "engaging" look or centered list.
+        # 4 options.
+        
+        # Option Box Config
+        box_w = 800
+        box_h = 100
+        margin_x = 100
+        margin_y = 50
+        
+        # Coordinates for 2 columns
+        # Col 1: X = width/2 - box_w - margin_x/2
+        # Col 2: X = width/2 + margin_x/2
+        
+        positions = [
+            (width//2 - box_w - 20, y_start),          # Top Left
+            (width//2 + 20, y_start),                  # Top Right
+            (width//2 - box_w - 20, y_start + box_h + 30), # Bottom Left
+            (width//2 + 20, y_start + box_h + 30)      # Bottom Right
+        ]
+        
+        labels = ["A", "B", "C", "D"]
+        
+        for i, option in enumerate(options):
+            if i >= 4: break
+            
+            x, y = positions[i]
+            
+            # Determine Color
+            fill_color = (255, 255, 255) # White box
+            text_col = (0, 0, 0)
+            
+            if show_answer and i == correct_idx:
+                fill_color = (0, 255, 0) # Green for correct
+            
+            # Draw Box
+            draw.rectangle([x, y, x+box_w, y+box_h], fill=fill_color, outline=(0,0,0), width=4)
+            
+            # Draw Text
+            opt_text = f"{labels[i]}. {option}"
+            bbox = draw.textbbox((0, 0), opt_text, font=font_option)
+            tw = bbox[2] - bbox[0]
+            th = bbox[3] - bbox[1]
+            
+            # Center text in box
+            tx = x + (box_w - tw) // 2
+            ty = y + (box_h - th) // 2
+            
+            draw.text((tx, ty), opt_text, font=font_option, fill=text_col)
+
+    return img
+
+def _file_stamp(path):
+    """(path, mtime, size) so a cached slide is redrawn if its picture changes; None if there is no file."""
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return (path, st.st_mtime_ns, st.st_size)
+
+def render_slide(text, subtext=None, width=1080, height=1920, type="question", theme_color=None, image_path=None):
+    """Portrait slide as a shared, read-only RGB image (memoized by its parameters)."""
+    return _render_slide(text, subtext, width, height, type, tuple(theme_color) if theme_color else None,
+                         _file_stamp(image_path))
+
+def create_slide(text, subtext=None, width=1080, height=1920, type="question", theme_color=None, image_path=None):
+    """Creates a slide image."""
+    return save_temp_png(render_slide(text, subtext, width, height, type, theme_color, image_path))
+
+def render_landscape_slide(text, options=None, correct_idx=None, width=1920, height=1080, type="question", show_answer=False):
+    """Landscape 16:9 slide with options as a shared, read-only RGB image (memoized by its parameters)."""
+    return _render_landscape_slide(text, tuple(options) if options else None, correct_idx, width, height, type,
+                                   show_answer)
+
+def create_landscape_slide(text, options=None, correct_idx=None, width=1920, height=1080, type="question", show_answer=False):
+    """Creates a landscape 16:9 slide with options."""
+    return save_temp_png(render_landscape_slide(text, options, correct_idx, width, height, type, show_answer))
+
+def create_countdown_slide(base_img_path, number):
+    """Overlay a large number on the existing slide."""
+    with Image.open(base_img_path) as img:
+        # White digit with an 8px black outline, rendered once per number (see anim_cache)
+        img = overlay_number(img, number, size=300, fill="white", stroke_fill="black", stroke_width=8)
+        
+        return save_temp_png(img)
@@ -1,10 +1,17 @@
 
 import os
+import json
+import time
+import hashlib
+import subprocess
+import threading
+from collections import OrderedDict
 import torch
 from PIL import Image
 import cv2
 import numpy as np
 from transformers import CLIPProcessor, CLIPModel
+from media_cache import file_fingerprint, atomic_write_json
 
 # Try to import scenedetect, handle if missing
 try:
@@ -19,9 +26,266 @@ except ImportError:
     HAS_OPEN_VIDEO = False
     print("⚠️ PySceneDetect not found. Using fixed intervals.")
 
+SCENE_INDEX_VERSION = 1
+SCENE_INDEX_STALE_LOCK_S = 6 * 3600  # a builder silent for this long is assumed dead
+TEXT_EMBED_CACHE_SIZE = 512  # LRU entries of normalized CLIP text embeddings
+
+class SceneIndex:
+    """
+    Persistent CLIP scene index stored next to the video, keyed by the video's
+    content fingerprint and the CLIP model id. Layout of <video>.sceneidx-<key>/:
+      meta.json       scene boundaries, embedding dim, rows done, complete flag
+      embeddings.f16  float16 memmap (num_scenes, dim); row i belongs to scene i
+      valid.u8        uint8 memmap; 1 where scene i's frame was embedded
+      virality.npy    float32 virality score per valid scene (written last)
+    Rows are checkpointed after every batch, so an interrupted build resumes
+    where it stopped. Finished indexes are opened read-only via memmap and can
+    be shared by any number of processes; a lock file keeps builders exclusive.
+    """
+
+    def __init__(self, video_path, model_name):
+        key = hashlib.sha1(f"{file_fingerprint(video_path)}|{model_name}|v{SCENE_INDEX_VERSION}".encode()).hexdigest()[:16]
+        stem = os.path.splitext(os.path.abspath(video_path))[0]
+        self.dir = f"{stem}.sceneidx-{key}"
+        if not os.access(os.path.dirname(stem) or ".", os.W_OK) and not os.path.isdir(self.dir):
+            fallback = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scene_index_cache")
+            self.dir = os.path.join(fallback, f"{os.path.basename(stem)}.sceneidx-{key}")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock_path = os.path.join(self.dir, "build.lock")
+        self.meta = None
+        self.embeddings = None
+        self.valid = None
+        self._locked = False
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _open_arrays(self, mode):
+        n, dim = len(self.meta["scenes"]), self.meta["dim"]
+        self.embeddings = np.memmap(os.path.join(self.dir, "embeddings.f16"), dtype=np.float16, mode=mode, shape=(n, dim))
+        self.valid = np.memmap(os.path.join(self.dir, "valid.u8"), dtype=np.uint8, mode=mode, shape=(n,))
+
+    def load(self):
+        """(scenes, embeddings float16 (V, dim), virality (V,)) for a complete index, else None."""
+        meta = self._read_meta()
+        if not meta or not meta.get("complete") or not meta.get("scenes"):
+            return None
+        try:
+            self.meta = meta
+            self._open_arrays("r")
+            rows = np.flatnonzero(self.valid)
+            virality = np.load(os.path.join(self.dir, "virality.npy"))
+        except Exception:
+            return None
+        scenes = [tuple(self.meta["scenes"][i]) for i in rows]
+        return scenes, self.embeddings[rows], virality
+
+    def partial_scenes(self):
+        """Scene list and first unprocessed row of an interrupted build, if any."""
+        meta = self._read_meta()
+        if meta and not meta.get("complete") and meta.get("scenes"):
+            return [tuple(s) for s in meta["scenes"]], int(meta.get("done", 0)), int(meta["dim"])
+        return None
+
+    def acquire(self, scenes, dim):
+        """Take the build lock and open (or create) the arrays. False if another process is building."""
+        os.makedirs(self.dir, exist_ok=True)
+        try:
+            if os.path.exists(self.lock_path) and time.time() - os.path.getmtime(self.lock_path) > SCENE_INDEX_STALE_LOCK_S:
+                os.remove(self.lock_path)
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+        except OSError:
+            return False
+        self._locked = True
+        meta = self._read_meta()
+        resume = bool(meta and meta.get("scenes") == [list(s) for s in scenes] and meta.get("dim") == dim)
+        self.meta = meta if resume else {"version": SCENE_INDEX_VERSION, "scenes": [list(s) for s in scenes],
+                                         "dim": dim, "done": 0, "complete": False}
+        self._open_arrays("r+" if resume else "w+")
+        if not resume:
+            atomic_write_json(self.meta_path, self.meta)
+        return True
+
+    def write_rows(self, rows, feats, done):
+        self.embeddings[rows] = feats.astype(np.float16)
+        self.valid[rows] = 1
+        self.embeddings.flush()
+        self.valid.flush()
+        self.meta["done"] = done
+        atomic_write_json(self.meta_path, self.meta)
+        try:
+            os.utime(self.lock_path)
+        except OSError:
+            pass
+
+    def finish(self, virality):
+        np.save(os.path.join(self.dir, "virality.npy"), np.asarray(virality, dtype=np.float32).reshape(-1))
+        self.meta["done"] = len(self.meta["scenes"])
+        self.meta["complete"] = True
+        atomic_write_json(self.meta_path, self.meta)
+
+    def release(self):
+        if self._locked:
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+            self._locked = False
+
+CROP_TRACK_FPS = 6         # analysed frames per second of footage
+CROP_TRACK_HEIGHT = 360    # decode height of the ffmpeg analysis pipe
+CROP_DETECT_HEIGHT = 180   # grayscale height the face cascade runs on
+CROP_DETECT_EVERY = 3      # run the cascade every N frames, optical-flow track in between
+CROP_SMOOTH_S = 1.5        # moving-average window of the returned trajectory
+
+_FACE_CASCADE = None
+_FACE_CASCADE_LOCK = threading.Lock()
+
+def get_face_cascade():
+    """Process-wide frontal-face Haar cascade (loaded on first use)."""
+    global _FACE_CASCADE
+    with _FACE_CASCADE_LOCK:
+        if _FACE_CASCADE is None:
+            _FACE_CASCADE = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        return _FACE_CASCADE
+
+def weighted_face_center(faces):
+    """Area-weighted mean x-center of (x, y, w, h) face boxes, or None."""
+    if len(faces) == 0:
+        return None
+    faces = np.asarray(faces, dtype=np.float64)
+    weights = faces[:, 2] * faces[:, 3]
+    return float(np.sum((faces[:, 0] + faces[:, 2] / 2) * weights) / np.sum(weights))
+
+def smooth_trajectory(centers, window):
+    """Edge-padded moving average; window is forced odd."""
+    centers = np.asarray(centers, dtype=np.float64)
+    window = max(1, int(window) | 1)
+    if len(centers) < 2 or window == 1:
+        return centers
+    pad = window // 2
+    padded = np.pad(centers, pad, mode="edge")
+    return np.convolve(padded, np.ones(window) / window, mode="valid")
+
+class CropTracker:
+    """
+    Streaming subject tracker for smart crops. The source range is decoded once,
+    sequentially, through a single ffmpeg pipe as small grayscale frames; the
+    face cascade runs on a further-downscaled copy every few frames and
+    Lucas-Kanade optical flow carries the face between detections. Frames with
+    no face fall back to the motion centroid against the previous frame.
+    """
+
+    def __init__(self, fps=CROP_TRACK_FPS, analysis_height=CROP_TRACK_HEIGHT,
+                 detect_height=CROP_DETECT_HEIGHT, detect_every=CROP_DETECT_EVERY, smooth_s=CROP_SMOOTH_S):
+        self.fps = fps
+        self.analysis_height = analysis_height
+        self.detect_height = detect_height
+        self.detect_every = max(1, detect_every)
+        self.smooth_s = smooth_s
+        self.cascade = get_face_cascade()
+
+    def _frames(self, video_path, start, end, aw, ah):
+        cmd = ["ffmpeg", "-v", "error", "-ss", f"{start:.3f}", "-i", video_path]
+        if end is not None:
+            cmd += ["-t", f"{max(0.0, end - start):.3f}"]
+        cmd += ["-an", "-vf", f"fps={self.fps},scale={aw}:{ah}", "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1"]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        frame_bytes = aw * ah
+        try:
+            while True:
+                buf = proc.stdout.read(frame_bytes)
+                if len(buf) < frame_bytes:
+                    break
+                yield np.frombuffer(buf, dtype=np.uint8).reshape(ah, aw)
+        finally:
+            proc.stdout.close()
+            proc.kill()
+            proc.wait()
+
+    def _detect(self, gray):
+        scale = self.detect_height / gray.shape[0]
+        small = cv2.resize(gray, (max(1, int(gray.shape[1] * scale)), self.detect_height), interpolation=cv2.INTER_AREA)
+        # Scale factor 1.3 for speed, minNeighbors 5 for reliability
+        faces = self.cascade.detectMultiScale(small, 1.3, 5)
+        if len(faces) == 0:
+            return None
+        return np.asarray(faces, dtype=np.float32) / scale
+
+    @staticmethod
+    def _motion_center(prev, gray):
+        diff = cv2.absdiff(prev, gray)
+        _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
+        M = cv2.moments(thresh)
+        if M["m00"] > 100: # Threshold for significant motion
+            return M["m10"] / M["m00"]
+        return None
+
+    def track(self, video_path, start=0.0, end=None, src_size=None):
+        """
+        Returns (timestamps, centers): seconds relative to `start` and the smoothed
+        crop center x in source pixels, one entry per analysed frame.
+        """
+        if src_size is None:
+            cap = cv2.VideoCapture(video_path)
+            src_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            cap.release()
+        sw, sh = src_size
+        if not sw or not sh:
+            return np.zeros(0), np.zeros(0)
+        ah = min(self.analysis_height, sh) // 2 * 2
+        aw = max(2, int(round(sw * ah / sh)) // 2 * 2)
+        to_src = sw / aw
+
+        centers = []
+        prev = None
+        points = None  # optical-flow points on the tracked face
+        face_x = None
+        for n, gray in enumerate(self._frames(video_path, start, end, aw, ah)):
+            x = None
+            if n % self.detect_every == 0:
+                faces = self._detect(gray)
+                if faces is not None:
+                    face_x = weighted_face_center(faces)
+                    bx, by, bw, bh = faces[np.argmax(faces[:, 2] * faces[:, 3])].astype(int)
+                    mask = np.zeros_like(gray)
+                    mask[by:by + bh, bx:bx + bw] = 255
+                    points = cv2.goodFeaturesToTrack(gray, 30, 0.01, 3, mask=mask)
+                else:
+                    face_x, points = None, None
+                x = face_x
+            elif points is not None and prev is not None:
+                nxt, status, _ = cv2.calcOpticalFlowPyrLK(prev, gray, points, None)
+                good = status.reshape(-1) == 1
+                if good.sum() >= 3:
+                    face_x += float(np.median(nxt[good, 0, 0] - points[good, 0, 0]))
+                    points = nxt[good].reshape(-1, 1, 2)
+                    x = face_x
+                else:
+                    face_x, points = None, None
+            if x is None and prev is not None:
+                x = self._motion_center(prev, gray)
+            if x is None:
+                # If lost, stay on the previous position (or the center)
+                x = centers[-1] if centers else aw / 2
+            centers.append(x)
+            prev = gray
+
+        timestamps = np.arange(len(centers)) / float(self.fps)
+        smoothed = smooth_trajectory(centers, round(self.smooth_s * self.fps)) * to_src
+        return timestamps, smoothed
+
 class SceneMatcher:
-    def __init__(self, video_path, model_name="openai/clip-vit-base-patch32", device=None):
+    def __init__(self, video_path, model_name="openai/clip-vit-base-patch32", device=None, use_index=True):
         self.video_path = video_path
+        self.model_name = model_name
+        self.use_index = use_index
         self.device = device if device else ("cuda" if torch.cuda.is_available() else "cpu")
         print(f"⚙️ Initializing SceneMatcher on {self.device}...")
         
@@ -37,33 +301,152 @@ class SceneMatcher:
         self.scenes = [] # List of (start_time, end_time)
         self.embeddings = None # Tensor of shape (N, 512)
         self.virality_scores = None # Tensor of shape (N, 1)
+        self.scene_starts = None # Tensors of shape (N,), built once per index
+        self.scene_ends = None
+        self.scene_durations = None
+        self._text_cache = OrderedDict() # text -> normalized embedding (dim,)
 
         if self.model:
             self._index_video()
+            self._build_scene_tensors()
+
+    def _build_scene_tensors(self):
+        """Precomputes start/end/duration tensors so queries never rebuild them from lists."""
+        if not self.scenes:
+            return
+        bounds = torch.tensor(self.scenes, dtype=torch.float32, device=self.device)
+        self.scene_starts = bounds[:, 0].contiguous()
+        self.scene_ends = bounds[:, 1].contiguous()
+        self.scene_durations = self.scene_ends - self.scene_starts
+
+    def encode_texts(self, texts):
+        """
+        Normalized CLIP text embeddings (len(texts), dim). Cached texts are served
+        from an LRU; the misses are encoded together in one forward pass.
+        """
+        missing = [t for t in dict.fromkeys(texts) if t not in self._text_cache]
+        if missing:
+            with torch.no_grad():
+                inputs = self.processor(text=missing, return_tensors="pt", padding=True, truncation=True).to(self.device)
+                feats = self.model.get_text_features(**inputs)
+                feats = feats / feats.norm(p=2, dim=-1, keepdim=True)
+            for text, feat in zip(missing, feats):
+                self._text_cache[text] = feat
+        out = []
+        for text in texts:
+            self._text_cache.move_to_end(text)
+            out.append(self._text_cache[text])
+        while len(self._text_cache) > TEXT_EMBED_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+        return torch.stack(out)
+
+    def _overlap_mask(self, intervals):
+        """Bool (N,) - True where a scene overlaps any of the (start, end) intervals."""
+        if not intervals:
+            return torch.zeros_like(self.scene_starts, dtype=torch.bool)
+        ex = torch.tensor(intervals, dtype=torch.float32, device=self.device).reshape(-1, 2)
+        # Overlap: (SceneStart < ExEnd) and (SceneEnd > ExStart), for every pair at once
+        hits = (self.scene_starts[:, None] < ex[None, :, 1]) & (self.scene_ends[:, None] > ex[None, :, 0])
+        return hits.any(dim=1)
+
+    def _valid_mask(self, min_start_time=0.0, exclude_intervals=None, max_end_time=None):
+        """Bool (N,) - scenes allowed by the chronological, credits and repetition filters."""
+        valid = self.scene_starts >= min_start_time
+        if max_end_time is not None:
+            valid = valid & (self.scene_ends <= max_end_time)
+        if exclude_intervals:
+            valid = valid & ~self._overlap_mask(exclude_intervals)
+        return valid
+
+    def _score_queries(self, text_features, viral_boost_descriptions=None):
+        """Final scores (Q, N) for Q normalized text embeddings against every scene."""
+        # Cosine similarity
+        base_similarity = text_features @ self.embeddings.T # (Q, N)
+        final_score = base_similarity
+        if self.virality_scores is not None:
+            # Weighted combination: only boost when base similarity is decent (>0.15)
+            # to avoid boosting irrelevant beautiful scenes
+            mask = (base_similarity > 0.15).float()
+            final_score = base_similarity + (self.virality_scores.view(1, -1) * 0.15 * mask)
+        if viral_boost_descriptions:
+            v_feats = self.encode_texts(list(viral_boost_descriptions))
+            # For each scene, take its max similarity to ANY viral description
+            max_v_sim, _ = (v_feats @ self.embeddings.T).max(dim=0) # (N,)
+            # Only boost if the scene actually looks like the viral concept (>0.22)
+            mask_viral = (max_v_sim > 0.22).float()
+            final_score = final_score + (max_v_sim * 0.35 * mask_viral).unsqueeze(0)
+        return final_score
+
+    def _open_scene_index(self):
+        if not self.use_index:
+            return None
+        try:
+            return SceneIndex(self.video_path, self.model_name)
+        except Exception as e:
+            print(f"⚠️ Scene index unavailable: {e}")
+            return None
 
     def _index_video(self):
-        """Detects scenes and computes embeddings for them."""
-        print("🔍 Detecting scenes (this may take a minute)...")
-        self.scenes = self._detect_scenes()
+        """Detects scenes and computes embeddings for them (reusing the on-disk index when present)."""
+        index = self._open_scene_index()
+        if index is not None:
+            t0 = time.time()
+            loaded = index.load()
+            if loaded:
+                self.scenes, emb, virality = loaded
+                self.embeddings = torch.from_numpy(np.asarray(emb, dtype=np.float32)).to(self.device)
+                self.virality_scores = torch.from_numpy(virality).unsqueeze(1).to(self.device)
+                print(f"✅ Loaded scene index ({len(self.scenes)} scenes) in {(time.time() - t0) * 1000:.0f} ms.")
+                return
+
+        dim = int(getattr(self.model.config, "projection_dim", 512))
+        partial = index.partial_scenes() if index is not None else None
+        start_row = 0
+        if partial and partial[2] == dim:
+            self.scenes, start_row, _ = partial
+            print(f"🔁 Resuming interrupted scene index at scene {start_row}/{len(self.scenes)}.")
+        else:
+            print("🔍 Detecting scenes (this may take a minute)...")
+            self.scenes = self._detect_scenes()
         print(f"   Found {len(self.scenes)} scenes.")
         
         if not self.scenes:
             return
 
+        # Embedding rows land in the memmapped index when we hold its build lock,
+        # otherwise (no index, or another process is building it) in memory only.
+        if index is not None and not index.acquire(self.scenes, dim):
+            print("⚠️ Scene index is being built by another process; indexing in memory.")
+            index = None
+        if index is not None:
+            emb_rows, valid_rows = index.embeddings, index.valid
+        else:
+            start_row = 0
+            emb_rows = np.zeros((len(self.scenes), dim), dtype=np.float16)
+            valid_rows = np.zeros(len(self.scenes), dtype=np.uint8)
+
+        try:
+            self._embed_scenes(index, emb_rows, valid_rows, start_row)
+        finally:
+            if index is not None:
+                index.release()
+
+    def _embed_scenes(self, index, emb_rows, valid_rows, start_row):
+        """Embeds each scene's mid frame from start_row on, then finalises scenes/embeddings."""
         print("📸 Extracting keyframes and computing embeddings (batched)...")
         
         cap = cv2.VideoCapture(self.video_path)
         batch_size = 8 # Reduced batch size further for safety
         current_batch_images = []
         current_batch_indices = []
-        all_embeddings = []
-        valid_indices = [] # Indices of scenes that were successfully processed
         
         # Total scenes
         total_scenes = len(self.scenes)
         
         with torch.no_grad():
             for i, (start, end) in enumerate(self.scenes):
+                if i < start_row:
+                    continue
                 # Extract middle frame
                 mid_point = (start + end) / 2
                 cap.set(cv2.CAP_PROP_POS_MSEC, mid_point * 1000)
@@ -92,8 +475,12 @@ class SceneMatcher:
                         # Normalize
                         image_features = image_features / image_features.norm(p=2, dim=-1, keepdim=True)
                         # Move to CPU to save VRAM
-                        all_embeddings.append(image_features.cpu())
-                        valid_indices.extend(current_batch_indices)
+                        feats = image_features.cpu().numpy()
+                        if index is not None:
+                            index.write_rows(current_batch_indices, feats, i + 1)
+                        else:
+                            emb_rows[current_batch_indices] = feats.astype(np.float16)
+                            valid_rows[current_batch_indices] = 1
                     except Exception as e:
                         print(f"⚠️ Batch processing failed: {e}")
                         # If a batch fails, we lose those scenes, but we continue
@@ -109,19 +496,18 @@ class SceneMatcher:
 
         cap.release()
         
-        if all_embeddings:
-            self.embeddings = torch.cat(all_embeddings, dim=0).to(self.device) # Move back to device if needed, or keep on CPU if large
-            # If embeddings are large, keep on CPU?
-            # self.device might be CUDA. If we keep all on CUDA, we might OOM.
-            # Let's keep self.embeddings on the device for fast similarity search, 
-            # BUT if it's too big, we might want CPU. 2600 * 512 floats is small (5MB). 
-            # The IMAGES were the problem.
+        valid_indices = np.flatnonzero(valid_rows)
+        if len(valid_indices):
+            # 2600 * 512 floats is small (5MB), so keep them on the device for fast similarity search
+            self.embeddings = torch.from_numpy(np.asarray(emb_rows[valid_indices], dtype=np.float32)).to(self.device)
             
             # Update scenes to only include valid ones
             self.scenes = [self.scenes[i] for i in valid_indices]
             
             # Compute Virality Scores
             self.virality_scores = self._compute_virality_scores()
+            if index is not None and self.virality_scores is not None:
+                index.finish(self.virality_scores.squeeze(1).cpu().numpy())
             
             print(f"✅ Indexed {len(self.scenes)} scenes successfully.")
         else:
@@ -271,75 +657,10 @@ class SceneMatcher:
             return None
             
         with torch.no_grad():
-            # 1. Base Text Match
-            inputs = self.processor(text=[text_query], return_tensors="pt", padding=True).to(self.device)
-            text_features = self.model.get_text_features(**inputs)
-            text_features = text_features / text_features.norm(p=2, dim=-1, keepdim=True)
-            
-            # Cosine similarity
-            base_similarity = (text_features @ self.embeddings.T).squeeze(0) # (N,)
-            
-            # 2. Viral Quality Boost (General visual appeal)
-            final_score = base_similarity
-            if self.virality_scores is not None:
-                # Weighted combination: 70% relevance, 30% visual appeal
-                # Only apply if base similarity is decent (>0.15) to avoid boosting irrelevant beautiful scenes
-                mask = (base_similarity > 0.15).float()
-                final_score = base_similarity + (self.virality_scores.squeeze(1) * 0.15 * mask)
-            
-            # 3. Viral Context Boost (Specific famous scenes from Ollama)
-            if viral_boost_descriptions:
-                # Encode viral descriptions
-                v_inputs = self.processor(text=viral_boost_descriptions, return_tensors="pt", padding=True).to(self.device)
-                v_feats = self.model.get_text_features(**v_inputs)
-                v_feats = v_feats / v_feats.norm(p=2, dim=-1, keepdim=True)
-                
-                # Sim matrix: (Num_Viral_Descs, Num_Scenes)
-                v_sims = v_feats @ self.embeddings.T 
-                
-                # For each scene, take its max similarity to ANY viral description
-                max_v_sim, _ = v_sims.max(dim=0) # (N,)
-                
-                # Boost scenes that look like famous scenes
-                # Only boost if the scene actually looks like the viral concept (>0.22)
-                # Increase weight to 0.35 to make them prioritized if they match
-                mask_viral = (max_v_sim > 0.22).float()
-                final_score = final_score + (max_v_sim * 0.35 * mask_viral)
-
-            # 4. Filter by min_start_time (Chronological Constraint) and max_end_time (Credits filter)
-            # Create a mask for valid scenes
-            # self.scenes is list of (start, end)
-            scene_starts = torch.tensor([s[0] for s in self.scenes], device=self.device)
-            scene_ends = torch.tensor([s[1] for s in self.scenes], device=self.device)
-            
-            time_mask = (scene_starts >= min_start_time).float()
-            
-            # Apply max_end_time if provided
-            if max_end_time is not None:
-                end_mask = (scene_ends <= max_end_time).float()
-                time_mask = time_mask * end_mask
-            
-            # 5. Filter by exclude_intervals (No Repetition)
-            if exclude_intervals:
-                # 1.0 = valid, 0.0 = invalid
-                overlap_mask = torch.ones_like(scene_starts)
-                
-                for ex_start, ex_end in exclude_intervals:
-                    # Check if scene overlaps with exclusion zone
-                    # Overlap: (SceneStart < ExEnd) and (SceneEnd > ExStart)
-                    # We want to find INVALID scenes where this is true
-                    
-                    # Using tensor logic for speed
-                    # invalid if (start < ex_end) & (end > ex_start)
-                    invalid = (scene_starts < ex_end) & (scene_ends > ex_start)
-                    
-                    # Update mask: if invalid is True, set position to 0
-                    overlap_mask[invalid] = 0.0
-                    
-                time_mask = time_mask * overlap_mask
-            
-            # Apply mask (set invalid scores to -inf)
-            final_score = final_score * time_mask + (1 - time_mask) * -1e9
+            text_features = self.encode_texts([text_query])
+            final_score = self._score_queries(text_features, viral_boost_descriptions).squeeze(0)
+            valid = self._valid_mask(min_start_time, exclude_intervals, max_end_time)
+            final_score = final_score.masked_fill(~valid, -1e9)
             
             # Get best match
             best_val, best_idx = torch.max(final_score, dim=0)
@@ -348,12 +669,44 @@ class SceneMatcher:
             if best_val.item() < -100:
                 return None
                 
+            best_idx = best_idx.item()
             return {
                 'start': self.scenes[best_idx][0],
                 'end': self.scenes[best_idx][1],
                 'score': best_val.item()
             }
 
+    def find_best_matches(self, queries, viral_boost_descriptions=None, min_start_time=0.0, exclude_intervals=None, max_end_time=None):
+        """
+        Matches many beats at once: all queries are scored in one matrix multiply,
+        then assigned greedily (highest remaining score first) so that no two beats
+        share overlapping footage. Returns a list aligned with `queries`; entries
+        are dicts like find_best_match's, or None when nothing valid is left.
+        """
+        results = [None] * len(queries)
+        if self.embeddings is None or self.model is None or not queries:
+            return results
+            
+        with torch.no_grad():
+            text_features = self.encode_texts(list(queries))
+            scores = self._score_queries(text_features, viral_boost_descriptions) # (Q, N)
+            valid = self._valid_mask(min_start_time, exclude_intervals, max_end_time)
+            scores = scores.masked_fill(~valid.unsqueeze(0), -1e9)
+            
+            num_scenes = scores.shape[1]
+            for _ in range(len(queries)):
+                best_val, flat_idx = torch.max(scores.view(-1), dim=0)
+                if best_val.item() < -100:
+                    break
+                q, idx = divmod(flat_idx.item(), num_scenes)
+                start, end = self.scenes[idx]
+                results[q] = {'start': start, 'end': end, 'score': best_val.item()}
+                # Retire this beat and every scene overlapping the footage it took
+                scores[q] = -1e9
+                taken = (self.scene_starts < end) & (self.scene_ends > start)
+                scores[:, taken] = -1e9
+        return results
+
     def get_best_crop_center(self, clip_or_frame, aspect_ratio=1.0):
         """
         Determines the best X-coordinate for the center of the crop.
@@ -412,24 +765,12 @@ class SceneMatcher:
             else:
                 gray = frame
                 
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            face_cascade = cv2.CascadeClassifier(cascade_path)
-            
             # Scale factor 1.3 for speed, minNeighbors 5 for reliability
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+            faces = get_face_cascade().detectMultiScale(gray, 1.3, 5)
             
             if len(faces) > 0:
                 # Weighted average of face centers
-                total_weight = 0
-                weighted_sum_x = 0
-                
-                for (x, y, fw, fh) in faces:
-                    weight = fw * fh
-                    center = x + fw / 2
-                    weighted_sum_x += center * weight
-                    total_weight += weight
-                    
-                final_center_x = weighted_sum_x / total_weight
+                final_center_x = weighted_face_center(faces)
                 print(f"   👤 Smart Crop: Centered on Face(s) at x={final_center_x:.0f}")
                 return final_center_x
         except Exception as e:
@@ -444,114 +785,61 @@ class SceneMatcher:
         # 3. Fallback to Center
         return w / 2
 
-    def generate_crop_trajectory(self, clip, interval=0.5):
+    def generate_crop_trajectory(self, clip, interval=0.5, source_path=None, source_start=0.0):
         """
         Generates a smooth function f(t) -> center_x that tracks the subject.
+        With source_path (the file `clip` was cut from, starting at source_start)
+        the range is streamed once through CropTracker; otherwise frames are
+        sampled from the clip every `interval` seconds.
         """
-        import numpy as np
-        
         duration = clip.duration
-        timestamps = np.arange(0, duration, interval)
+        w = clip.w
+        if duration is None or duration <= 0:
+            return lambda t: w / 2
+
+        if source_path and os.path.exists(source_path):
+            try:
+                timestamps, smoothed = CropTracker().track(source_path, source_start, source_start + duration, src_size=(clip.w, clip.h))
+            except Exception as e:
+                print(f"   ⚠️ Streaming crop tracker failed: {e}")
+                timestamps = np.zeros(0)
+        else:
+            timestamps = np.zeros(0)
+
+        if len(timestamps) == 0:
+            timestamps, smoothed = self._sample_crop_trajectory(clip, interval)
         if len(timestamps) == 0:
-            return lambda t: clip.w / 2
+            return lambda t: w / 2
+        print(f"   🎥 Tracked subject across {len(timestamps)} frames.")
+
+        def get_center(t):
+            return float(np.interp(t, timestamps, smoothed))
             
-        centers = []
+        return get_center
+
+    def _sample_crop_trajectory(self, clip, interval=0.5):
+        """Fallback for clips without a backing file: one get_frame per sample, motion vs the previous sample."""
+        timestamps = np.arange(0, clip.duration, interval)
+        tracker = CropTracker(fps=1.0 / interval)
         w = clip.w
-        
-        print(f"   🎥 Tracking subject across {len(timestamps)} frames...")
-        
-        # 1. Sample Keypoints
+        centers = []
+        prev = None
         for t in timestamps:
             try:
-                # Use get_best_crop_center logic for this frame
-                # We extract frame manually to optimize
                 frame = clip.get_frame(t)
-                
-                # REUSE LOGIC: But we need to refactor slightly or just copy-paste specific logic for speed
-                # Calling get_best_crop_center with frame is fine
-                # But we want to favor continuity. 
-                # If we lose face, maybe we should stay near previous?
-                
-                # Let's trust get_best_crop_center's hierarchy (Face > Motion > Center)
-                # But we pass the frame directly so it doesn't re-read
-                # Note: Motion detection in get_best_crop_center requires a clip, not frame.
-                # So we lose motion detection if we pass frame.
-                # FIX: We should pass a small subclip or handle motion here.
-                
-                # Simple Motion here:
-                motion_x = None
-                if t + 0.2 < duration:
-                     next_frame = clip.get_frame(t + 0.2)
-                     # Downscale for speed
-                     h_small, w_small = 360, int(360 * w / frame.shape[0])
-                     f1 = cv2.resize(frame, (w_small, h_small))
-                     f2 = cv2.resize(next_frame, (w_small, h_small))
-                     
-                     g1 = cv2.cvtColor(f1, cv2.COLOR_RGB2GRAY)
-                     g2 = cv2.cvtColor(f2, cv2.COLOR_RGB2GRAY)
-                     diff = cv2.absdiff(g1, g2)
-                     _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
-                     M = cv2.moments(thresh)
-                     if M["m00"] > 100:
-                         mx = int(M["m10"] / M["m00"])
-                         motion_x = mx * (w / w_small)
-                
-                # Face Detection
-                face_x = None
-                # Reuse the face logic from get_best_crop_center but optimized
-                gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
-                cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-                face_cascade = cv2.CascadeClassifier(cascade_path)
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-                if len(faces) > 0:
-                    total_weight = 0
-                    weighted_sum_x = 0
-                    for (x, y, fw, fh) in faces:
-                        weight = fw * fh
-                        center = x + fw / 2
-                        weighted_sum_x += center * weight
-                        total_weight += weight
-                    face_x = weighted_sum_x / total_weight
-
-                # Decide
-                if face_x is not None:
-                    centers.append(face_x)
-                elif motion_x is not None:
-                    centers.append(motion_x)
-                else:
-                    # If lost, use previous or center
-                    if centers:
-                        centers.append(centers[-1])
-                    else:
-                        centers.append(w / 2)
-                        
+                scale = tracker.analysis_height / frame.shape[0]
+                gray = cv2.cvtColor(cv2.resize(frame, (int(frame.shape[1] * scale), tracker.analysis_height)), cv2.COLOR_RGB2GRAY)
+                faces = tracker._detect(gray)
+                x = weighted_face_center(faces) if faces is not None else None
+                if x is None and prev is not None:
+                    x = tracker._motion_center(prev, gray)
+                centers.append(x / scale if x is not None else (centers[-1] if centers else w / 2))
+                prev = gray
             except Exception as e:
                 # print(f"Frame analysis failed: {e}")
-                if centers:
-                    centers.append(centers[-1])
-                else:
-                    centers.append(w / 2)
-
-        # 2. Smooth the path (Moving Average)
+                centers.append(centers[-1] if centers else w / 2)
         # Window size 3 (approx 1.5 sec)
-        smoothed = []
-        window = 3
-        for i in range(len(centers)):
-            start = max(0, i - window // 2)
-            end = min(len(centers), i + window // 2 + 1)
-            chunk = centers[start:end]
-            smoothed.append(sum(chunk) / len(chunk))
-            
-        # 3. Create Interpolator
-        def get_center(t):
-            # Find indices
-            if t <= timestamps[0]: return smoothed[0]
-            if t >= timestamps[-1]: return smoothed[-1]
-            
-            # Linear interp
-            return np.interp(t, timestamps, smoothed)
-            
-        return get_center
+        return timestamps, smooth_trajectory(centers, 3)
 
 if __name__ == "__main__":
     # Test
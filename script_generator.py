@@ -430,7 +430,56 @@ class ScriptGenerator:
         except Exception as e:
             print(f"Keyword Extraction Error: {e}")
         
-        # Fallback: simple heuristic
+        return self._image_term_heuristic(text)
+
+    def extract_image_search_terms(self, texts: list) -> list:
+        """
+        Batched extract_image_search_term: one LLM round trip for all texts.
+        Returns one term per text, in order; any the model leaves out or garbles
+        fall back to the heuristic.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        system_prompt = ("You are an image search assistant. For each numbered text, extract the single most important "
+                         "noun or subject for finding a relevant photo. Do not include 'image of' or similar. "
+                         'Output ONLY JSON: {"terms": ["term for text 1", "term for text 2", ...]} with exactly one '
+                         "short term per text, in the same order.")
+        user_prompt = "\n".join(f"{i + 1}. {text}" for i, text in enumerate(texts))
+
+        terms = []
+        try:
+            if self.use_ollama:
+                self.ensure_service_running()
+                import requests
+                url = f"{self.ollama_url}/api/chat"
+                payload = {
+                    "model": self.ollama_model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "stream": False,
+                    "format": "json"
+                }
+                response = requests.post(url, json=payload, timeout=60)
+                if response.status_code == 200:
+                    terms = self._parse_json_dict(response.json().get("message", {}).get("content", "")).get("terms", [])
+            elif self.openai_api_key:
+                terms = self._generate_openai_chart(system_prompt, user_prompt).get("terms", [])
+        except Exception as e:
+            print(f"Keyword Extraction Error: {e}")
+
+        if not isinstance(terms, list):
+            terms = []
+        results = []
+        for i, text in enumerate(texts):
+            term = terms[i] if i < len(terms) and isinstance(terms[i], str) else ""
+            term = term.replace('"', '').replace("'", "").split('\n')[0].strip()
+            results.append(term or self._image_term_heuristic(text))
+        return results
+
+    def _image_term_heuristic(self, text: str) -> str:
         # Return the longest word starting with capital letter (usually proper noun)
         words = [w.strip("?,.!") for w in text.split()]
         capitals = [w for w in words if w and w[0].isupper() and len(w) > 3]
@@ -0,0 +1,285 @@
+"""
+Long-lived Stable Diffusion worker.
+
+The worker process loads AIVisualGenerator once and serves jobs over a local
+socket (multiprocessing.connection, authenticated). Clients submit a list of
+jobs; the worker queues them, groups compatible image jobs into one pipeline
+call (up to SD_WORKER_MAX_BATCH prompts), and streams a result message back as
+each job finishes. With no clients and no jobs for SD_WORKER_IDLE_S seconds it
+exits and frees the model.
+
+Job dict: {"mode": "image" | "ken_burns", "topic", "output", "duration"?, "style"?}
+Result:   {"index", "ok", "output", "error", "seconds"}
+
+    python sd_worker.py --serve [--idle 600]    # normally started by SDWorkerClient
+"""
+import os
+import sys
+import json
+import time
+import queue
+import secrets
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Listener, Client
+
+SD_WORKER_IDLE_S = int(os.environ.get("SD_WORKER_IDLE_S", "600"))
+SD_WORKER_MAX_BATCH = int(os.environ.get("SD_WORKER_MAX_BATCH", "2"))
+SD_WORKER_START_TIMEOUT_S = 120
+SD_WORKER_STATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sd_worker.json")
+KB_WORKERS = min(4, os.cpu_count() or 1)
+GENERATOR_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_visual_generator.py")
+
+def _default_generator():
+    from ai_visual_generator import AIVisualGenerator
+    return AIVisualGenerator()
+
+class SDWorkerServer:
+    def __init__(self, idle_s=SD_WORKER_IDLE_S, max_batch=SD_WORKER_MAX_BATCH,
+                 generator_factory=_default_generator, state_path=SD_WORKER_STATE):
+        self.idle_s = idle_s
+        self.max_batch = max(1, max_batch)
+        self.generator_factory = generator_factory
+        self.state_path = state_path
+        self.jobs = queue.Queue()
+        self.generator = None
+        self.clients = 0
+        self.last_activity = time.time()
+        self.stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def serve(self, port=0):
+        authkey = secrets.token_bytes(16)
+        listener = Listener(("127.0.0.1", port), authkey=authkey)
+        state = {"port": listener.address[1], "authkey": authkey.hex(), "pid": os.getpid()}
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+        print(f"🧠 SD worker listening on 127.0.0.1:{state['port']} (idle exit after {self.idle_s}s)", flush=True)
+        threading.Thread(target=self._accept_loop, args=(listener,), daemon=True).start()
+        try:
+            self._work_loop()
+        finally:
+            try:
+                with open(self.state_path) as f:
+                    if json.load(f).get("pid") == os.getpid():
+                        os.remove(self.state_path)
+            except Exception:
+                pass
+            listener.close()
+        print("💤 SD worker idle, shutting down.", flush=True)
+
+    def _accept_loop(self, listener):
+        while not self.stop.is_set():
+            try:
+                conn = listener.accept()
+            except Exception:
+                continue
+            threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+
+    def _handle_client(self, conn):
+        send_lock = threading.Lock()
+        with self._lock:
+            self.clients += 1
+            self.last_activity = time.time()
+        try:
+            while True:
+                msg = conn.recv()
+                op = msg.get("op")
+                if op == "submit":
+                    for i, job in enumerate(msg["jobs"]):
+                        self.jobs.put((conn, send_lock, i, job))
+                elif op == "ping":
+                    with send_lock:
+                        conn.send({"op": "pong", "pid": os.getpid(), "queued": self.jobs.qsize()})
+                elif op == "shutdown":
+                    self.stop.set()
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._lock:
+                self.clients -= 1
+                self.last_activity = time.time()
+
+    def _next_batch(self):
+        """Blocks briefly for a job, then adds queued image jobs that can share its pipeline call."""
+        first = self.jobs.get(timeout=1.0)
+        batch, held = [first], []
+        while len(batch) < self.max_batch:
+            try:
+                item = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if item[3].get("style", "realistic") == first[3].get("style", "realistic"):
+                batch.append(item)
+            else:
+                held.append(item)
+        for item in held:
+            self.jobs.put(item)
+        return batch
+
+    def _work_loop(self):
+        while not self.stop.is_set():
+            try:
+                batch = self._next_batch()
+            except queue.Empty:
+                with self._lock:
+                    idle = self.clients == 0 and time.time() - self.last_activity > self.idle_s
+                if idle:
+                    break
+                continue
+            self._run_batch(batch)
+            with self._lock:
+                self.last_activity = time.time()
+
+    def _run_batch(self, batch):
+        t0 = time.time()
+        if self.generator is None:
+            self.generator = self.generator_factory()
+        jobs = [item[3] for item in batch]
+        # Every job starts from an image; ken_burns jobs render theirs to a temp png first
+        image_paths = [job["output"] if job.get("mode", "image") == "image" else
+                       os.path.splitext(job["output"])[0] + "_temp.png" for job in jobs]
+        try:
+            made = self.generator.generate_images([job["topic"] for job in jobs], image_paths,
+                                                  style=jobs[0].get("style", "realistic"))
+        except Exception as e:
+            made, error = [None] * len(jobs), str(e)
+        else:
+            error = None
+        per_image = (time.time() - t0) / len(jobs)
+
+        def finish(item, image_path):
+            conn, send_lock, index, job = item
+            start = time.time()
+            ok, err = bool(image_path), error or (None if image_path else "image generation failed")
+            if ok and job.get("mode", "image") != "image":
+                try:
+                    ok = bool(self.generator.create_ken_burns_video(image_path, job["output"],
+                                                                    duration=job.get("duration", 5.0)))
+                    err = None if ok else "ken burns failed"
+                finally:
+                    if os.path.exists(image_path):
+                        os.remove(image_path)
+            result = {"op": "result", "index": index, "ok": ok, "output": job["output"] if ok else None,
+                      "error": err, "seconds": round(per_image + time.time() - start, 2)}
+            try:
+                with send_lock:
+                    conn.send(result)
+            except Exception:
+                pass  # client went away; keep serving the others
+
+        # Ken Burns renders are frame warps piped to ffmpeg, so a batch's clips encode side by side
+        with ThreadPoolExecutor(max_workers=min(len(batch), KB_WORKERS)) as pool:
+            list(pool.map(finish, batch, made))
+
+class SDWorkerClient:
+    """Connects to (or starts) the shared worker and runs jobs through it."""
+
+    def __init__(self, idle_s=SD_WORKER_IDLE_S, state_path=SD_WORKER_STATE, start_timeout=SD_WORKER_START_TIMEOUT_S):
+        self.idle_s = idle_s
+        self.state_path = state_path
+        self.start_timeout = start_timeout
+        self.conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        with open(self.state_path) as f:
+            state = json.load(f)
+        return Client(("127.0.0.1", state["port"]), authkey=bytes.fromhex(state["authkey"]))
+
+    def connect(self):
+        if self.conn is not None:
+            return self.conn
+        try:
+            self.conn = self._connect()
+            return self.conn
+        except Exception:
+            pass
+        print("🚀 Starting persistent SD worker...")
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", "--idle", str(self.idle_s),
+                                 "--state", self.state_path])
+        deadline = time.time() + self.start_timeout
+        while time.time() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"SD worker exited with code {proc.returncode}")
+            try:
+                self.conn = self._connect()
+                return self.conn
+            except Exception:
+                time.sleep(0.2)
+        raise TimeoutError("SD worker did not start in time")
+
+    def iter_results(self, jobs):
+        """Submits jobs and yields result dicts as the worker finishes them (completion order)."""
+        jobs = [dict(job, output=os.path.abspath(job["output"])) for job in jobs]
+        with self._lock:
+            conn = self.connect()
+            conn.send({"op": "submit", "jobs": jobs})
+            for _ in jobs:
+                yield conn.recv()
+
+    def run(self, jobs):
+        results = [None] * len(jobs)
+        for res in self.iter_results(jobs):
+            results[res["index"]] = res
+        return results
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+_CLIENT = None
+
+def get_sd_worker():
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = SDWorkerClient()
+    return _CLIENT
+
+def _run_subprocess(job):
+    """Legacy path: one generator process per job."""
+    t0 = time.time()
+    cmd = [sys.executable, GENERATOR_SCRIPT, "--topic", job["topic"], "--output", job["output"]]
+    if job.get("mode", "image") != "image":
+        cmd += ["--mode", job["mode"], "--duration", str(job.get("duration", 5.0))]
+    try:
+        subprocess.run(cmd, check=True)
+        ok, err = os.path.exists(job["output"]), None
+    except Exception as e:
+        ok, err = False, str(e)
+    return {"ok": ok, "output": job["output"] if ok else None, "error": err, "seconds": round(time.time() - t0, 2)}
+
+def run_sd_jobs(jobs):
+    """
+    Runs generation jobs through the persistent worker, falling back to one
+    subprocess per job for anything the worker could not deliver. Results are in job order.
+    """
+    results = [None] * len(jobs)
+    try:
+        for res in get_sd_worker().iter_results(jobs):
+            results[res["index"]] = res
+    except Exception as e:
+        print(f"⚠️ SD worker unavailable ({e}); falling back to per-image subprocesses.")
+        get_sd_worker().close()
+    for i, job in enumerate(jobs):
+        if results[i] is None:
+            results[i] = dict(_run_subprocess(job), index=i)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", action="store_true", help="Run the worker")
+    parser.add_argument("--idle", type=int, default=SD_WORKER_IDLE_S, help="Exit after this many idle seconds")
+    parser.add_argument("--state", default=SD_WORKER_STATE, help="Where to publish port/authkey")
+    parser.add_argument("--batch", type=int, default=SD_WORKER_MAX_BATCH, help="Max prompts per pipeline call")
+    args = parser.parse_args()
+    if args.serve:
+        SDWorkerServer(idle_s=args.idle, max_batch=args.batch, state_path=args.state).serve()
+    else:
+        parser.print_help()
@@ -0,0 +1,143 @@
+"""
+Generated sound-effect bank for the quiz renderers.
+
+Beeps, whooshes, dings and countdown beep tracks are deterministic for their
+parameters (the whoosh's noise is seeded), so each one is synthesised once per
+(effect, parameters, sample rate) as an int16 numpy buffer and written once as
+a wav into sfx_cache/ next to this script. Every use gets the same shared path
+(or the same MoviePy AudioClip), instead of re-synthesising a sample loop into
+a fresh temp file per question. File names carry a hash of the parameters and
+SFX_BANK_VERSION, so changing a waveform never serves a stale file.
+"""
+import os
+import io
+import json
+import wave
+import hashlib
+import threading
+
+import numpy as np
+
+from media_cache import atomic_write_bytes
+
+SFX_BANK_VERSION = 1
+SFX_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sfx_cache")
+SFX_SAMPLE_RATE = 44100
+WHOOSH_SEED = 1337
+
+def _to_int16(signal, amplitude):
+    return (32767.0 * amplitude * signal).astype(np.int16)
+
+def beep_samples(duration=0.1, freq=1000, sample_rate=SFX_SAMPLE_RATE):
+    """Sine beep at 30% volume."""
+    i = np.arange(int(sample_rate * duration))
+    return _to_int16(np.sin(2.0 * np.pi * freq * i / sample_rate), 0.3)
+
+def ding_samples(duration=0.5, freq=800, sample_rate=SFX_SAMPLE_RATE):
+    """Sine 'ding' at 50% volume with an e^(-5t) decay."""
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    return _to_int16(np.exp(-5 * t) * np.sin(2.0 * np.pi * freq * t), 0.5)
+
+def whoosh_samples(duration=0.3, sample_rate=SFX_SAMPLE_RATE, seed=WHOOSH_SEED):
+    """White noise under a sin^2 rise/fall envelope; seeded, so every call is the same whoosh."""
+    n_samples = int(sample_rate * duration)
+    envelope = np.sin(np.pi * np.arange(n_samples) / n_samples) ** 2
+    noise = np.random.default_rng(seed).uniform(-1, 1, n_samples)
+    return _to_int16(envelope * noise, 0.3)
+
+def beep_track_samples(seconds=10, beep_duration=0.1, freq=800, final_freq=None, sample_rate=SFX_SAMPLE_RATE):
+    """`seconds` of silence with a beep at the start of every second (the last one at final_freq if given)."""
+    track = np.zeros(int(sample_rate * seconds), dtype=np.int16)
+    for k in range(seconds):
+        beep = beep_samples(beep_duration, final_freq if final_freq and k == seconds - 1 else freq, sample_rate)
+        start = k * sample_rate
+        track[start:start + len(beep)] = beep[:len(track) - start]
+    return track
+
+SYNTHS = {
+    "beep": beep_samples,
+    "ding": ding_samples,
+    "whoosh": whoosh_samples,
+    "beep_track": beep_track_samples,
+}
+
+def wav_bytes(samples, sample_rate=SFX_SAMPLE_RATE):
+    """Mono 16-bit wav file contents for an int16 buffer."""
+    buf = io.BytesIO()
+    with wave.open(buf, "w") as obj:
+        obj.setnchannels(1)
+        obj.setsampwidth(2)
+        obj.setframerate(sample_rate)
+        obj.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+class SoundBank:
+    """
+    Shared, read-only sound effects: samples(), path() and clip() all take the
+    effect name plus its synth keyword arguments, e.g. path("ding", freq=1200).
+    """
+
+    def __init__(self, cache_dir=SFX_CACHE_DIR, sample_rate=SFX_SAMPLE_RATE):
+        self.cache_dir = cache_dir
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._paths = {}
+        self._clips = {}
+        self.synthesized = 0  # buffers computed this process
+        self.written = 0      # wav files written this process
+
+    def _key(self, effect, params):
+        if effect not in SYNTHS:
+            raise ValueError(f"Unknown sound effect '{effect}' (have: {', '.join(SYNTHS)})")
+        params = dict(params, sample_rate=params.get("sample_rate", self.sample_rate))
+        return effect, tuple(sorted(params.items()))
+
+    def samples(self, effect, **params):
+        """int16 mono buffer of the effect; shared, do not modify."""
+        key = self._key(effect, params)
+        with self._lock:
+            if key not in self._samples:
+                buf = SYNTHS[effect](**dict(key[1]))
+                buf.setflags(write=False)
+                self._samples[key] = buf
+                self.synthesized += 1
+            return self._samples[key]
+
+    def path(self, effect, **params):
+        """wav path of the effect in the cache dir, written the first time any process asks for it."""
+        key = self._key(effect, params)
+        with self._lock:
+            if key in self._paths:
+                return self._paths[key]
+        digest = hashlib.sha1(json.dumps([SFX_BANK_VERSION, key[0], key[1]]).encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(self.cache_dir, f"{effect}_{digest}.wav")
+        if not os.path.exists(path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            atomic_write_bytes(path, wav_bytes(self.samples(effect, **params), dict(key[1])["sample_rate"]))
+            with self._lock:
+                self.written += 1
+        with self._lock:
+            return self._paths.setdefault(key, path)
+
+    def clip(self, effect, **params):
+        """MoviePy AudioArrayClip of the effect, one shared instance per parameter set."""
+        from moviepy.audio.AudioClip import AudioArrayClip
+        key = self._key(effect, params)
+        with self._lock:
+            if key in self._clips:
+                return self._clips[key]
+        samples = self.samples(effect, **params).astype(np.float32) / 32767.0
+        clip = AudioArrayClip(samples[:, None], fps=dict(key[1])["sample_rate"])
+        with self._lock:
+            return self._clips.setdefault(key, clip)
+
+_SOUND_BANK = None
+_SOUND_BANK_LOCK = threading.Lock()
+
+def get_sound_bank() -> SoundBank:
+    global _SOUND_BANK
+    with _SOUND_BANK_LOCK:
+        if _SOUND_BANK is None:
+            _SOUND_BANK = SoundBank()
+        return _SOUND_BANK
@@ -9,6 +9,8 @@ import string
 import whisper  
 import time
 import praw
+from tts_cache import CALM_FILTER_CHAIN, get_tts_cache, tts_cache_key
+from tts_scheduler import TTSScheduler
 
 spoken_subreddits = {
     "AskReddit": "Ask Reddit",
@@ -166,18 +168,12 @@ def post_process_audio(input_path: str) -> bool:
         base, ext = os.path.splitext(input_path)
         output_path = f"{base}_calm{ext or '.mp3'}"
 
-        filter_chain = (
-            "acompressor=ratio=2:threshold=-18dB:attack=10:release=250:makeup=1.5,"
-            "equalizer=f=6000:t=h:w=250:g=-4,"
-            "highpass=f=60,"
-            "loudnorm=I=-20:LRA=7:TP=-2.0"
-        )
 
         # Re-encode as MP3 at 160k for compatibility
         cmd = [
             ffmpeg, "-hide_banner", "-nostats", "-loglevel", "error",
             "-y", "-i", input_path,
-            "-af", filter_chain,
+            "-af", CALM_FILTER_CHAIN,
             "-c:a", "libmp3lame", "-b:a", "160k",
             output_path
         ]
@@ -209,6 +205,12 @@ def speak_and_save(text, filename="reddit_tts.mp3", voice="en-US-AriaNeural"):
     
     Default voice set to en-US-AriaNeural.
     """
+    cache = get_tts_cache()
+    key = tts_cache_key(text, "edge", voice, post_process=CALM_FILTER_CHAIN, fmt=os.path.splitext(filename)[1])
+    if cache.lookup(key, filename) is not None:
+        print(f"✅ Edge TTS audio reused from cache: {filename}")
+        return True
+    t0 = time.time()
     for attempt in range(3):
         try:
             if os.path.exists(filename):
@@ -228,6 +230,7 @@ def speak_and_save(text, filename="reddit_tts.mp3", voice="en-US-AriaNeural"):
             # 3. Post-process
             if post_process_audio(filename):
                 print(f"✅ Edge TTS audio saved to {filename}")
+                cache.store(key, filename, synth_seconds=time.time() - t0)
                 return True
             else:
                 print(f"⚠️ Post-processing failed for {filename}. Retrying...")
@@ -241,6 +244,20 @@ def speak_and_save(text, filename="reddit_tts.mp3", voice="en-US-AriaNeural"):
     print(f"❌ All TTS attempts failed for text: {text[:20]}...")
     return False
 
+def speak_and_save_many(items, voice="en-US-AriaNeural"):
+    """Concurrent speak_and_save for a list of (text, filename) pairs; returns a bool per item, in order."""
+    for _, filename in items:
+        if os.path.exists(filename):
+            try:
+                os.remove(filename)
+            except Exception:
+                pass
+    scheduler = TTSScheduler(max_attempts=3, backoff_base=1.5,
+                             post_process=post_process_audio, post_process_key=CALM_FILTER_CHAIN)
+    results = scheduler.run([{"text": text, "output": filename, "voice": voice} for text, filename in items])
+    print(f"🔊 {scheduler.summary()}")
+    return [r["ok"] for r in results]
+
 def generate_ass_from_whisper(audio_file, output_file="captions.ass"):
     model = whisper.load_model("base")
     result = model.transcribe(audio_file)
@@ -304,9 +321,12 @@ def generate_valid_reddit_audio():
         part_index = 1
         valid_durations = [False] * len(parts)
 
+        filenames = [f"reddit_tts_part{i+1}.mp3" for i in range(len(parts))]
+        tts_ok = speak_and_save_many(list(zip(parts, filenames)))
+
         for i, part in enumerate(parts):
-            filename = f"reddit_tts_part{i+1}.mp3"
-            if not speak_and_save(part, filename):
+            filename = filenames[i]
+            if not tts_ok[i]:
                 print(f"❌ TTS generation failed for part {i+1}, retrying whole post...\n")
                 break
 
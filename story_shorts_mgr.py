@@ -43,6 +43,7 @@ from character_voice_mgr import identify_character, get_character_reference
 from media_manager import MediaManager
 from popular_events_mgr import create_caption_clip
 from scene_matcher import SceneMatcher
+from tts_cache import get_tts_cache, tts_cache_key
 from web_researcher import WebResearcher
 
 try:
@@ -920,9 +921,13 @@ def generate_edge_audio(text, output_file, voice="en-US-ChristopherNeural"):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
-    try:
+    def _synthesize():
         loop.run_until_complete(_gen())
         return os.path.exists(output_file), timings
+
+    try:
+        key = tts_cache_key(text, "edge", voice, fmt=os.path.splitext(output_file)[1])
+        return get_tts_cache().cached(key, output_file, _synthesize)
     except Exception as e:
         print(f"❌ Edge TTS failed: {e}")
         return False, None
@@ -1065,7 +1070,11 @@ def create_story_video(user_prompt, output_file="story_output.mp4", model=DEFAUL
             # Match loop
             last_end_time = 0.0
             safe_max_time = source_clip_ref.duration - 30 # Avoid credits
-            
+
+            # Encode every beat in one CLIP pass; the per-beat searches hit the text cache
+            if scene_matcher.model is not None:
+                scene_matcher.encode_texts([truncate_for_clip(d) for d in storyboard_scenes])
+
             for i, scene_desc in enumerate(storyboard_scenes):
                 log(f"🔍 Finding match for Scene {i+1}: '{scene_desc}'...")
                 
@@ -0,0 +1,137 @@
+"""
+Tests for ClipFilter's concurrent thumbnail fetcher against local HTTP stand-ins.
+One server plays a healthy-but-slow host, another a host that fails or returns
+garbage. Run directly or through pytest.
+"""
+import os
+import time
+import shutil
+import tempfile
+import threading
+from io import BytesIO
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from PIL import Image
+
+from clip_filter import ThumbnailFetcher
+
+SLOW_DELAY = 0.4
+
+def _jpeg_bytes(size=(800, 450), color=(200, 40, 40)):
+    buf = BytesIO()
+    Image.new("RGB", size, color).save(buf, "JPEG")
+    return buf.getvalue()
+
+class StandInHost:
+    """Threaded HTTP server that records hits and peak concurrency."""
+
+    def __init__(self):
+        host = self
+        self.hits = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.image = _jpeg_bytes()
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with host.lock:
+                    host.hits += 1
+                    host.in_flight += 1
+                    host.peak = max(host.peak, host.in_flight)
+                try:
+                    if self.path.startswith("/slow/"):
+                        time.sleep(SLOW_DELAY)
+                        self._send(200, host.image)
+                    elif self.path.startswith("/fail/"):
+                        self._send(500, b"boom")
+                    elif self.path.startswith("/garbage/"):
+                        self._send(200, b"definitely not an image")
+                    elif self.path.startswith("/hang/"):
+                        time.sleep(3)
+                        self._send(200, host.image)
+                    else:
+                        self._send(200, host.image)
+                finally:
+                    with host.lock:
+                        host.in_flight -= 1
+
+            def _send(self, code, body):
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Type", "image/jpeg")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def _fetcher(cache_dir, **kwargs):
+    kwargs.setdefault("workers", 16)
+    kwargs.setdefault("per_host", 4)
+    kwargs.setdefault("timeout", 1)
+    return ThumbnailFetcher(cache_dir=cache_dir, **kwargs)
+
+def test_slow_host_is_fetched_concurrently_within_host_limit():
+    host, cache = StandInHost(), tempfile.mkdtemp()
+    try:
+        urls = [f"{host.base}/slow/{i}.jpg" for i in range(8)]
+        t0 = time.perf_counter()
+        got = dict(_fetcher(cache).iter_fetch(urls))
+        elapsed = time.perf_counter() - t0
+        assert sorted(got) == list(range(8))
+        assert host.peak <= 4
+        # 8 slow requests, 4 at a time: two rounds, not eight
+        assert elapsed < SLOW_DELAY * 4, elapsed
+        assert max(got[0].size) <= 336
+    finally:
+        host.close()
+        shutil.rmtree(cache)
+
+def test_failing_host_does_not_block_healthy_one():
+    good, bad, cache = StandInHost(), StandInHost(), tempfile.mkdtemp()
+    try:
+        urls = [f"{good.base}/ok/{i}.jpg" for i in range(4)]
+        urls += [f"{bad.base}/fail/1", f"{bad.base}/garbage/2", f"{bad.base}/hang/3", "http://127.0.0.1:9/refused"]
+        fetcher = _fetcher(cache)
+        got = dict(fetcher.iter_fetch(urls))
+        assert sorted(got) == [0, 1, 2, 3]
+        assert fetcher.failures == 4
+    finally:
+        good.close()
+        bad.close()
+        shutil.rmtree(cache)
+
+def test_cache_serves_repeat_urls_without_network():
+    host, cache = StandInHost(), tempfile.mkdtemp()
+    try:
+        urls = [f"{host.base}/ok/{i}.jpg" for i in range(5)]
+        list(_fetcher(cache).iter_fetch(urls))
+        hits_after_first = host.hits
+        second = _fetcher(cache)
+        got = dict(second.iter_fetch(urls))
+        assert len(got) == 5
+        assert host.hits == hits_after_first
+        assert second.cache_hits == 5
+        assert len(os.listdir(cache)) == 5
+    finally:
+        host.close()
+        shutil.rmtree(cache)
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,118 @@
+"""
+Tests for the parallel image prefetcher using a fake search/download backend
+with injected latency and broken results (no network). Run directly or
+through pytest.
+"""
+import io
+import time
+import shutil
+import tempfile
+import threading
+
+from PIL import Image
+
+from image_prefetch import ImagePrefetcher, TokenBucket, WebImageCache, normalize_query
+
+def _jpeg(color, size=(200, 150)):
+    out = io.BytesIO()
+    Image.new("RGB", size, color).save(out, "JPEG")
+    return out.getvalue()
+
+class FakeWeb:
+    """search() returns urls per query; fetch() serves bytes after `latency` seconds."""
+
+    def __init__(self, latency=0.2, broken=(), empty=()):
+        self.latency = latency
+        self.broken = set(broken)  # queries whose first result is not an image
+        self.empty = set(empty)    # queries with no results
+        self.searches = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def search(self, query):
+        with self._lock:
+            self.searches.append((time.monotonic(), query))
+        if query in self.empty:
+            return []
+        urls = [f"https://img.test/{query}/1.jpg", f"https://img.test/{query}/2.jpg"]
+        return (["https://img.test/broken.html"] + urls) if query in self.broken else urls
+
+    def fetch(self, url):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if url.endswith(".html"):
+                return b"<html>not an image</html>"
+            return _jpeg((len(url) * 7 % 255, 80, 160))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+def _prefetcher(cache_dir, web, rate=50.0, burst=10):
+    return ImagePrefetcher(WebImageCache(cache_dir), workers=8, bucket=TokenBucket(rate, burst),
+                           search=web.search, fetch=web.fetch)
+
+def test_parallel_fetch_then_warm_cache():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        web = FakeWeb(latency=0.2)
+        items = [[f"topic {i}", f"minimalist topic {i}"] for i in range(16)]
+        t0 = time.perf_counter()
+        entries = _prefetcher(cache_dir, web).prefetch(items)
+        cold = time.perf_counter() - t0
+        assert web.peak == 8
+        assert cold < 1.5, cold  # 16 x 0.2s downloads, 8 at a time
+        assert [e["query"] for e in entries] == [f"topic {i}" for i in range(16)]
+        assert all(len(e["sha1"]) == 40 and e["path"].startswith(cache_dir) for e in entries)
+
+        warm_web = FakeWeb(latency=0.2)
+        t0 = time.perf_counter()
+        again = _prefetcher(cache_dir, warm_web).prefetch(items)
+        assert warm_web.searches == []
+        assert [e["path"] for e in again] == [e["path"] for e in entries]
+        assert time.perf_counter() - t0 < 0.2
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_fallbacks_and_broken_results():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        web = FakeWeb(latency=0.01, broken={"cat"}, empty={"zzz", "minimalist zzz"})
+        cat, zzz = _prefetcher(cache_dir, web).prefetch([["cat"], ["zzz", "minimalist zzz", "aesthetic background"]])
+        assert cat["url"] == "https://img.test/cat/1.jpg"
+        assert zzz["query"] == "aesthetic background"
+        with Image.open(cat["path"]) as img:
+            assert img.format == "JPEG" and img.size == (200, 150)
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_duplicate_queries_search_once():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        web = FakeWeb(latency=0.1)
+        entries = _prefetcher(cache_dir, web).prefetch([["Eiffel Tower?"], ["eiffel  tower"], ["EIFFEL TOWER!"]])
+        assert [q for _, q in web.searches] == ["eiffel tower"]
+        assert len({e["path"] for e in entries}) == 1
+        assert normalize_query("  Eiffel, Tower! ") == "eiffel tower"
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_token_bucket_paces_searches():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        web = FakeWeb(latency=0.0)
+        _prefetcher(cache_dir, web, rate=10.0, burst=2).prefetch([[f"q{i}"] for i in range(8)])
+        times = sorted(t for t, _ in web.searches)
+        # 2 immediately, then one per 0.1s: the last of 8 lands ~0.6s after the first
+        assert 0.5 < times[-1] - times[0] < 0.9, times[-1] - times[0]
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,165 @@
+"""
+Tests for the generated sound-effect bank: each effect is synthesised and
+written once however many questions use it. Run directly or through pytest.
+"""
+import io
+import os
+import math
+import shutil
+import tempfile
+import subprocess
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image
+
+import sfx_bank
+import quiz_countdown
+import quiz_generator
+from quiz_assembler import QuizTimeline
+from sfx_bank import SoundBank
+
+@contextmanager
+def _patched(target, **attrs):
+    saved = {name: getattr(target, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(target, name, value)
+
+def _run_quizzes(num_questions):
+    """
+    Runs generate_quiz_video (plain and couples) and generate_long_quiz_video
+    with TTS, slides, images, the LLM and every ffmpeg call stubbed out.
+    Returns (paths of the timelines' audio cues, countdown beep inputs,
+    number of files quiz_generator wrote itself).
+    """
+    questions = [{"q": f"Question number {n}?", "a": f"Answer {n}"} for n in range(num_questions)]
+    batches = [[dict(q, options=["A", "B", "C", "D"], correct_idx=0) for q in questions[k:k + 5]]
+               for k in range(0, num_questions, 5)]
+    cues, beep_inputs, own_writes = [], [], []
+    out_dir = tempfile.mkdtemp()
+
+    class NoLLM:
+        def __init__(self, *args, **kwargs):
+            raise RuntimeError("no LLM in tests")
+
+    class NoImages:
+        def prefetch(self, alternatives):
+            return [None] * len(alternatives)
+
+    class CountdownEncoder:
+        """Stands in for the countdown's ffmpeg: records the audio input, swallows the frames."""
+        def __init__(self, cmd, stdin=None):
+            beep_inputs.append(cmd[cmd.index("-map") - 1])
+            self.stdin = io.BytesIO()
+
+        def wait(self):
+            return 0
+
+    def render(timeline, output_path, music=None, music_volume=0.2):
+        cues.extend(cue["path"] for cue in timeline.cues)
+        return output_path
+
+    def slide(*args, **kwargs):
+        return Image.new("RGB", (640, 360), "pink")
+
+    with ExitStack() as stack:
+        stack.enter_context(_patched(
+            quiz_generator,
+            generate_audio=lambda *args, **kwargs: None,
+            generate_audio_batch=lambda items, **kwargs: [None] * len(items),
+            render_slide=slide, render_landscape_slide=slide,
+            ScriptGenerator=NoLLM, ImagePrefetcher=NoImages,
+            fetch_questions_from_api=lambda amount=20: questions[:amount],
+            fetch_long_questions_from_api=lambda amount=20: batches.pop(0) if batches else [],
+            generate_youtube_metadata_ai=lambda *args, **kwargs: ("title", "description"),
+            save_used_questions=lambda *args, **kwargs: None,
+            atomic_write_bytes=lambda path, data: own_writes.append(path)))
+        stack.enter_context(_patched(quiz_countdown, subprocess=SimpleNamespace(Popen=CountdownEncoder,
+                                                                                PIPE=subprocess.PIPE)))
+        stack.enter_context(_patched(QuizTimeline, render=render,
+                                     _encode_slide=lambda self, image, frames, out: out,
+                                     _strip_audio=lambda self, src, out: out))
+        try:
+            quiz_generator.generate_quiz_video(questions, os.path.join(out_dir, "short.mp4"))
+            quiz_generator.generate_quiz_video(output_path=os.path.join(out_dir, "couples.mp4"), auto_mode=True)
+            quiz_generator.generate_long_quiz_video(os.path.join(out_dir, "long.mp4"))
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    return cues, beep_inputs, len(own_writes)
+
+def _with_bank(fn):
+    cache_dir = tempfile.mkdtemp()
+    writes = Counter()
+    real_write, real_bank = sfx_bank.atomic_write_bytes, sfx_bank._SOUND_BANK
+
+    def counting_write(path, data):
+        writes[path] += 1
+        real_write(path, data)
+
+    sfx_bank.atomic_write_bytes = counting_write
+    sfx_bank._SOUND_BANK = SoundBank(cache_dir)
+    try:
+        fn(sfx_bank._SOUND_BANK, writes, cache_dir)
+    finally:
+        sfx_bank.atomic_write_bytes = real_write
+        sfx_bank._SOUND_BANK = real_bank
+        shutil.rmtree(cache_dir)
+
+def test_fifty_question_quiz_writes_each_effect_once():
+    def check(bank, writes, cache_dir):
+        cues, beep_inputs, own_writes = _run_quizzes(50)
+        effects = [path for path in cues if path.startswith(cache_dir)]
+        # 50 short + a few couples + 50 long countdowns; whoosh/ding on every short-quiz question
+        assert len(beep_inputs) > 100 and len(effects) > 100
+        assert set(beep_inputs) | set(effects) == set(writes)
+        assert len(writes) == 5  # whoosh, ding, high ding, 2s and 10s beep tracks
+        assert max(writes.values()) == 1
+        assert bank.synthesized == bank.written == 5
+        # Every other cue is a countdown clip's own track; no per-question wavs anywhere
+        assert all(path.endswith(".mp4") for path in cues if not path.startswith(cache_dir))
+        assert own_writes == 0
+    _with_bank(check)
+
+def test_cache_dir_shared_across_banks():
+    def check(bank, writes, cache_dir):
+        first = [bank.path("whoosh"), bank.path("ding"), quiz_countdown.beep_track(2, 0.15, 800, 1200)]
+        later = SoundBank(cache_dir)
+        assert later.path("whoosh") == first[0]
+        assert later.path("beep_track", seconds=2, beep_duration=0.15, freq=800, final_freq=1200) == first[2]
+        assert later.written == 0 and later.synthesized == 0
+        assert sum(writes.values()) == 3
+    _with_bank(check)
+
+def test_waveforms_match_sample_loops():
+    bank = SoundBank(tempfile.mkdtemp())
+    sr = 44100
+    ding = bank.samples("ding", freq=1200)
+    expected = [int(32767.0 * 0.5 * math.exp(-5 * (i / sr)) * math.sin(2.0 * math.pi * 1200 * (i / sr)))
+                for i in range(int(sr * 0.5))]
+    assert len(ding) == len(expected) and np.abs(ding.astype(int) - expected).max() <= 1
+    beep = bank.samples("beep", duration=0.1, freq=800)
+    expected = [int(32767.0 * 0.3 * math.sin(2.0 * math.pi * 800 * i / sr)) for i in range(int(sr * 0.1))]
+    assert np.abs(beep.astype(int) - expected).max() <= 1
+    shutil.rmtree(bank.cache_dir, ignore_errors=True)
+
+def test_whoosh_is_seeded_and_shared():
+    a, b = SoundBank(tempfile.mkdtemp()), SoundBank(tempfile.mkdtemp())
+    assert np.array_equal(a.samples("whoosh"), b.samples("whoosh"))
+    assert a.samples("whoosh") is a.samples("whoosh")
+    assert not a.samples("whoosh").flags.writeable
+    assert len(a.samples("whoosh", duration=0.5)) == 22050
+    for bank in (a, b):
+        shutil.rmtree(bank.cache_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,104 @@
+"""
+Tests for the concurrent TTS scheduler using a local fake synthesizer with
+injected latency and failures (no network). Run directly or through pytest.
+"""
+import os
+import time
+import random
+import shutil
+import asyncio
+import tempfile
+
+from tts_cache import TTSCache
+from tts_scheduler import TTSScheduler
+
+class FakeSynth:
+    """Writes a dummy audio file after `latency` seconds; tracks peak concurrency."""
+
+    def __init__(self, latency=0.1, jitter=0.0, fail_first=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_first = fail_first or {}  # text -> number of failures before succeeding
+        self.calls = {}
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, text, output, voice, rate=None, pitch=None):
+        self.calls[text] = self.calls.get(text, 0) + 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+            if self.calls[text] <= self.fail_first.get(text, 0):
+                raise ConnectionError("simulated 503")
+            with open(output, "wb") as f:
+                f.write(text.encode("utf-8") * 50)
+        finally:
+            self.in_flight -= 1
+
+def _jobs(tmp, n):
+    return [{"text": f"paragraph {i}", "output": os.path.join(tmp, f"seg_{i}.mp3"), "voice": "en-US-FakeNeural"}
+            for i in range(n)]
+
+def test_bounded_parallelism_and_order():
+    tmp = tempfile.mkdtemp()
+    try:
+        synth = FakeSynth(latency=0.1, jitter=0.1)
+        sched = TTSScheduler(synthesize=synth, max_in_flight=5, use_cache=False)
+        t0 = time.perf_counter()
+        results = sched.run(_jobs(tmp, 20))
+        elapsed = time.perf_counter() - t0
+        assert synth.peak == 5
+        assert [r["index"] for r in results] == list(range(20))
+        assert all(r["ok"] and r["output"].endswith(f"seg_{r['index']}.mp3") for r in results)
+        # 20 jobs of 0.1-0.2s, 5 at a time: ~4 rounds instead of 20
+        assert elapsed < 1.5, elapsed
+        assert all(r["latency"] >= r["synth"] > 0 for r in results)
+    finally:
+        shutil.rmtree(tmp)
+
+def test_retries_with_backoff_then_success_or_failure():
+    tmp = tempfile.mkdtemp()
+    try:
+        synth = FakeSynth(latency=0.01, fail_first={"paragraph 1": 2, "paragraph 2": 99})
+        sched = TTSScheduler(synthesize=synth, max_in_flight=3, max_attempts=3,
+                             backoff_base=0.01, backoff_max=0.05, use_cache=False)
+        results = sched.run(_jobs(tmp, 4))
+        assert results[0]["ok"] and results[0]["attempts"] == 1
+        assert results[1]["ok"] and results[1]["attempts"] == 3
+        assert not results[2]["ok"] and results[2]["attempts"] == 3 and "503" in results[2]["error"]
+        assert results[3]["ok"]
+        assert "3/4 ok" in sched.summary() and "4 retries" in sched.summary()
+    finally:
+        shutil.rmtree(tmp)
+
+def test_cache_hits_skip_synthesis():
+    tmp, cache_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        cache = TTSCache(cache_dir)
+        first = FakeSynth(latency=0.01)
+        TTSScheduler(synthesize=first, cache=cache).run(_jobs(tmp, 6))
+        second = FakeSynth(latency=0.01)
+        results = TTSScheduler(synthesize=second, cache=cache).run(_jobs(tmp, 6))
+        assert second.calls == {}
+        assert all(r["ok"] and r["cached"] for r in results)
+        assert cache.hits == 6
+    finally:
+        shutil.rmtree(tmp)
+        shutil.rmtree(cache_dir)
+
+def test_run_inside_event_loop():
+    tmp = tempfile.mkdtemp()
+    try:
+        async def caller():
+            return TTSScheduler(synthesize=FakeSynth(latency=0.01), use_cache=False).run(_jobs(tmp, 3))
+        results = asyncio.run(caller())
+        assert all(r["ok"] for r in results)
+    finally:
+        shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
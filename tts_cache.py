@@ -0,0 +1,81 @@
+"""
+Content-addressed cache of finished TTS audio, shared by every generator.
+
+An entry is keyed by a hash of (normalized text, engine, voice, rate, pitch,
+reference-audio fingerprint, post-process chain) and holds the final audio file
+plus a small JSON sidecar with word timings and how long synthesis took. Writes
+go through temp files + os.replace, so parallel workers and separate processes
+can share the directory. The total size is bounded; least recently used entries
+are evicted first. Hit rate and synthesis seconds saved are printed at exit.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from typing import Callable
+
+from media_cache import ContentCache, file_fingerprint
+
+TTS_CACHE_VERSION = 1
+TTS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_MB", "2048")) * 1024 * 1024
+TTS_CACHE_EVICT_EVERY = 20  # stores between size checks
+
+# Calm-voice ffmpeg post-process shared by the quiz and story narrators (part of their cache keys)
+CALM_FILTER_CHAIN = (
+    "acompressor=ratio=2:threshold=-18dB:attack=10:release=250:makeup=1.5,"
+    "equalizer=f=6000:t=h:w=250:g=-4,"
+    "highpass=f=60,"
+    "loudnorm=I=-20:LRA=7:TP=-2.0"
+)
+
+def normalize_tts_text(text: str) -> str:
+    """Whitespace-insensitive form of the text (case and punctuation change the delivery, so they stay)."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+def tts_cache_key(text, engine, voice="", rate="", pitch="", reference_audio=None, post_process="", fmt="") -> str:
+    """fmt is the output extension, so an entry is only ever copied to the container it was written as."""
+    ref = file_fingerprint(reference_audio) if reference_audio and os.path.exists(reference_audio) else ""
+    payload = json.dumps([TTS_CACHE_VERSION, normalize_tts_text(text), engine, voice or "", rate or "",
+                          pitch or "", ref, post_process or "", (fmt or "").lower()])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class TTSCache(ContentCache):
+    name = "TTS cache"
+    saved = "synthesis"
+
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes, TTS_CACHE_EVICT_EVERY)
+
+    def store(self, key: str, audio_path: str, timings=None, synth_seconds: float = 0.0):
+        ext = os.path.splitext(audio_path or "")[1] or ".mp3"
+        self.store_file(key, audio_path, ext, synth_seconds, timings=timings)
+
+    def cached(self, key: str, output_path: str, synthesize: Callable[[], object]):
+        """
+        Hit: copy the cached audio to output_path and return (True, timings).
+        Miss: call synthesize(), which must write output_path and return success
+        or (success, timings); successful results are stored.
+        """
+        meta = self.lookup(key, output_path)
+        if meta is not None:
+            return True, meta.get("timings")
+        t0 = time.time()
+        result = synthesize()
+        ok, timings = result if isinstance(result, tuple) else (result, None)
+        if ok and os.path.exists(output_path) and os.path.getsize(output_path) > 100:
+            self.store(key, output_path, timings, time.time() - t0)
+        return bool(ok), timings
+
+_TTS_CACHE = None
+_TTS_CACHE_LOCK = threading.Lock()
+
+def get_tts_cache() -> TTSCache:
+    global _TTS_CACHE
+    with _TTS_CACHE_LOCK:
+        if _TTS_CACHE is None:
+            _TTS_CACHE = TTSCache()
+            _TTS_CACHE.report_at_exit("🔊")
+        return _TTS_CACHE
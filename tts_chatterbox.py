@@ -1,12 +1,25 @@
 import os
+import time
+import hashlib
+import threading
 import torch
 import soundfile as sf
 import numpy as np
+from media_cache import file_fingerprint
+from tts_cache import get_tts_cache, tts_cache_key
 
 # Singleton to hold the model
 _MODEL = None
 _LOAD_FAILED = False
 
+# Speaker conditionals are computed once per (reference voice, exaggeration),
+# kept on the loaded model and persisted here so later processes skip the encode.
+COND_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "voice_cond_cache")
+DEFAULT_EXAGGERATION = 0.5
+DEFAULT_CFG_WEIGHT = 0.5
+# model.conds is shared state, so conditioning + generation must not interleave
+_GEN_LOCK = threading.RLock()
+
 def load_model():
     global _MODEL, _LOAD_FAILED
     if _MODEL is None and not _LOAD_FAILED:
@@ -19,9 +32,10 @@ def load_model():
                 device = "cuda"
             else:
                 device = "cpu"
-                
+
             print(f"   Using device: {device}")
             _MODEL = ChatterboxTTS.from_pretrained(device=device)
+            _MODEL._cond_cache = {}
         except ImportError:
             print("⚠️ Chatterbox library not found. Install with: pip install chatterbox-tts")
             _LOAD_FAILED = True
@@ -30,53 +44,175 @@ def load_model():
             _LOAD_FAILED = True
     return _MODEL
 
-def generate_cloned_audio(text, output_path, reference_audio_path):
+def _cond_key(reference_audio_path, exaggeration):
+    return hashlib.sha1(f"{file_fingerprint(reference_audio_path)}|{exaggeration:.3f}".encode()).hexdigest()
+
+def get_conditionals(model, reference_audio_path, exaggeration=DEFAULT_EXAGGERATION):
+    """
+    Speaker conditionals for a reference voice: from the in-memory cache on the
+    model, else from disk, else encoded once via prepare_conditionals and saved.
+    """
+    key = _cond_key(reference_audio_path, exaggeration)
+    cache = getattr(model, "_cond_cache", None)
+    if cache is None:
+        cache = model._cond_cache = {}
+    if key in cache:
+        return cache[key]
+
+    path = os.path.join(COND_CACHE_DIR, key + ".pt")
+    conds = None
+    if os.path.exists(path):
+        try:
+            from chatterbox.tts import Conditionals
+            conds = Conditionals.load(path, map_location=model.device).to(model.device)
+        except Exception as e:
+            print(f"⚠️ Cached voice conditionals unreadable, re-encoding: {e}")
+    if conds is None:
+        with _GEN_LOCK:
+            print(f"🎚️ Encoding reference voice {os.path.basename(reference_audio_path)} (once)...")
+            model.prepare_conditionals(reference_audio_path, exaggeration=exaggeration)
+            conds = model.conds
+        try:
+            os.makedirs(COND_CACHE_DIR, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            conds.save(tmp)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"⚠️ Could not persist voice conditionals: {e}")
+    cache[key] = conds
+    return conds
+
+def _synthesize(model, text, reference_audio_path, exaggeration, cfg_weight):
+    """Runs one sentence with cached conditionals; returns (sr, mono float array)."""
+    with _GEN_LOCK:
+        model.conds = get_conditionals(model, reference_audio_path, exaggeration)
+        # Based on inspection: generate(text, audio_prompt_path=...); without a prompt path it uses model.conds
+        audio = model.generate(text, exaggeration=exaggeration, cfg_weight=cfg_weight)
+    return _to_mono(audio, getattr(model, "sr", 24000))
+
+def _to_mono(audio, default_sr=24000):
+    # Check return type
+    sr = default_sr # Chatterbox default usually
+    data = audio
+
+    if isinstance(audio, tuple):
+        sr, data = audio
+
+    # If data is tensor, move to cpu and numpy
+    if hasattr(data, 'cpu'):
+        data = data.cpu().numpy()
+
+    # Ensure correct shape (N,) for mono audio
+    if len(data.shape) > 1:
+        # If shape is (1, N) -> squeeze to (N,)
+        # If shape is (N, 1) -> squeeze to (N,)
+        data = data.squeeze()
+    return sr, data
+
+def generate_cloned_audio(text, output_path, reference_audio_path,
+                          exaggeration=DEFAULT_EXAGGERATION, cfg_weight=DEFAULT_CFG_WEIGHT):
     """
     Generates audio using Chatterbox TTS with voice cloning.
-    Returns True if successful, False otherwise.
+    Identical (text, reference voice) pairs are served from the shared TTS cache.
+    Returns (True, None) if successful, False/(False, None) otherwise.
     """
+    if reference_audio_path and os.path.exists(reference_audio_path):
+        key = tts_cache_key(text, "chatterbox", voice=f"exag={exaggeration},cfg={cfg_weight}",
+                            reference_audio=reference_audio_path, fmt=os.path.splitext(output_path)[1])
+        ok, timings = get_tts_cache().cached(
+            key, output_path,
+            lambda: _generate_cloned_audio(text, output_path, reference_audio_path, exaggeration, cfg_weight))
+        return ok, timings
+    return _generate_cloned_audio(text, output_path, reference_audio_path, exaggeration, cfg_weight)
+
+def _generate_cloned_audio(text, output_path, reference_audio_path,
+                           exaggeration=DEFAULT_EXAGGERATION, cfg_weight=DEFAULT_CFG_WEIGHT):
     model = load_model()
     if not model:
         return False
-        
+
     try:
         print(f"🎙️ Generating cloned audio for: '{text[:30]}...' using {os.path.basename(reference_audio_path)}")
-        
+
         # Verify reference exists
         if not os.path.exists(reference_audio_path):
             print("❌ Reference audio not found.")
             return False
-            
-        # Run Inference
-        # Based on inspection: generate(text, audio_prompt_path=...)
-        audio = model.generate(text, audio_prompt_path=reference_audio_path)
-        
-        # Save to file
-        # Check return type
-        sr = 24000 # Chatterbox default usually
-        data = audio
-        
-        if isinstance(audio, tuple):
-            sr, data = audio
-        
-        # If data is tensor, move to cpu and numpy
-        if hasattr(data, 'cpu'):
-            data = data.cpu().numpy()
-            
-        # Ensure correct shape (N,) for mono audio
-        if len(data.shape) > 1:
-            # If shape is (1, N) -> squeeze to (N,)
-            # If shape is (N, 1) -> squeeze to (N,)
-            data = data.squeeze()
-            
+
+        # Run Inference (reference voice is encoded once, then reused)
+        sr, data = _synthesize(model, text, reference_audio_path, exaggeration, cfg_weight)
+
         sf.write(output_path, data, sr)
-        
+
         if os.path.exists(output_path) and os.path.getsize(output_path) > 1000:
             return True, None
         else:
             print(f"❌ Generated audio too small or missing: {output_path}")
             return False, None
-        
+
     except Exception as e:
         print(f"❌ Chatterbox Generation Error: {e}")
         return False, None
+
+def generate_cloned_audio_batch(texts, output_paths, reference_audio_path,
+                                exaggeration=DEFAULT_EXAGGERATION, cfg_weight=DEFAULT_CFG_WEIGHT):
+    """
+    Multi-sentence cloning with one reference encode. Sentences already in the
+    TTS cache are copied; the rest go through the model's batch API when it has
+    one (generate_batch), otherwise sentence by sentence on the cached
+    conditionals. Returns a list of bools aligned with texts.
+    """
+    results = [False] * len(texts)
+    if not texts or not reference_audio_path or not os.path.exists(reference_audio_path):
+        return results
+    cache = get_tts_cache()
+    keys = [tts_cache_key(t, "chatterbox", voice=f"exag={exaggeration},cfg={cfg_weight}",
+                          reference_audio=reference_audio_path, fmt=os.path.splitext(p)[1])
+            for t, p in zip(texts, output_paths)]
+    todo = []
+    for i, (key, path) in enumerate(zip(keys, output_paths)):
+        if cache.lookup(key, path) is not None:
+            results[i] = True
+        else:
+            todo.append(i)
+    if not todo:
+        return results
+
+    model = load_model()
+    if not model:
+        return results
+
+    def write(i, sr, data, synth_seconds):
+        sf.write(output_paths[i], data, sr)
+        results[i] = os.path.exists(output_paths[i]) and os.path.getsize(output_paths[i]) > 1000
+        if results[i]:
+            cache.store(keys[i], output_paths[i], synth_seconds=synth_seconds)
+
+    # Failures are per sentence: one bad sentence must not send the rest to another voice
+    try:
+        conds = get_conditionals(model, reference_audio_path, exaggeration)
+        if hasattr(model, "generate_batch"):
+            t0 = time.time()
+            with _GEN_LOCK:
+                model.conds = conds
+                audios = model.generate_batch([texts[i] for i in todo], exaggeration=exaggeration, cfg_weight=cfg_weight)
+            per_item = (time.time() - t0) / len(todo)
+    except Exception as e:
+        print(f"❌ Chatterbox Batch Generation Error: {e}")
+        return results
+    if hasattr(model, "generate_batch"):
+        for i, audio in zip(todo, audios):
+            try:
+                sr, data = _to_mono(audio, getattr(model, "sr", 24000))
+                write(i, sr, data, per_item)
+            except Exception as e:
+                print(f"❌ Chatterbox Generation Error for '{texts[i][:30]}...': {e}")
+    else:
+        for i in todo:
+            try:
+                t0 = time.time()
+                sr, data = _synthesize(model, texts[i], reference_audio_path, exaggeration, cfg_weight)
+                write(i, sr, data, time.time() - t0)
+            except Exception as e:
+                print(f"❌ Chatterbox Generation Error for '{texts[i][:30]}...': {e}")
+    return results
@@ -0,0 +1,127 @@
+"""
+Concurrent edge-tts synthesis with a bounded number of requests in flight.
+
+Jobs are dicts: {"text", "output", "voice", "rate"?, "pitch"?}. Each job is
+checked against the shared TTS cache, synthesized with up to `max_attempts`
+tries (jittered exponential backoff between them), optionally post-processed,
+and stored back in the cache. Results come back in job order with per-segment
+latency (queueing + retries), time spent in the synthesizer, attempt count
+and whether the cache served it.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Callable, List, Optional
+
+from tts_cache import get_tts_cache, tts_cache_key
+
+TTS_MAX_IN_FLIGHT = int(os.environ.get("TTS_MAX_IN_FLIGHT", "6"))
+TTS_MAX_ATTEMPTS = 4
+TTS_BACKOFF_BASE_S = 0.5
+TTS_BACKOFF_MAX_S = 8.0
+TTS_MIN_BYTES = 100
+
+async def edge_tts_save(text, output_path, voice, rate=None, pitch=None):
+    import edge_tts
+    kwargs = {}
+    if rate:
+        kwargs["rate"] = rate
+    if pitch:
+        kwargs["pitch"] = pitch
+    communicate = edge_tts.Communicate(text, voice, **kwargs)
+    await communicate.save(output_path)
+
+class TTSScheduler:
+    def __init__(self, synthesize: Optional[Callable] = None, max_in_flight: int = TTS_MAX_IN_FLIGHT,
+                 max_attempts: int = TTS_MAX_ATTEMPTS, backoff_base: float = TTS_BACKOFF_BASE_S,
+                 backoff_max: float = TTS_BACKOFF_MAX_S, post_process: Optional[Callable[[str], bool]] = None,
+                 post_process_key: str = "", engine: str = "edge", use_cache: bool = True, cache=None):
+        self.synthesize = synthesize or edge_tts_save
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.post_process = post_process
+        self.post_process_key = post_process_key
+        self.engine = engine
+        self.cache = cache if cache is not None else (get_tts_cache() if use_cache else None)
+        self.results: List[dict] = []
+        self.wall_seconds = 0.0
+
+    def _backoff(self, attempt):
+        return min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))) * random.uniform(0.5, 1.5)
+
+    def _key(self, job):
+        return tts_cache_key(job["text"], self.engine, job.get("voice", ""), job.get("rate") or "",
+                             job.get("pitch") or "", post_process=self.post_process_key,
+                             fmt=os.path.splitext(job["output"])[1])
+
+    async def _run_job(self, index, job, slots):
+        result = {"index": index, "output": job["output"], "ok": False, "cached": False,
+                  "attempts": 0, "latency": 0.0, "synth": 0.0, "error": None}
+        t0 = time.perf_counter()
+        key = self._key(job) if self.cache is not None else None
+        if key and await asyncio.to_thread(self.cache.lookup, key, job["output"]) is not None:
+            result.update(ok=True, cached=True, latency=time.perf_counter() - t0)
+            return result
+        for attempt in range(1, self.max_attempts + 1):
+            result["attempts"] = attempt
+            try:
+                async with slots:
+                    s0 = time.perf_counter()
+                    try:
+                        await self.synthesize(job["text"], job["output"], job.get("voice"), job.get("rate"), job.get("pitch"))
+                    finally:
+                        result["synth"] += time.perf_counter() - s0
+                if not os.path.exists(job["output"]) or os.path.getsize(job["output"]) < TTS_MIN_BYTES:
+                    raise RuntimeError("empty audio")
+                if self.post_process is not None and not await asyncio.to_thread(self.post_process, job["output"]):
+                    raise RuntimeError("post-process failed")
+                result["ok"] = True
+                result["error"] = None
+                break
+            except Exception as e:
+                result["error"] = str(e) or type(e).__name__
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self._backoff(attempt))
+        result["latency"] = time.perf_counter() - t0
+        if result["ok"] and key:
+            await asyncio.to_thread(self.cache.store, key, job["output"], None, result["synth"])
+        return result
+
+    async def synthesize_all(self, jobs: List[dict]) -> List[dict]:
+        """Runs every job with at most max_in_flight synth requests open; results are in job order."""
+        t0 = time.perf_counter()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        self.results = list(await asyncio.gather(*(self._run_job(i, job, slots) for i, job in enumerate(jobs))))
+        self.wall_seconds = time.perf_counter() - t0
+        return self.results
+
+    def run(self, jobs: List[dict]) -> List[dict]:
+        """Synchronous entry point; safe to call from inside a running event loop (uses a worker thread)."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.synthesize_all(jobs))
+        box = {}
+        def _worker():
+            box["results"] = asyncio.run(self.synthesize_all(jobs))
+        t = threading.Thread(target=_worker, daemon=True)
+        t.start()
+        t.join()
+        return box["results"]
+
+    def summary(self) -> str:
+        if not self.results:
+            return "TTS scheduler: no jobs"
+        ok = sum(1 for r in self.results if r["ok"])
+        cached = sum(1 for r in self.results if r["cached"])
+        retries = sum(max(0, r["attempts"] - 1) for r in self.results)
+        lat = sorted(r["latency"] for r in self.results if not r["cached"]) or [0.0]
+        p50 = lat[len(lat) // 2]
+        p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+        return (f"TTS scheduler: {ok}/{len(self.results)} ok ({cached} cached, {retries} retries) in "
+                f"{self.wall_seconds:.1f}s, {self.max_in_flight} in flight; "
+                f"latency p50 {p50:.2f}s p95 {p95:.2f}s max {lat[-1]:.2f}s")